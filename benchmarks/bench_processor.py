@@ -0,0 +1,65 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+# Permite importar 'modules' al ejecutar el script directamente
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+import modules.processor as processor
+
+# Vocabulario para títulos sintéticos: mayúsculas, siglas, apóstrofes, guiones y no ASCII
+VOCABULARY = [
+    "Flutter", "evaluates", "U.S.", "prediction", "market", "launch", "as", "Q1", "revenue",
+    "surges", "Brazil’s", "betting", "boom", "O'Neil", "Sports-Betting", "iGaming", "G2E",
+    "Asia", "2025", "casino", "Törnqvist", "regulation", "$3.66", "billion", "N/A",
+]
+
+
+def generate_titles(n_titles, seed=42):
+    """Genera 'n_titles' títulos sintéticos, con algunos vacíos y nulos como en el scraping real."""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(n_titles):
+        roll = rng.random()
+        if roll < 0.005:
+            titles.append(None)
+        elif roll < 0.01:
+            titles.append("")
+        else:
+            titles.append(" ".join(rng.choices(VOCABULARY, k=rng.randint(3, 16))))
+    return titles
+
+
+def run_engine(titles, engine):
+    """Ejecuta process_data_with_pandas con un motor y devuelve (DataFrame, segundos)."""
+    articles = [{"title": title, "kicker": "", "image_url": "", "link": ""} for title in titles]
+    start = time.perf_counter()
+    df = processor.process_data_with_pandas(articles, engine=engine)
+    return df, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las métricas de título de processor.process_data_with_pandas.")
+    parser.add_argument("--titles", type=int, default=1_000_000, help="Número de títulos sintéticos (por defecto 1M).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generando {args.titles} títulos sintéticos...")
+    titles = generate_titles(args.titles, args.seed)
+
+    results = {}
+    for engine in ("apply", "vectorized"):
+        df, seconds = run_engine(titles, engine)
+        results[engine] = (df, seconds)
+        print(f"Motor '{engine}': {seconds:.2f} s ({args.titles / seconds:,.0f} títulos/s)")
+
+    apply_df, apply_seconds = results["apply"]
+    vectorized_df, vectorized_seconds = results["vectorized"]
+    pd.testing.assert_frame_equal(apply_df, vectorized_df)
+    print("Las columnas de salida son idénticas en ambos motores.")
+    print(f"Aceleración del motor 'vectorized': x{apply_seconds / vectorized_seconds:.2f}")
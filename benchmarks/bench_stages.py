@@ -0,0 +1,345 @@
+"""
+Benchmark por etapas del scraper, sin red: parseo HTTP (modules.scraper), extractor híbrido,
+ejecución repetida con las huellas de bloques (todos los contenedores sin cambios),
+extracción de características y predicción del scraper ML, procesamiento con pandas y carga a BigQuery
+con un cliente simulado.
+
+Cada etapa se mide sobre dos conjuntos:
+
+* fixtures: una página con los bloques guardados en model_ML/training_model/training_data/html_blocks.
+* synthetic: una página con --containers contenedores (por defecto 10000) generados a partir
+  de esos mismos bloques, con títulos y enlaces distintos en cada uno.
+
+Cada caso (etapa y conjunto) se ejecuta en un proceso nuevo para que el pico de memoria
+(RSS) sea solo suyo. Se informan el rendimiento (elementos/s), las latencias p50/p99 de
+las iteraciones y el pico de RSS. Los resultados se guardan en JSON y, con --baseline, se
+comparan con una ejecución anterior: cualquier caso que empeore más de --tolerance hace
+que el script termine con código 1.
+
+Uso:
+    python benchmarks/bench_stages.py --output benchmarks/results/latest.json
+    python benchmarks/bench_stages.py --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+# Permite importar 'modules' y 'model_ML' al ejecutar el script directamente
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+FIXTURES_DIR = os.path.join(PROJECT_ROOT, "model_ML", "training_model", "training_data", "html_blocks")
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, "benchmarks", "results", "latest.json")
+PAGE_URL = "https://www.yogonet.com/international/"
+STAGES = ["scrape_parse", "hybrid_extract", "unchanged_skip", "ml_extract", "ml_predict", "process", "load"]
+DATASETS = ["fixtures", "synthetic"]
+DEFAULT_CONTAINERS = 10_000
+# Métricas comparadas con la línea base: (nombre, True si más alto es mejor)
+COMPARED_METRICS = [("throughput", True), ("p99_ms", False), ("peak_rss_mb", False)]
+
+
+# --- Datos de entrada ---
+
+def load_fixture_blocks():
+    """HTML de los bloques guardados, en orden de nombre de archivo."""
+    blocks = []
+    for file_path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            blocks.append(f.read())
+    return blocks
+
+
+def synthetic_blocks(blocks, n_containers):
+    """
+    Repite los bloques de ejemplo hasta 'n_containers', con enlaces y títulos únicos para
+    que ni la deduplicación ni la cache de tokenización hagan el trabajo más barato que con
+    una página real.
+    """
+    result = []
+    for i in range(n_containers):
+        block = blocks[i % len(blocks)]
+        block = re.sub(r'href="([^"]*)"', lambda match: f'href="{match.group(1)}?n={i}"', block)
+        block = re.sub(r'(<h2[^>]*>\s*<a[^>]*>)(\s*)', lambda match: f"{match.group(1)}{match.group(2)}N{i} ", block, count=1)
+        result.append(block)
+    return result
+
+
+def build_page(blocks):
+    return "<html><head><title>Yogonet</title></head><body>" + "\n".join(blocks) + "</body></html>"
+
+
+def build_dataset(name, n_containers):
+    blocks = load_fixture_blocks()
+    if not blocks:
+        raise RuntimeError(f"No hay bloques HTML en '{FIXTURES_DIR}'.")
+    if name == "synthetic":
+        blocks = synthetic_blocks(blocks, n_containers)
+    return build_page(blocks), len(blocks)
+
+
+# --- Cliente de BigQuery simulado ---
+
+class _FakeJob:
+    def __init__(self, output_rows=0, input_file_bytes=0, num_dml_affected_rows=0):
+        self.output_rows = output_rows
+        self.input_file_bytes = input_file_bytes
+        self.num_dml_affected_rows = num_dml_affected_rows
+
+    def result(self):
+        return self
+
+
+class FakeBigQueryClient:
+    """
+    Cliente local con la interfaz que usa bigquery_handler. Serializa el DataFrame a
+    Parquet en memoria, como hace el cliente real antes de subirlo, y no envía nada.
+    """
+
+    project = "benchmark"
+
+    def __init__(self):
+        self.bytes_uploaded = 0
+        self.tables = {}
+
+    def create_table(self, table, exists_ok=False):
+        return self.tables.setdefault(f"{table.project}.{table.dataset_id}.{table.table_id}", table)
+
+    def get_table(self, table_id):
+        return self.tables[table_id]
+
+    def load_table_from_dataframe(self, dataframe, destination, job_config=None):
+        buffer = io.BytesIO()
+        dataframe.to_parquet(buffer, index=False)
+        self.bytes_uploaded += buffer.tell()
+        return _FakeJob(output_rows=len(dataframe), input_file_bytes=buffer.tell())
+
+    def query(self, sql):
+        return _FakeJob()
+
+    def delete_table(self, table, not_found_ok=False):
+        pass
+
+
+# --- Etapas ---
+
+class _ConstantModel:
+    """Modelo que predice 'Other' para todo: mide la extracción de características sin la predicción."""
+
+    def predict(self, X):
+        import numpy as np
+        return np.full(len(X), "Other", dtype=object)
+
+
+def prepare_stage(stage, page_html):
+    """
+    Prepara una etapa fuera de la medición.
+
+    Returns:
+        tuple: (función sin argumentos a medir, número de elementos que procesa cada llamada).
+    """
+    import modules.scraper as scraper
+
+    if stage == "scrape_parse":
+        _, n_containers = scraper.parse_news_html(page_html, PAGE_URL)
+        return lambda: scraper.parse_news_html(page_html, PAGE_URL), n_containers
+
+    if stage == "hybrid_extract":
+        from model_ML import features, scraper_model_ml
+        from modules.hybrid_extractor import HybridExtractor
+        features.check_nltk_data()
+        # Sin cache: cada iteración paga la predicción de los bloques en que fallan los selectores
+        extractor = HybridExtractor(model_pipeline=scraper_model_ml.get_model(), cache_size=0)
+        _, n_containers = extractor.parse_page(page_html, PAGE_URL)
+        return lambda: extractor.parse_page(page_html, PAGE_URL), n_containers
+
+    if stage == "unchanged_skip":
+        import tempfile
+        from modules.block_fingerprint import ChangeFilter, FingerprintStore
+        # Una ejecución confirmada con la misma página: cada iteración solo calcula y guarda huellas
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench_fingerprint_"), "fingerprints.sqlite")
+        with FingerprintStore(db_path) as previous_run:
+            _, n_containers = ChangeFilter(previous_run).parse_page(page_html, PAGE_URL)
+            previous_run.commit()
+        change_filter = ChangeFilter(FingerprintStore(db_path))
+        return lambda: change_filter.parse_page(page_html, PAGE_URL), n_containers
+
+    if stage in ("ml_extract", "ml_predict"):
+        from model_ML import features, scraper_model_ml
+        features.check_nltk_data()
+        model = _ConstantModel() if stage == "ml_extract" else scraper_model_ml.get_model()
+        n_containers = len(scraper_model_ml.predict_page_batched(page_html, _ConstantModel()))
+        return lambda: scraper_model_ml.predict_page_batched(page_html, model), n_containers
+
+    import modules.processor as processor
+    articles, _ = scraper.parse_news_html(page_html, PAGE_URL)
+    if stage == "process":
+        return lambda: processor.process_data_with_pandas(articles), len(articles)
+
+    if stage == "load":
+        import modules.bigquery_handler as bigquery_handler
+        dataframe = processor.process_data_with_pandas(articles)
+
+        def load():
+            if not bigquery_handler.load_df_to_bigquery(dataframe, "benchmark", "dataset", "table", client=FakeBigQueryClient()):
+                raise RuntimeError("La carga simulada a BigQuery falló.")
+        return load, len(dataframe)
+
+    raise ValueError(f"Etapa desconocida: {stage}")
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB y macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(task):
+    """
+    Mide una etapa sobre un conjunto (se ejecuta en un proceso nuevo).
+
+    Args:
+        task (tuple): (etapa, conjunto, contenedores sintéticos, iteraciones, iteraciones de calentamiento).
+
+    Returns:
+        dict: Métricas del caso o {'error': ...} si no se pudo ejecutar.
+    """
+    stage, dataset, n_containers, iterations, warmup = task
+    # Las etapas imprimen su progreso; aquí solo interesan los tiempos
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            page_html, _ = build_dataset(dataset, n_containers)
+            function, items = prepare_stage(stage, page_html)
+            setup_rss_mb = _peak_rss_mb()
+            for _ in range(warmup):
+                function()
+            latencies = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                function()
+                latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    total_seconds = sum(latencies)
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "items": items,
+        "iterations": iterations,
+        "throughput": items * iterations / total_seconds if total_seconds else 0.0,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p99_ms": percentile(latencies_ms, 99),
+        "mean_ms": statistics.fmean(latencies_ms),
+        "setup_rss_mb": round(setup_rss_mb, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def percentile(sorted_values, q):
+    """Percentil con interpolación lineal (como numpy.percentile) de una lista ordenada."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+# --- Comparación con la línea base ---
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Devuelve la lista de regresiones: (caso, métrica, valor base, valor actual, cambio relativo).
+    Solo se comparan los casos presentes en ambas ejecuciones y sin error.
+    """
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get("results", {}).get(case)
+        if not previous or "error" in previous or "error" in current:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            base_value, value = previous.get(metric), current.get(metric)
+            if not base_value or value is None:
+                continue
+            change = (value - base_value) / base_value
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append((case, metric, base_value, value, change))
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'Caso':28} {'elementos':>9} {'elem/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8}")
+    for case, result in results.items():
+        if "error" in result:
+            print(f"{case:28} ERROR: {result['error']}")
+            continue
+        print(f"{case:28} {result['items']:>9} {result['throughput']:>12,.0f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sin red de las etapas del scraper (parseo, ML, pandas y carga a BigQuery simulada).")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Etapas a medir.")
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=DATASETS, help="Conjuntos de entrada.")
+    parser.add_argument("--containers", type=int, default=DEFAULT_CONTAINERS, help="Contenedores de la página sintética.")
+    parser.add_argument("--iterations", type=int, default=10, help="Iteraciones medidas por caso.")
+    parser.add_argument("--warmup", type=int, default=1, help="Iteraciones de calentamiento (no medidas).")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--baseline", default=None, help="JSON de una ejecución anterior con el que comparar.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Empeoramiento relativo tolerado antes de marcar una regresión.")
+    args = parser.parse_args()
+
+    cases = [(stage, dataset) for stage in args.stages for dataset in args.datasets]
+    print(f"Midiendo {len(cases)} casos ({args.iterations} iteraciones cada uno, {args.containers} contenedores en 'synthetic')...")
+    results = {}
+    # 'spawn': cada caso empieza en un intérprete limpio, sin la memoria de los anteriores
+    spawn = get_context("spawn")
+    for stage, dataset in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+            result = executor.submit(run_case, (stage, dataset, args.containers, args.iterations, args.warmup)).result()
+        results[f"{stage}/{dataset}"] = result
+        status = result["error"] if "error" in result else f"{result['throughput']:,.0f} elem/s"
+        print(f"  {stage}/{dataset}: {status}")
+
+    print_results(results)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {"containers": args.containers, "iterations": args.iterations, "warmup": args.warmup},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados guardados en '{args.output}'.")
+
+    failed = any("error" in result for result in results.values())
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("parameters") != report["parameters"]:
+            print(f"Advertencia: la línea base usó otros parámetros ({baseline.get('parameters')}).")
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nREGRESIONES respecto de '{args.baseline}' (tolerancia {args.tolerance:.0%}):")
+            for case, metric, base_value, value, change in regressions:
+                print(f"  {case} {metric}: {base_value:,.2f} -> {value:,.2f} ({change:+.1%})")
+            failed = True
+        else:
+            print(f"Sin regresiones respecto de '{args.baseline}' (tolerancia {args.tolerance:.0%}).")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,81 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = ["main", "model_ML.scraper_model_ml"]
+# Dependencias pesadas que no deberían cargarse solo por importar los puntos de entrada
+HEAVY_MODULES = ["selenium", "webdriver_manager", "google.cloud.bigquery", "nltk", "sklearn", "pandas"]
+
+
+def parse_importtime(stderr):
+    """
+    Interpreta la salida de 'python -X importtime'.
+
+    Returns:
+        list: (módulo, profundidad, microsegundos propios, microsegundos acumulados) por línea.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2 # Un espacio tras "|" y dos por nivel
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure(target, runs):
+    """Importa 'target' en 'runs' intérpretes nuevos; devuelve (tiempos en ms, entradas del último)."""
+    wall_ms = []
+    entries = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True,
+        )
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"No se pudo importar '{target}':\n{result.stderr[-2000:]}")
+        entries = parse_importtime(result.stderr)
+    return wall_ms, entries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del arranque (python -X importtime) de los puntos de entrada.")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="Módulos a importar (por defecto main y el scraper ML).")
+    parser.add_argument("--runs", type=int, default=5, help="Intérpretes nuevos por módulo (se informa la mediana).")
+    parser.add_argument("--top", type=int, default=8, help="Imports directos más costosos a mostrar.")
+    parser.add_argument("--max-ms", type=float, default=None, help="Falla (código 1) si la mediana de algún módulo supera este tiempo.")
+    args = parser.parse_args()
+
+    interpreter_ms, _ = measure("sys", args.runs)
+    print(f"Intérprete vacío: {statistics.median(interpreter_ms):.0f} ms (mediana de {args.runs})")
+
+    failed = False
+    for target in args.targets:
+        wall_ms, entries = measure(target, args.runs)
+        median_ms = statistics.median(wall_ms)
+        target_us = next((cumulative for name, depth, _, cumulative in entries if name == target), 0)
+        print(f"\n{target}: {median_ms:.0f} ms de proceso (mediana), {target_us / 1000:.0f} ms en imports")
+
+        direct_imports = sorted(
+            ((cumulative, name) for name, depth, _, cumulative in entries if depth == 1),
+            reverse=True,
+        )
+        for cumulative, name in direct_imports[:args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+        loaded = {name for name, _, _, _ in entries}
+        heavy = [module for module in HEAVY_MODULES if module in loaded]
+        print(f"  Dependencias pesadas cargadas: {', '.join(heavy) if heavy else 'ninguna'}")
+
+        if args.max_ms is not None and median_ms > args.max_ms:
+            print(f"  Supera el límite de {args.max_ms:.0f} ms.")
+            failed = True
+
+    sys.exit(1 if failed else 0)
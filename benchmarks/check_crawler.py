@@ -0,0 +1,237 @@
+"""
+Verifica el crawler (modules/crawler.py) contra un servidor HTTP local, sin red.
+
+El script levanta un http.server en localhost con varias secciones paginadas. Cada página
+tiene un enlace rel="next" a la siguiente, noticias repetidas entre páginas y secciones,
+y un enlace 'siguiente' que vuelve a una página ya visitada. El servidor responde con ETag
+y contesta 304 a las peticiones condicionales que coinciden. Comprueba que:
+
+* crawl() devuelve las noticias en orden de semilla y página, sin enlaces duplicados, y
+  respeta max_pages al seguir los enlaces 'siguiente';
+* iter_crawl() entrega las mismas noticias;
+* ninguna página se descarga dos veces;
+* nunca hay más de per_host_limit peticiones simultáneas contra el host, y se llega a ese
+  límite (las descargas sí se solapan);
+* entre dos peticiones al mismo host pasan al menos 'delay' segundos;
+* en una segunda ejecución con el mismo ArticleIndex todas las portadas responden 304, no
+  se parsean ni se paginan.
+
+Termina con código 1 si alguna comprobación falla.
+
+Uso:
+    python benchmarks/check_crawler.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Permite importar 'modules' al ejecutar el script directamente
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from modules import crawler
+from modules.article_index import ArticleIndex
+
+SEEDS = 4 # Secciones servidas, todas en el mismo host
+PAGES_PER_SEED = 4 # Páginas con enlace 'siguiente' en cada sección
+ARTICLES_PER_PAGE = 3
+MAX_PAGES = 3 # Profundidad pedida al crawler (menor que PAGES_PER_SEED)
+LOOP_SEED = 2 # Su página 2 enlaza como 'siguiente' a la portada de la sección 0
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 2
+DELAY = 0.05 # Segundos entre peticiones al mismo host
+RESPONSE_SECONDS = 0.2 # Lo que tarda el servidor en responder, para que las descargas se solapen
+TIMING_TOLERANCE = 0.005 # Margen de los relojes al comparar el retardo entre peticiones
+
+ARTICLE_URL = "https://www.yogonet.com/international/news/2025/05/08/{id}-noticia-{id}"
+
+
+# --- Sitio de prueba ---
+
+def page_article_ids(seed, page):
+    """Ids de las noticias de una página, con los duplicados de la prueba."""
+    ids = [seed * 1000 + page * 10 + i for i in range(ARTICLES_PER_PAGE)]
+    if page > 1:
+        ids.append(seed * 1000 + 10) # Repite la primera noticia de la portada de la sección
+    if seed > 0 and page == 1:
+        ids.append(10) # Repite la primera noticia de la sección 0
+    return ids
+
+
+def next_page_path(seed, page):
+    if seed == LOOP_SEED and page == 2:
+        return "/s0/p1.html"
+    return f"/s{seed}/p{page + 1}.html" if page < PAGES_PER_SEED else None
+
+
+def render_page(seed, page):
+    containers = "".join(f"""
+        <div class="contenedor_dato_modulo">
+            <div class="volanta_titulo">
+                <div class="volanta fuente_roboto_slab">Volanta {article_id}</div>
+                <h2 class="titulo fuente_roboto_slab"><a href="{ARTICLE_URL.format(id=article_id)}">Noticia {article_id}</a></h2>
+            </div>
+            <div class="imagen"><a href="{ARTICLE_URL.format(id=article_id)}"><img src="/img/{article_id}.jpg"></a></div>
+        </div>""" for article_id in page_article_ids(seed, page))
+    next_path = next_page_path(seed, page)
+    next_link = f'<a rel="next" href="{next_path}">Siguiente</a>' if next_path else ""
+    return f"<html><body>{containers}{next_link}</body></html>"
+
+
+def expected_crawl():
+    """Noticias que debe devolver crawl(): en orden de semilla y página, sin duplicados."""
+    visited, links = set(), []
+    for seed in range(SEEDS):
+        path, page = f"/s{seed}/p1.html", 1
+        while path and page <= MAX_PAGES and path not in visited:
+            visited.add(path)
+            for article_id in page_article_ids(seed, page):
+                link = ARTICLE_URL.format(id=article_id)
+                if link not in links:
+                    links.append(link)
+            path, page = next_page_path(seed, page), page + 1
+    return links, visited
+
+
+class RequestLog:
+    """Registro compartido de las peticiones que recibe el servidor."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.starts = []
+        self.paths = []
+        self.not_modified = []
+
+
+def make_handler(log):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with log.lock:
+                log.in_flight += 1
+                log.max_in_flight = max(log.max_in_flight, log.in_flight)
+                log.starts.append(time.monotonic())
+                log.paths.append(self.path)
+            try:
+                time.sleep(RESPONSE_SECONDS)
+                seed, page = self._parse_path()
+                if seed is None:
+                    self.send_error(404)
+                    return
+                etag = f'"s{seed}p{page}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with log.lock:
+                        log.not_modified.append(self.path)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                body = render_page(seed, page).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with log.lock:
+                    log.in_flight -= 1
+
+        def _parse_path(self):
+            try:
+                seed_part, page_part = self.path.strip("/").split("/")
+                seed, page = int(seed_part[1:]), int(page_part[1:].split(".")[0])
+            except ValueError:
+                return None, None
+            if 0 <= seed < SEEDS and 1 <= page <= PAGES_PER_SEED:
+                return seed, page
+            return None, None
+
+        def log_message(self, format, *args):
+            pass # Sin una línea por petición en la salida
+
+    return Handler
+
+
+# --- Comprobaciones ---
+
+def check(failures, condition, message):
+    if not condition:
+        failures.append(message)
+        print(f"FALLO: {message}")
+
+
+def min_gap(starts):
+    ordered = sorted(starts)
+    return min((b - a for a, b in zip(ordered, ordered[1:])), default=None)
+
+
+if __name__ == "__main__":
+    log = RequestLog()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(log))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    seed_urls = [f"{base_url}/s{seed}/p1.html" for seed in range(SEEDS)]
+    crawl_options = {"max_pages": MAX_PAGES, "max_workers": MAX_WORKERS, "per_host_limit": PER_HOST_LIMIT, "delay": DELAY}
+    expected_links, expected_paths = expected_crawl()
+    failures = []
+    index_dir = tempfile.mkdtemp(prefix="check_crawler_")
+    try:
+        index = ArticleIndex(os.path.join(index_dir, "index.db"))
+
+        # 1. Primera ejecución: orden, duplicados, paginación, concurrencia y retardo
+        news_data = crawler.crawl(seed_urls, article_index=index, **crawl_options)
+        index.commit()
+        links = [article["link"] for article in news_data]
+        check(failures, links == expected_links,
+              f"crawl() devolvió {len(links)} noticias; se esperaban {len(expected_links)} en orden de semilla y página.")
+        check(failures, len(links) == len(set(links)), "crawl() devolvió enlaces duplicados.")
+        check(failures, sorted(log.paths) == sorted(expected_paths),
+              f"Páginas pedidas {sorted(log.paths)}; se esperaban {sorted(expected_paths)} (una vez cada una).")
+        check(failures, log.max_in_flight <= PER_HOST_LIMIT,
+              f"{log.max_in_flight} peticiones simultáneas contra el host (límite {PER_HOST_LIMIT}).")
+        check(failures, log.max_in_flight == PER_HOST_LIMIT,
+              f"Las descargas no se solaparon: máximo {log.max_in_flight} simultáneas (límite {PER_HOST_LIMIT}).")
+        gap = min_gap(log.starts)
+        check(failures, gap is not None and gap >= DELAY - TIMING_TOLERANCE,
+              f"Dos peticiones al mismo host separadas {gap:.3f} s (mínimo {DELAY} s).")
+        print(f"Primera ejecución: {len(links)} noticias de {len(log.paths)} páginas, "
+              f"máximo {log.max_in_flight} peticiones simultáneas, separación mínima {gap:.3f} s.")
+
+        # 2. iter_crawl(): las mismas noticias, en orden de llegada
+        log.reset()
+        streamed = [article["link"] for article in crawler.iter_crawl(seed_urls, **crawl_options)]
+        check(failures, sorted(streamed) == sorted(expected_links) and len(streamed) == len(set(streamed)),
+              f"iter_crawl() entregó {len(streamed)} noticias; se esperaban las mismas {len(expected_links)} de crawl().")
+        check(failures, log.max_in_flight <= PER_HOST_LIMIT,
+              f"iter_crawl(): {log.max_in_flight} peticiones simultáneas contra el host (límite {PER_HOST_LIMIT}).")
+
+        # 3. Segunda ejecución con el mismo índice: todo 304, sin parsear ni paginar
+        log.reset()
+        repeated = crawler.crawl(seed_urls, article_index=index, **crawl_options)
+        first_pages = sorted(f"/s{seed}/p1.html" for seed in range(SEEDS))
+        check(failures, repeated == [], f"Con todas las portadas en 304, crawl() devolvió {len(repeated)} noticias.")
+        check(failures, sorted(log.not_modified) == first_pages,
+              f"Respuestas 304 para {sorted(log.not_modified)}; se esperaban {first_pages}.")
+        check(failures, sorted(log.paths) == first_pages,
+              f"Tras un 304 se pidieron más páginas: {sorted(log.paths)}.")
+        print(f"Segunda ejecución: {len(log.not_modified)} respuestas 304, {len(log.paths)} páginas pedidas.")
+        index.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+    if failures:
+        print(f"{len(failures)} comprobaciones fallidas.")
+        sys.exit(1)
+    print("Crawler correcto: orden, duplicados, paginación, límite por host, retardo y 304.")
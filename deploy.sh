@@ -3,6 +3,16 @@
 # Salir inmediatamente si un comando falla
 set -e
 
+# --- Opciones de línea de comandos ---
+# --tasks N: número de tareas del Job (sustituye a JOB_TASKS de config_deploy.env)
+CLI_TASKS=""
+while [ $# -gt 0 ]; do
+  case "$1" in
+    --tasks) CLI_TASKS="$2"; shift 2 ;;
+    *) echo "Opción desconocida: $1. Uso: ./deploy.sh [--tasks N]"; exit 1 ;;
+  esac
+done
+
 # --- Cargar Configuración desde config/config_deploy.env ---
 CONFIG_FILE="config/config_deploy.env"
 
@@ -12,6 +22,8 @@ if [ -f "$CONFIG_FILE" ]; then
     source "$CONFIG_FILE"
     set +a
     echo "Configuración cargada."
+    JOB_TASKS="${CLI_TASKS:-${JOB_TASKS:-1}}"
+    JOB_PARALLELISM="${JOB_PARALLELISM:-0}"
 else
     echo "Error: Archivo de configuración '$CONFIG_FILE' no encontrado. Saliendo."
     exit 1
@@ -44,6 +56,13 @@ echo "  JOB_NAME: $JOB_NAME"
 echo "  JOB_MEMORY: $JOB_MEMORY"
 echo "  JOB_CPU: $JOB_CPU"
 echo "  JOB_TIMEOUT: $JOB_TIMEOUT"
+echo "  JOB_TASKS: $JOB_TASKS (paralelismo: $JOB_PARALLELISM)"
+echo "  SHARD_BUCKET: ${SHARD_BUCKET:-[Sin volumen compartido]}"
+
+if [ "$JOB_TASKS" -gt 1 ] && [ -z "$SHARD_BUCKET" ]; then
+  echo "Error: con JOB_TASKS > 1 las tareas necesitan un volumen compartido para el merge (SHARD_BUCKET). Saliendo."
+  exit 1
+fi
 
 
 # Configurar gcloud para usar tu proyecto
@@ -82,8 +101,17 @@ DEPLOY_CMD="gcloud run jobs deploy ${JOB_NAME} \
   --memory=${JOB_MEMORY} \
   --cpu=${JOB_CPU} \
   --task-timeout=${JOB_TIMEOUT} \
+  --tasks=${JOB_TASKS} \
+  --parallelism=${JOB_PARALLELISM} \
   --project=${GCP_PROJECT_ID}"
 
+# Volumen compartido por las tareas: cada una escribe sus lotes en output/shards/shard-NNN
+if [ -n "${SHARD_BUCKET}" ]; then
+  DEPLOY_CMD="${DEPLOY_CMD} \
+  --add-volume=name=shards,type=cloud-storage,bucket=${SHARD_BUCKET} \
+  --add-volume-mount=volume=shards,mount-path=/app/output/shards"
+fi
+
 # Añadir cuenta de servicio si se especificó y no está vacía
 if [ -n "${SERVICE_ACCOUNT}" ]; then
   echo "Verificando cuenta de servicio: ${SERVICE_ACCOUNT}"
@@ -101,7 +129,21 @@ fi
 # Usamos eval para que las variables dentro de DEPLOY_CMD se expandan correctamente
 eval ${DEPLOY_CMD}
 
+# Job de merge: una sola tarea que carga a BigQuery los lotes de todos los shards
+if [ "$JOB_TASKS" -gt 1 ]; then
+  MERGE_JOB_NAME="${JOB_NAME}-merge"
+  echo "Desplegando/Actualizando el Job de merge: ${MERGE_JOB_NAME}"
+  MERGE_CMD="${DEPLOY_CMD/jobs deploy ${JOB_NAME}/jobs deploy ${MERGE_JOB_NAME}}"
+  MERGE_CMD="${MERGE_CMD/--tasks=${JOB_TASKS}/--tasks=1} --command=python --args=main.py,--merge-shards"
+  eval ${MERGE_CMD}
+fi
+
 echo "--- Despliegue Completado ---"
 echo "Job '${JOB_NAME}' desplegado/actualizado en la región '${GCP_REGION}'."
 echo "Puedes ejecutar el job manualmente desde la consola de Google Cloud o usando:"
-echo "gcloud run jobs execute ${JOB_NAME} --region=${GCP_REGION} --project=${GCP_PROJECT_ID}"
\ No newline at end of file
+if [ "$JOB_TASKS" -gt 1 ]; then
+  echo "gcloud run jobs execute ${JOB_NAME} --region=${GCP_REGION} --project=${GCP_PROJECT_ID} --wait && \\"
+  echo "  gcloud run jobs execute ${MERGE_JOB_NAME} --region=${GCP_REGION} --project=${GCP_PROJECT_ID} --wait"
+else
+  echo "gcloud run jobs execute ${JOB_NAME} --region=${GCP_REGION} --project=${GCP_PROJECT_ID}"
+fi
\ No newline at end of file
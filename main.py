@@ -1,10 +1,30 @@
 import os
+import sys
+import argparse
+import configparser
 import modules.config_loader as config_loader
 import modules.scraper as scraper
+import modules.crawler as crawler
+import modules.browser_pool as browser_pool
+import modules.page_readiness as page_readiness
+import modules.article_index as article_index_module
+import modules.snapshot_archive as snapshot_archive
+import modules.replay as replay
+import modules.hybrid_extractor as hybrid_extractor
+import modules.block_fingerprint as block_fingerprint
 import modules.processor as processor
-import modules.bigquery_handler as bigquery_handler
+import modules.spool as spool_module
+import modules.pipeline as pipeline
+import modules.metrics as metrics
+import modules.sharding as sharding
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper de Yogonet: scraping, procesamiento y carga a BigQuery.")
+    parser.add_argument("--task-index", type=int, help="Índice de esta tarea (por defecto CLOUD_RUN_TASK_INDEX o 0).")
+    parser.add_argument("--task-count", type=int, help="Número de tareas (por defecto CLOUD_RUN_TASK_COUNT o 1).")
+    parser.add_argument("--merge-shards", action="store_true", help="Solo carga a BigQuery los lotes de todos los shards.")
+    parser.add_argument("--local-shards", type=int, metavar="N", help="Ejecuta N shards como subprocesos y después el merge.")
+    args = parser.parse_args()
     print("Iniciando script principal...")
 
     # --- 1. Cargar Configuración ---
@@ -14,70 +34,257 @@ if __name__ == "__main__":
         print("No se pudo cargar la configuración. Saliendo del script.")
         exit()
 
-    # --- Ejecutar Scraping ---
-    scraped_articles_list = scraper.scrape_yogonet()
-
-    if scraped_articles_list:
-        # --- Procesar Datos ---
-        processed_df = processor.process_data_with_pandas(scraped_articles_list)
-
-        if not processed_df.empty:
-            print("\n--- DataFrame Procesado (primeras 5 filas) ---")
-            print(processed_df.head())
-
-            # --- Guardar Resultados Localmente (Opcional) ---
-            try:
-                output_dir = "output"
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
-                    print(f"Directorio '{output_dir}' creado.")
-
-                # Leer nombre del archivo CSV desde la configuración
-                csv_filename = config.get('settings', 'output_csv_filename', fallback='yogonet_news_data.csv')
-                csv_filepath = os.path.join(output_dir, csv_filename)
-                processed_df.to_csv(csv_filepath, index=False, encoding='utf-8-sig')
-                print(f"\nDataFrame procesado guardado localmente en: {csv_filepath}")
-            except (KeyError, configparser.NoSectionError):
-                 print("\nAdvertencia: Sección [settings] o clave 'output_csv_filename' no encontrada en config.ini.")
-                 print("Se usará el nombre de archivo predeterminado 'yogonet_news_data.csv' para el CSV local.")
-                 csv_filepath = os.path.join(output_dir, 'yogonet_news_data.csv')
-                 try:
-                     processed_df.to_csv(csv_filepath, index=False, encoding='utf-8-sig')
-                     print(f"\nDataFrame procesado guardado localmente en: {csv_filepath}")
-                 except Exception as e_csv:
-                     print(f"Error al guardar el DataFrame en CSV local con nombre predeterminado: {e_csv}")
-            except Exception as e:
-                print(f"Error al guardar el DataFrame en CSV local: {e}")
-
-            # --- Cargar a BigQuery ---
-            try:
-                # Leer configuración de BigQuery
-                project_id = config.get('bigquery', 'project_id')
-                dataset_id = config.get('bigquery', 'dataset_id')
-                table_id = config.get('bigquery', 'table_id')
-
-                # Validar que no sean los valores placeholder
-                if project_id and dataset_id and table_id:
-                    if project_id.startswith("TU_") or dataset_id.startswith("TU_") or table_id.startswith("TU_"):
-                        print("\nAdvertencia: Los valores de configuración de BigQuery en 'config/config.ini' parecen ser los predeterminados.")
-                        print("Por favor, actualiza 'config/config.ini' con tus valores reales para cargar a BigQuery.")
-                        print("La carga a BigQuery será omitida.")
-                    else:
-                        bigquery_handler.load_df_to_bigquery(processed_df, project_id, dataset_id, table_id)
-                else:
-                    print("\nAdvertencia: Falta información de BigQuery en 'config/config.ini' (project_id, dataset_id, o table_id).")
-                    print("La carga a BigQuery será omitida.")
-
-            except (KeyError, configparser.NoSectionError):
-                print("\nError: La sección [bigquery] o alguna de sus claves no se encuentra en 'config/config.ini'.")
-                print("La carga a BigQuery será omitida.")
-            except Exception as e:
-                print(f"\nOcurrió un error inesperado al intentar leer/usar la configuración de BigQuery: {e}")
-                print("La carga a BigQuery será omitida.")
+    # --- Métricas y perfilado (sección [metrics]) ---
+    metrics.configure(config)
+    metrics.start_profiling(config)
+    metrics.emit("run_start", "Inicio del scraper")
+
+    # --- Destino BigQuery ---
+    # Si la carga se omite, el CSV local (y el spool, si está activado) son los únicos destinos
+    bigquery_target = None
+    try:
+        # Leer configuración de BigQuery
+        project_id = config.get('bigquery', 'project_id')
+        dataset_id = config.get('bigquery', 'dataset_id')
+        table_id = config.get('bigquery', 'table_id')
 
+        # Validar que no sean los valores placeholder
+        if project_id and dataset_id and table_id:
+            if project_id.startswith("TU_") or dataset_id.startswith("TU_") or table_id.startswith("TU_"):
+                print("\nAdvertencia: Los valores de configuración de BigQuery en 'config/config.ini' parecen ser los predeterminados.")
+                print("Por favor, actualiza 'config/config.ini' con tus valores reales para cargar a BigQuery.")
+                print("La carga a BigQuery será omitida.")
+            else:
+                bigquery_target = (project_id, dataset_id, table_id)
         else:
-            print("\nEl procesamiento con Pandas no generó resultados o falló.")
+            print("\nAdvertencia: Falta información de BigQuery en 'config/config.ini' (project_id, dataset_id, o table_id).")
+            print("La carga a BigQuery será omitida.")
+
+    except (KeyError, configparser.NoSectionError, configparser.NoOptionError):
+        print("\nError: La sección [bigquery] o alguna de sus claves no se encuentra en 'config/config.ini'.")
+        print("La carga a BigQuery será omitida.")
+
+    # Modo de carga a BigQuery: truncate, append o merge (upsert por 'link')
+    load_mode = config.get('bigquery', 'load_mode', fallback='truncate')
+    incremental = config.getboolean('incremental', 'enabled', fallback=False)
+    skips_unchanged_blocks = (config.getboolean('fingerprint', 'enabled', fallback=False)
+                              and config.getboolean('fingerprint', 'skip_unchanged', fallback=True))
+    if (incremental or skips_unchanged_blocks) and load_mode == 'truncate':
+        # Con el índice (o las huellas) solo se cargan filas nuevas o modificadas: reemplazar la tabla
+        # perdería el histórico y añadirlas repetiría el 'link' de las modificadas; MERGE las actualiza
+        print("Modo incremental: la carga a BigQuery usará 'merge' en lugar de 'truncate'.")
+        load_mode = 'merge'
+    elif (incremental or skips_unchanged_blocks) and load_mode == 'append':
+        print("Advertencia: modo incremental con load_mode = append: cada noticia modificada se añadirá como otra fila con el mismo 'link'. Usa 'merge' para actualizarlas.")
+
+    # --- Reparto en tareas (shards) ---
+    shard_dir = config.get('sharding', 'shard_dir', fallback='output/shards')
+    if args.local_shards or args.merge_shards:
+        if args.local_shards:
+            return_codes = sharding.run_local_shards(args.local_shards, script=os.path.abspath(__file__))
+            if any(return_codes):
+                print("Algún shard falló: no se hace el merge (sus lotes quedan en el spool de cada shard).")
+                sys.exit(1)
+        # Una sola carga con los lotes de todos los shards
+        with metrics.span("shard_merge"):
+            merged = sharding.merge_shards(
+                shard_dir, bigquery_target, load_mode=load_mode,
+                max_batch_mb=config.getfloat('spool', 'max_batch_mb', fallback=spool_module.DEFAULT_MAX_BATCH_MB),
+                max_retries=config.getint('spool', 'max_retries', fallback=spool_module.DEFAULT_MAX_RETRIES),
+            )
+        metrics.stop_profiling()
+        metrics.log_summary()
+        sys.exit(0 if merged else 1)
+    try:
+        shard_index, shard_count = sharding.resolve_shard(args.task_index, args.task_count)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    sharded = shard_count > 1
+    if sharded:
+        print(f"Tarea {shard_index + 1} de {shard_count}: sus lotes se guardan en '{sharding.shard_dir_for(shard_dir, shard_index)}' hasta el merge.")
+
+    # --- Índice incremental (opcional) ---
+    article_index = None
+    if incremental:
+        # Un índice por shard: SQLite no admite varias tareas escribiendo a la vez en el mismo archivo
+        index_path = sharding.with_shard_suffix(
+            config.get('incremental', 'index_path', fallback='output/article_index.sqlite'), shard_index, shard_count
+        )
+        article_index = article_index_module.ArticleIndex(index_path)
+        print(f"Modo incremental activado. Índice de artículos: {index_path}")
+
+    # --- Archivo de snapshots HTML (opcional) ---
+    # 'auto' intenta primero HTTP sin navegador y recurre a Selenium si no hay contenedores
+    scraper_backend = config.get('scraper', 'backend', fallback='auto')
+    archive = None
+    replay_enabled = config.getboolean('replay', 'enabled', fallback=False)
+    replaying = replay_enabled or scraper_backend == 'replay' # Se lee del archivo en lugar de archivar
+    if config.getboolean('archive', 'enabled', fallback=False) or replaying:
+        archive_dir = config.get('archive', 'archive_dir', fallback='output/archive')
+        archive = snapshot_archive.SnapshotArchive(
+            archive_dir,
+            compression_level=config.getint('archive', 'compression_level', fallback=snapshot_archive.DEFAULT_COMPRESSION_LEVEL),
+        )
+        if not replaying:
+            print(f"Archivo de snapshots activado: {archive_dir}")
+
+    # --- Extractor: selectores, o selectores con el modelo ML como fallback (sección [extractor]) ---
+    extractor = None
+    extractor_mode = config.get('extractor', 'mode', fallback='selectors')
+    if extractor_mode == 'hybrid' and not replay_enabled:
+        try:
+            extractor = hybrid_extractor.HybridExtractor.from_config(config)
+            print("Extractor híbrido activado: el modelo ML solo procesa los bloques en que fallan los selectores.")
+        except Exception as e:
+            # Sin datos de NLTK o sin modelo compatible se sigue solo con los selectores
+            print(f"No se pudo cargar el modelo del extractor híbrido ({e}). Se usan solo los selectores.")
+    elif extractor_mode not in ('selectors', 'hybrid'):
+        print(f"Extractor desconocido: '{extractor_mode}'. Usa 'selectors' o 'hybrid'. Se usan los selectores.")
+
+    # --- Huellas de bloques: solo se extraen los contenedores que cambiaron (sección [fingerprint]) ---
+    fingerprint_store = None
+    if config.getboolean('fingerprint', 'enabled', fallback=False) and not replaying:
+        # Una base por shard, como el índice incremental
+        fingerprint_path = sharding.with_shard_suffix(
+            config.get('fingerprint', 'db_path', fallback='output/block_fingerprints.sqlite'), shard_index, shard_count
+        )
+        fingerprint_store = block_fingerprint.FingerprintStore(
+            fingerprint_path, keep_runs=config.getint('fingerprint', 'keep_runs', fallback=block_fingerprint.DEFAULT_KEEP_RUNS)
+        )
+        model_extractor_factory = None
+        if config.getboolean('fingerprint', 'reselect_model', fallback=True) and extractor is None:
+            # Si el layout cambia, las páginas afectadas pasan al extractor híbrido (se carga solo entonces)
+            model_extractor_factory = lambda: hybrid_extractor.HybridExtractor.from_config(config)
+        extractor = block_fingerprint.ChangeFilter(
+            fingerprint_store, extractor=extractor, model_extractor_factory=model_extractor_factory,
+            skip_unchanged=skips_unchanged_blocks,
+            layout_change_share=config.getfloat('fingerprint', 'layout_change_share', fallback=block_fingerprint.DEFAULT_LAYOUT_CHANGE_SHARE),
+        )
+        print(f"Huellas de bloques activadas: {fingerprint_path}")
+
+    # --- Spool local Parquet (opcional) ---
+    spool = None
+    if config.getboolean('spool', 'enabled', fallback=False) or sharded:
+        # Cada shard escribe en su propio spool; la carga la hace el merge
+        spool = spool_module.ParquetSpool(
+            sharding.shard_dir_for(shard_dir, shard_index) if sharded else config.get('spool', 'spool_dir', fallback='output/spool'),
+            max_batch_mb=config.getfloat('spool', 'max_batch_mb', fallback=spool_module.DEFAULT_MAX_BATCH_MB),
+        )
+        pending_from_previous_runs = len(spool.pending_files())
+        if pending_from_previous_runs and not sharded:
+            print(f"Spool: {pending_from_previous_runs} lotes pendientes de ejecuciones anteriores se cargarán en esta.")
+
+    # --- Ejecutar Scraping (en streaming) ---
+    if replay_enabled:
+        # Sin red: se extraen en paralelo los snapshots archivados del rango indicado
+        scraped_articles = replay.iter_replayed_articles(
+            archive,
+            since=config.get('replay', 'since', fallback='') or None,
+            until=config.get('replay', 'until', fallback='') or None,
+            urls=config.get('replay', 'urls', fallback='').split() or None,
+            extractor=config.get('replay', 'extractor', fallback='selectors'),
+            workers=config.getint('replay', 'workers', fallback=replay.DEFAULT_WORKERS),
+            model_file=config.get('extractor', 'model_file', fallback='') or None,
+            shard=(shard_index, shard_count),
+        )
+    elif config.getboolean('crawler', 'enabled', fallback=False):
+        # Crawl concurrente de varias secciones/páginas por HTTP: las noticias salen página a página
+        page_url_template = config.get('crawler', 'page_url_template', fallback='') or None
+        # Con varias tareas, cada una recorre solo su parte de las semillas (o de las páginas)
+        seed_urls, max_pages = sharding.shard_seed_urls(
+            config.get('crawler', 'seed_urls', fallback=scraper.TARGET_URL).split(), shard_index, shard_count,
+            max_pages=config.getint('crawler', 'max_pages', fallback=1), page_url_template=page_url_template,
+        )
+        scraped_articles = crawler.iter_crawl(
+            seed_urls,
+            max_pages=max_pages,
+            page_url_template=page_url_template,
+            max_workers=config.getint('crawler', 'max_workers', fallback=crawler.DEFAULT_MAX_WORKERS),
+            per_host_limit=config.getint('crawler', 'per_host_limit', fallback=crawler.DEFAULT_PER_HOST_LIMIT),
+            delay=config.getfloat('crawler', 'delay', fallback=crawler.DEFAULT_DELAY),
+            article_index=article_index,
+            archive=archive,
+            extractor=extractor,
+        )
+    elif shard_index > 0:
+        # Una sola página no se reparte: la extrae la tarea 0
+        print("Sin crawler solo hay una página que extraer y la procesa la tarea 0; esta tarea no tiene trabajo.")
+        scraped_articles = iter(())
     else:
-        print("\nNo se extrajeron noticias o el scraping falló, no se realizará el post-procesamiento ni la carga a BigQuery.")
+        # Las sesiones de Chrome se crean solo si hacen falta (backend Selenium o fallback).
+        # Una sola página: sus noticias se extraen de una vez y luego fluyen por el pipeline.
+        blocked_url_patterns = [] # Sin bloqueo de recursos
+        if config.getboolean('browser', 'block_resources', fallback=True):
+            blocked_url_patterns = config.get('browser', 'blocked_url_patterns', fallback='').split() or None # Vacío = los de por defecto
+        with browser_pool.BrowserPool(
+            size=config.getint('browser', 'pool_size', fallback=browser_pool.DEFAULT_POOL_SIZE),
+            max_pages_per_session=config.getint('browser', 'max_pages_per_session', fallback=browser_pool.DEFAULT_MAX_PAGES_PER_SESSION),
+            max_rss_mb=config.getint('browser', 'max_rss_mb', fallback=browser_pool.DEFAULT_MAX_RSS_MB),
+            blocked_url_patterns=blocked_url_patterns,
+            page_load_strategy=config.get('browser', 'page_load_strategy', fallback=browser_pool.DEFAULT_PAGE_LOAD_STRATEGY),
+            readiness=page_readiness.PageReadiness.from_config(config),
+        ) as pool:
+            scraped_articles = iter(scraper.scrape_yogonet(backend=scraper_backend, pool=pool, article_index=article_index,
+                                                          archive=archive, extractor=extractor))
+
+    if article_index is not None:
+        # Descartar las noticias ya procesadas antes de cualquier trabajo por artículo
+        scraped_articles = article_index.iter_new(scraped_articles)
+
+    # --- Procesar Datos por bloques ---
+    processed_chunks = processor.iter_processed_chunks(
+        scraped_articles, chunk_size=config.getint('pipeline', 'chunk_size', fallback=processor.DEFAULT_CHUNK_SIZE)
+    )
+
+    # --- Destinos: CSV local, spool Parquet o BigQuery directo, índice incremental ---
+    output_dir = "output"
+    csv_filename = config.get('settings', 'output_csv_filename', fallback='yogonet_news_data.csv')
+    sinks = [pipeline.CsvSink(sharding.with_shard_suffix(os.path.join(output_dir, csv_filename), shard_index, shard_count))]
+    if spool is not None:
+        # Carga por lotes desde el spool (incluye lotes pendientes de ejecuciones fallidas);
+        # un shard solo escribe sus lotes, que carga el merge
+        sinks.append(pipeline.SpoolSink(
+            spool, None if sharded else bigquery_target, load_mode=load_mode,
+            max_retries=config.getint('spool', 'max_retries', fallback=spool_module.DEFAULT_MAX_RETRIES),
+        ))
+    elif bigquery_target is not None:
+        sinks.append(pipeline.BigQuerySink(*bigquery_target, load_mode=load_mode))
+    if article_index is not None:
+        # Solo se registran como vistas las noticias que llegaron a los destinos anteriores
+        sinks.append(pipeline.IndexSink(article_index))
+
+    # Incluye el scraping: los generadores de las etapas anteriores se consumen aquí
+    with metrics.span("pipeline"):
+        delivered, rows_delivered = pipeline.run_pipeline(
+            processed_chunks, sinks,
+            max_pending_chunks=config.getint('pipeline', 'max_pending_chunks', fallback=pipeline.DEFAULT_MAX_PENDING_CHUNKS),
+        )
+    metrics.increment("rows_delivered", rows_delivered)
+    if delivered and rows_delivered == 0:
+        if article_index is not None or fingerprint_store is not None:
+            print("\nNo hay noticias nuevas desde la última ejecución.")
+        else:
+            print("\nNo se extrajeron noticias o el scraping falló, no se realizó el post-procesamiento ni la carga a BigQuery.")
+
+    if article_index is not None:
+        if delivered:
+            article_index.commit()
+            print("Índice incremental actualizado.")
+        else:
+            print("La carga no se completó: el índice incremental no se actualiza.")
+        article_index.close()
+
+    if fingerprint_store is not None:
+        # Como el índice: los bloques saltados deben haber llegado a los destinos en alguna ejecución
+        if delivered:
+            fingerprint_store.commit()
+        fingerprint_store.close()
 
-    print("\nScript principal finalizado.")
\ No newline at end of file
+    if extractor is not None:
+        extractor.report()
+    metrics.stop_profiling()
+    metrics.log_summary()
+    print("\nScript principal finalizado.")
+    if sharded and not delivered:
+        sys.exit(1) # La tarea se marca como fallida (Cloud Run la reintenta y el merge no se lanza en local)
\ No newline at end of file
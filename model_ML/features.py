@@ -0,0 +1,371 @@
+"""
+Especificación única de las características del modelo ML y su extractor de una pasada.
+
+Cada característica se define una sola vez (FEATURE_SPEC) y la usan tanto el
+entrenamiento (train_model.py) como la inferencia (scraper_model_ml.py):
+
+* El extractor recorre cada bloque una sola vez: el texto de cada nodo
+  (get_text(strip=True)) se construye de abajo hacia arriba, la profundidad se hereda
+  del padre y cada texto distinto se tokeniza una vez (más una en minúsculas para las
+  stopwords). La tokenización sigue siendo la de NLTK: otra cambiaría los conteos.
+* Las filas se escriben directamente en un FeatureBuffer (un array de NumPy por
+  columna) en lugar de un diccionario por nodo.
+* El esquema (versión + columnas) se guarda junto al .pkl del modelo y load_model()
+  se niega a usar un modelo cuyo esquema no coincide con el de este módulo.
+
+NLTK y pandas se importan al primer uso: importar este módulo no los carga.
+"""
+import json
+import os
+
+import numpy as np
+from bs4.element import NavigableString, Tag
+
+# Recursos de NLTK que usa el extractor (word_tokenize y stopwords), por nombre del descargador.
+# Se instalan al construir la imagen Docker; en ejecución nunca se descargan.
+NLTK_RESOURCES = {
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+}
+
+_stopwords = None
+_word_tokenize = None
+
+
+def missing_nltk_resources():
+    """Nombres (de NLTK_RESOURCES) de los recursos de NLTK que no están instalados."""
+    import nltk
+    missing = []
+    for name, resource_path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource_path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def check_nltk_data():
+    """
+    Verifica que los datos de NLTK estén instalados, sin descargarlos.
+
+    Raises:
+        LookupError: Si falta algún recurso, con el comando para instalarlo.
+    """
+    missing = missing_nltk_resources()
+    if missing:
+        raise LookupError(
+            f"Faltan datos de NLTK: {', '.join(missing)}. Instálalos con "
+            f"'python -m nltk.downloader {' '.join(missing)}' (la imagen Docker ya los incluye)."
+        )
+
+
+def get_stopwords():
+    """Stopwords en inglés de NLTK, cargadas una sola vez (los scripts verifican antes los datos)."""
+    global _stopwords
+    if _stopwords is None:
+        from nltk.corpus import stopwords
+        _stopwords = set(stopwords.words('english'))
+    return _stopwords
+
+
+def get_word_tokenize():
+    """word_tokenize de NLTK, importado al primer uso."""
+    global _word_tokenize
+    if _word_tokenize is None:
+        from nltk.tokenize import word_tokenize
+        _word_tokenize = word_tokenize
+    return _word_tokenize
+
+
+def _string_types(tag):
+    """Tipos de cadena que get_text() considera para 'tag' (misma regla que bs4)."""
+    return tag.interesting_string_types if tag.interesting_string_types is not None else tag.MAIN_CONTENT_STRING_TYPES
+
+
+def _is_interesting(string, types):
+    if isinstance(types, type):
+        return type(string) is types
+    return types is None or type(string) in types
+
+
+class TokenStats:
+    """Cache por texto de (word_count, uppercase_ratio, stopword_ratio) con la semántica original."""
+
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, text):
+        if not text:
+            return 0, 0.0, 0.0
+        stats = self._cache.get(text)
+        if stats is None:
+            stats = self._cache[text] = self._compute(text)
+        return stats
+
+    @staticmethod
+    def _compute(text):
+        word_tokenize = get_word_tokenize()
+        # Como en 'word_count', un fallo del tokenizador se propaga
+        words = word_tokenize(text)
+        uppercase_ratio = 0.0
+        if words:
+            uppercase_ratio = sum(1 for w in words if w.isupper() and len(w) > 1) / len(words)
+        try:
+            lower_words = word_tokenize(text.lower())
+        except Exception:
+            lower_words = []
+        stopword_ratio = 0.0
+        if lower_words:
+            stopwords = get_stopwords()
+            stopword_ratio = sum(1 for w in lower_words if w in stopwords) / len(lower_words)
+        return len(words), uppercase_ratio, stopword_ratio
+
+
+# --- Especificación de características ---
+# Cambiar, añadir o reordenar características exige subir FEATURE_SCHEMA_VERSION y reentrenar.
+FEATURE_SCHEMA_VERSION = 1
+# (nombre, tipo en el modelo, dtype de la columna)
+FEATURE_SPEC = [
+    ('tag_name', 'categorical', object),
+    ('num_children', 'numeric', np.int64),
+    ('parent_tag', 'categorical', object),
+    ('has_href', 'binary', np.int64),
+    ('has_src', 'binary', np.int64),
+    ('text_length', 'numeric', np.int64),
+    ('word_count', 'numeric', np.int64),
+    ('uppercase_ratio', 'numeric', np.float64),
+    ('stopword_ratio', 'numeric', np.float64),
+    ('depth', 'numeric', np.int64),
+    ('is_h2', 'binary', np.int64),
+    ('is_div', 'binary', np.int64),
+    ('is_a', 'binary', np.int64),
+    ('is_img', 'binary', np.int64),
+    ('class_contains_title', 'binary', np.int64),
+    ('class_contains_kicker', 'binary', np.int64),
+    ('class_contains_image', 'binary', np.int64),
+]
+FEATURE_COLUMNS = [name for name, _, _ in FEATURE_SPEC]
+NUMERIC_FEATURES = [name for name, kind, _ in FEATURE_SPEC if kind == 'numeric']
+CATEGORICAL_FEATURES = [name for name, kind, _ in FEATURE_SPEC if kind == 'categorical']
+BINARY_FEATURES = [name for name, kind, _ in FEATURE_SPEC if kind == 'binary']
+SCHEMA_FILE_SUFFIX = '.schema.json'
+
+# Palabras en las clases CSS que activan las características class_contains_*
+CLASS_KEYWORDS = {
+    'class_contains_title': ('title', 'titulo'),
+    'class_contains_kicker': ('kicker', 'volanta'),
+    'class_contains_image': ('image', 'imagen'),
+}
+
+
+class FeatureSchemaError(ValueError):
+    """El esquema de características del modelo no coincide con el de este módulo."""
+
+
+def feature_schema():
+    """Esquema versionado de las características (lo que se guarda junto al modelo)."""
+    return {
+        'version': FEATURE_SCHEMA_VERSION,
+        'columns': [{'name': name, 'kind': kind, 'dtype': np.dtype(dtype).name} for name, kind, dtype in FEATURE_SPEC],
+    }
+
+
+def schema_path_for(model_path):
+    """Ruta del esquema de un modelo: 'extractor_model.pkl' -> 'extractor_model.schema.json'."""
+    return os.path.splitext(model_path)[0] + SCHEMA_FILE_SUFFIX
+
+
+def save_schema(model_path):
+    """Guarda el esquema actual junto al modelo y devuelve su ruta."""
+    path = schema_path_for(model_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(feature_schema(), f, indent=2)
+    return path
+
+
+def _check_schema(model_schema, source):
+    expected = feature_schema()
+    if model_schema.get('version') != expected['version']:
+        raise FeatureSchemaError(
+            f"El modelo usa la versión {model_schema.get('version')} del esquema de características y el código la {expected['version']}. Reentrena el modelo."
+        )
+    if model_schema.get('columns') != expected['columns']:
+        raise FeatureSchemaError(f"Las columnas del esquema de '{source}' no coinciden con FEATURE_SPEC. Reentrena el modelo.")
+
+
+def load_model(model_path, prefer_portable=True):
+    """
+    Carga un modelo entrenado verificando antes que su esquema coincide con FEATURE_SPEC.
+
+    Si existe su exportación portable ('<modelo>.portable', ver portable_model.py) y
+    'prefer_portable' es True, se carga esa (mmap, sin sklearn); si no, el .pkl con joblib.
+    Una exportación cuyo SHA-256 del .pkl no coincide con el del .pkl actual (p. ej. tras
+    reentrenar sin volver a exportar) se ignora con una advertencia y se usa el .pkl.
+
+    Raises:
+        FeatureSchemaError: Si falta el esquema o no coincide (versión o columnas).
+    """
+    if prefer_portable:
+        from model_ML import portable_model
+        portable_dir = portable_model.portable_path_for(model_path)
+        if os.path.exists(os.path.join(portable_dir, portable_model.MANIFEST_FILE)):
+            model = portable_model.PortableModel.load(portable_dir)
+            if not os.path.exists(model_path) or model.manifest.get('source_sha256') == portable_model.file_sha256(model_path):
+                _check_schema(model.feature_schema, portable_dir)
+                return model
+            print(f"Advertencia: '{portable_dir}' no se exportó desde el '{model_path}' actual (el SHA-256 no coincide). "
+                  f"Se usa el .pkl con joblib; vuelve a exportarlo con: python model_ML/portable_model.py {model_path}")
+
+    path = schema_path_for(model_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            model_schema = json.load(f)
+    except FileNotFoundError:
+        raise FeatureSchemaError(f"El modelo '{model_path}' no tiene esquema de características ('{path}'). Reentrénalo con train_model.py.")
+    except ValueError as e:
+        raise FeatureSchemaError(f"Esquema de características inválido en '{path}': {e}")
+    _check_schema(model_schema, path)
+
+    import joblib # Solo hace falta (junto con sklearn) para el formato .pkl
+    return joblib.load(model_path)
+
+
+class FeatureBuffer:
+    """
+    Matriz de características por columnas preasignadas (una por característica).
+
+    Las filas se reservan en orden (reserve) y se rellenan después (set_row), lo que
+    permite reservar la fila de un nodo antes de recorrer sus hijos. Las columnas se
+    rellenan como listas preasignadas (asignar un escalar de Python a una lista es más
+    barato que a un array de NumPy) y se convierten a arrays tipados una sola vez, en
+    to_arrays()/to_frame().
+    """
+
+    def __init__(self, capacity=256):
+        self._capacity = max(1, capacity)
+        self._columns = [[None] * self._capacity for _ in FEATURE_SPEC]
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def reserve(self):
+        """Reserva la siguiente fila y devuelve su índice."""
+        if self.size == self._capacity:
+            for column in self._columns:
+                column.extend([None] * self._capacity)
+            self._capacity *= 2
+        index = self.size
+        self.size += 1
+        return index
+
+    def set_row(self, index, values):
+        """Escribe una fila; 'values' sigue el orden de FEATURE_COLUMNS."""
+        for column, value in zip(self._columns, values):
+            column[index] = value
+
+    def append_row(self, values):
+        index = self.reserve()
+        self.set_row(index, values)
+        return index
+
+    def row(self, index):
+        """Valores de una fila en el orden de FEATURE_COLUMNS."""
+        return [column[index] for column in self._columns]
+
+    def to_arrays(self, rows=None):
+        """
+        Columnas como arrays de NumPy con el dtype de FEATURE_SPEC.
+
+        Args:
+            rows (iterable): Índices de las filas a incluir y su orden (por defecto, todas).
+        """
+        arrays = {}
+        for (name, _, dtype), column in zip(FEATURE_SPEC, self._columns):
+            values = column[:self.size] if rows is None else [column[row] for row in rows]
+            arrays[name] = np.array(values, dtype=dtype)
+        return arrays
+
+    def to_frame(self, rows=None):
+        """DataFrame con las columnas de FEATURE_COLUMNS, sin pasar por diccionarios por fila."""
+        import pandas as pd
+        return pd.DataFrame(self.to_arrays(rows), columns=FEATURE_COLUMNS)
+
+
+def _collect(node, depth, parent_tag, nodes, buffer, token_stats):
+    """
+    Recorre el subárbol de 'node' en preorden, escribiendo una fila por etiqueta en 'buffer'.
+
+    Returns:
+        str: El texto de 'node' (equivalente a node.get_text(strip=True)).
+    """
+    row_index = buffer.reserve() # Reservar la fila en preorden
+    nodes.append(node)
+    types = _string_types(node)
+    pieces = []
+    num_children = 0
+    child_parent_tag = node.name if node.name != '[document]' else 'None'
+    for child in node.children:
+        if isinstance(child, Tag):
+            num_children += 1
+            child_text = _collect(child, depth + 1, child_parent_tag, nodes, buffer, token_stats)
+            if _string_types(child) != types:
+                # p. ej. <script>/<style>: su texto propio no cuenta para el padre
+                child_text = "".join(child._all_strings(strip=True, types=types))
+            pieces.append(child_text)
+        elif isinstance(child, NavigableString) and _is_interesting(child, types):
+            pieces.append(child.strip())
+    text = "".join(pieces)
+
+    class_list_str = " ".join(node.get('class', [])).lower()
+    word_count, uppercase_ratio, stopword_ratio = token_stats.get(text)
+    name = node.name
+    # Mismo orden que FEATURE_SPEC
+    buffer.set_row(row_index, (
+        name,
+        num_children,
+        parent_tag,
+        1 if node.has_attr('href') else 0,
+        1 if node.has_attr('src') else 0,
+        len(text),
+        word_count,
+        uppercase_ratio,
+        stopword_ratio,
+        depth,
+        1 if name == 'h2' else 0,
+        1 if name == 'div' else 0,
+        1 if name == 'a' else 0,
+        1 if name == 'img' else 0,
+        *(1 if any(keyword in class_list_str for keyword in keywords) else 0 for keywords in CLASS_KEYWORDS.values()),
+    ))
+    return text
+
+
+def extract_subtree_features(root, buffer=None, root_depth=None, root_parent_tag=None, token_stats=None):
+    """
+    Extrae las características de todas las etiquetas del subárbol de 'root' (incluida) en una pasada.
+
+    Args:
+        root (Tag): Nodo raíz del recorrido (p. ej. el <html> de un bloque o un contenedor).
+        buffer (FeatureBuffer): Buffer donde añadir las filas; se crea uno si es None.
+                                Permite acumular varios bloques en la misma matriz.
+        root_depth (int): Profundidad de la raíz; por defecto len(list(root.parents)).
+        root_parent_tag (str): 'parent_tag' de la raíz; por defecto el nombre de su padre
+                               ('None' si es el documento).
+        token_stats (TokenStats): Cache de tokenización a compartir entre bloques (opcional).
+
+    Returns:
+        tuple: (buffer, nodes, first_row) con los nodos del subárbol en orden del documento;
+               el nodo nodes[i] ocupa la fila first_row + i del buffer (la raíz es la primera).
+    """
+    if buffer is None:
+        buffer = FeatureBuffer()
+    if root_depth is None:
+        root_depth = sum(1 for _ in root.parents)
+    if root_parent_tag is None:
+        parent = root.parent
+        root_parent_tag = parent.name if parent is not None and parent.name != '[document]' else 'None'
+    first_row = buffer.size
+    nodes = []
+    _collect(root, root_depth, root_parent_tag, nodes, buffer, token_stats or TokenStats())
+    return buffer, nodes, first_row
\ No newline at end of file
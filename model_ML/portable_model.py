@@ -0,0 +1,270 @@
+"""
+Formato portable del modelo extractor y motor de inferencia en NumPy puro.
+
+export_pipeline() convierte el pipeline entrenado (ColumnTransformer con StandardScaler,
+OneHotEncoder y passthrough + RandomForestClassifier) en un directorio con:
+
+* manifest.json: columnas, medias/escalas, categorías, clases, esquema de características
+  y SHA-256 del .pkl exportado (load_model ignora un .portable que no corresponde a su .pkl).
+* Arrays .npy con los árboles aplanados (todos los nodos del bosque concatenados), que
+  PortableModel carga con mmap: el arranque no deserializa objetos de sklearn y varios
+  procesos comparten las mismas páginas de memoria.
+
+PortableModel.predict reproduce pipeline.predict: mismo escalado en float64, mismo
+one-hot (categorías desconocidas a cero), comparaciones de los árboles en float32 (como
+sklearn) y suma de probabilidades árbol a árbol en el orden del bosque.
+
+Exportar un modelo ya entrenado:
+    python model_ML/portable_model.py model_ML/extractor_model.pkl
+"""
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+FORMAT_VERSION = 1
+PORTABLE_DIR_SUFFIX = '.portable'
+MANIFEST_FILE = 'manifest.json'
+TREE_ARRAYS = ('children_left', 'children_right', 'feature', 'threshold', 'leaf_proba', 'tree_roots')
+
+
+def portable_path_for(model_path):
+    """Directorio portable de un modelo: 'extractor_model.pkl' -> 'extractor_model.portable'."""
+    return os.path.splitext(model_path)[0] + PORTABLE_DIR_SUFFIX
+
+
+def _unwrap(transformer):
+    """Devuelve el único paso de un Pipeline de sklearn (o el propio transformador)."""
+    steps = getattr(transformer, 'steps', None)
+    if steps is None:
+        return transformer
+    if len(steps) != 1:
+        raise ValueError(f"Solo se exportan pipelines de un paso; encontrado: {[name for name, _ in steps]}")
+    return steps[0][1]
+
+
+def _export_preprocessor(preprocessor):
+    """Describe el ColumnTransformer como una lista de bloques en el orden de su salida."""
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler, FunctionTransformer
+
+    blocks = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        columns = list(columns)
+        step = _unwrap(transformer)
+        if isinstance(step, StandardScaler):
+            n_columns = len(columns)
+            blocks.append({
+                'kind': 'scale', 'name': name, 'columns': columns,
+                'mean': step.mean_.tolist() if step.with_mean else [0.0] * n_columns,
+                'scale': step.scale_.tolist() if step.with_std else [1.0] * n_columns,
+            })
+        elif isinstance(step, OneHotEncoder):
+            if step.drop is not None or step.handle_unknown != 'ignore' or getattr(step, 'infrequent_categories_', None):
+                raise ValueError("Solo se exporta OneHotEncoder con drop=None, handle_unknown='ignore' y sin categorías infrecuentes.")
+            blocks.append({
+                'kind': 'onehot', 'name': name, 'columns': columns,
+                'categories': [[str(category) for category in categories] for categories in step.categories_],
+            })
+        elif transformer == 'passthrough' or step == 'passthrough' or (isinstance(step, FunctionTransformer) and step.func is None):
+            blocks.append({'kind': 'passthrough', 'name': name, 'columns': columns})
+        else:
+            raise ValueError(f"Transformador no soportado en el formato portable: {name} ({type(step).__name__})")
+    return blocks
+
+
+def _export_forest(forest):
+    """Aplana los árboles del bosque en arrays con índices globales de nodo."""
+    import sklearn
+    from sklearn.utils.fixes import parse_version
+
+    if forest.n_outputs_ != 1:
+        raise ValueError("Solo se exportan bosques de una salida.")
+    # Desde sklearn 1.4 tree_.value ya guarda proporciones; antes guardaba conteos
+    value_is_proportion = parse_version(sklearn.__version__) >= parse_version('1.4')
+
+    children_left, children_right, feature, threshold, leaf_proba, tree_roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == -1
+        # Las hojas apuntan a sí mismas: el recorrido vectorizado se detiene en ellas
+        node_ids = np.arange(tree.node_count, dtype=np.int64) + offset
+        children_left.append(np.where(is_leaf, node_ids, left + offset))
+        children_right.append(np.where(is_leaf, node_ids, right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+        threshold.append(tree.threshold.astype(np.float64))
+        proba = tree.value[:, 0, :forest.n_classes_].astype(np.float64)
+        if not value_is_proportion:
+            normalizer = proba.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            proba = proba / normalizer[:, np.newaxis]
+        leaf_proba.append(proba)
+        tree_roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        'children_left': np.concatenate(children_left),
+        'children_right': np.concatenate(children_right),
+        'feature': np.concatenate(feature),
+        'threshold': np.concatenate(threshold),
+        'leaf_proba': np.concatenate(leaf_proba),
+        'tree_roots': np.asarray(tree_roots, dtype=np.int64),
+    }
+
+
+def file_sha256(path):
+    """SHA-256 del contenido de un archivo (identifica el .pkl del que se exportó un modelo)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_pipeline(pipeline, output_dir, feature_schema=None, source_model_path=None):
+    """
+    Exporta un pipeline entrenado ('preprocessor' + 'classifier') al formato portable.
+
+    Args:
+        pipeline: sklearn Pipeline con un ColumnTransformer y un RandomForestClassifier.
+        output_dir (str): Directorio de salida (se crea o se sobrescribe su contenido).
+        feature_schema (dict): Esquema de características a guardar en el manifiesto
+                               (por defecto features.feature_schema()).
+        source_model_path (str): .pkl del que se exporta el pipeline. Su SHA-256 se guarda
+                                 en el manifiesto para que features.load_model detecte una
+                                 exportación que ya no corresponde al .pkl.
+
+    Returns:
+        str: El directorio escrito.
+    """
+    if feature_schema is None:
+        from model_ML import features
+        feature_schema = features.feature_schema()
+    preprocessor = pipeline.named_steps['preprocessor']
+    forest = pipeline.named_steps['classifier']
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'feature_schema': feature_schema,
+        'blocks': _export_preprocessor(preprocessor),
+        'classes': [str(label) for label in forest.classes_],
+        'n_trees': len(forest.estimators_),
+        'source_sha256': file_sha256(source_model_path) if source_model_path else None,
+    }
+    arrays = _export_forest(forest)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(output_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    # El manifiesto se escribe al final: un directorio sin manifiesto no se considera válido
+    temporary_path = os.path.join(output_dir, MANIFEST_FILE + '.tmp')
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary_path, os.path.join(output_dir, MANIFEST_FILE))
+    return output_dir
+
+
+class PortableModel:
+    """Modelo exportado con export_pipeline; predict() equivale a pipeline.predict()."""
+
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        self.feature_schema = manifest['feature_schema']
+        self.classes_ = np.asarray(manifest['classes'], dtype=object)
+        self._blocks = manifest['blocks']
+        self._category_index = [
+            [{category: i for i, category in enumerate(categories)} for categories in block['categories']]
+            if block['kind'] == 'onehot' else None
+            for block in self._blocks
+        ]
+        for name in TREE_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def load(cls, model_dir, mmap=True):
+        """Carga un directorio portable; con mmap los arrays se mapean en memoria (solo lectura)."""
+        with open(os.path.join(model_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Versión de formato portable no soportada: {manifest.get('format_version')}")
+        arrays = {
+            name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode='r' if mmap else None)
+            for name in TREE_ARRAYS
+        }
+        return cls(manifest, arrays)
+
+    def transform(self, X):
+        """
+        Equivalente al ColumnTransformer: matriz float64 con los bloques en orden.
+
+        Args:
+            X: DataFrame o diccionario de columnas (p. ej. FeatureBuffer.to_arrays()).
+        """
+        parts = []
+        for block, category_index in zip(self._blocks, self._category_index):
+            if block['kind'] == 'scale':
+                values = np.column_stack([np.asarray(X[column], dtype=np.float64) for column in block['columns']])
+                values -= np.asarray(block['mean'], dtype=np.float64)
+                values /= np.asarray(block['scale'], dtype=np.float64)
+                parts.append(values)
+            elif block['kind'] == 'onehot':
+                for column, index in zip(block['columns'], category_index):
+                    codes = np.fromiter((index.get(str(value), -1) for value in X[column]), dtype=np.int64)
+                    encoded = np.zeros((len(codes), len(index)), dtype=np.float64)
+                    known = codes >= 0
+                    encoded[np.flatnonzero(known), codes[known]] = 1.0
+                    parts.append(encoded)
+            else:
+                parts.append(np.column_stack([np.asarray(X[column], dtype=np.float64) for column in block['columns']]))
+        return np.hstack(parts)
+
+    def predict_proba(self, X):
+        # Los árboles de sklearn comparan en float32
+        Xt = self.transform(X).astype(np.float32)
+        n_samples = Xt.shape[0]
+        n_trees = len(self.tree_roots)
+        # Un nodo actual por (muestra, árbol); solo se avanzan los que aún no llegaron a una hoja
+        nodes = np.tile(np.asarray(self.tree_roots), n_samples)
+        samples = np.repeat(np.arange(n_samples), n_trees)
+        active = np.flatnonzero(self.children_left[nodes] != nodes)
+        while active.size:
+            current = nodes[active]
+            go_left = Xt[samples[active], self.feature[current]] <= self.threshold[current]
+            next_nodes = np.where(go_left, self.children_left[current], self.children_right[current])
+            nodes[active] = next_nodes
+            active = active[self.children_left[next_nodes] != next_nodes]
+        nodes = nodes.reshape(n_samples, n_trees)
+
+        # Suma árbol a árbol, en el mismo orden que ForestClassifier.predict_proba
+        leaf_proba = self.leaf_proba
+        proba = np.zeros((n_samples, leaf_proba.shape[1]), dtype=np.float64)
+        for tree in range(n_trees):
+            proba += leaf_proba[nodes[:, tree]]
+        proba /= n_trees
+        return proba
+
+    def predict(self, X):
+        if len(X) == 0:
+            return np.empty(0, dtype=object)
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python model_ML/portable_model.py <ruta/al/modelo.pkl>")
+        sys.exit(1)
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from model_ML import features
+
+    model_path = sys.argv[1]
+    pipeline = features.load_model(model_path, prefer_portable=False) # Verifica el esquema del .pkl
+    output_dir = export_pipeline(pipeline, portable_path_for(model_path), source_model_path=model_path)
+    print(f"Modelo exportado en formato portable: {output_dir}")
\ No newline at end of file
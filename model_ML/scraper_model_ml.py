@@ -1,36 +1,26 @@
 import time
 import os
+import sys
 import re
-import joblib
-import pandas as pd
 from urllib.parse import urljoin
 import traceback
 
-# --- Web Scraping ---
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+# Selenium, NLTK y pandas se importan al usarse (ver scrape_dynamically_with_model y
+# features.py): importar este módulo no los carga ni consulta la red.
+
+# Permite importar 'modules' (pool de navegadores compartido) al ejecutar el script directamente
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from modules.browser_pool import BrowserPool
+from modules.page_readiness import PageReadiness
+from modules.snapshot_archive import SnapshotArchive, archive_page
 
 # --- HTML Parsing ---
 from bs4 import BeautifulSoup
 
-# --- NLP ---
-import nltk
-
-# Verificar/Descargar datos NLTK (simplificado para este script)
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    print("Descargando datos NLTK necesarios ('punkt', 'stopwords')...")
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+# --- NLP (datos de NLTK verificados en el script principal, sin descargas) ---
+from model_ML import features
 
 # --- Configuración ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -38,202 +28,336 @@ TARGET_URL = "https://www.yogonet.com/international/"
 BASE_URL = "https://www.yogonet.com"
 NEWS_CONTAINER_SELECTOR = "div.contenedor_dato_modulo"
 MODEL_FILE = os.path.join(SCRIPT_DIR, 'extractor_model.pkl')
-
-# Carga las stopwords
-STOPWORDS = set(stopwords.words('english'))
+INFERENCE_MODES = ("batched", "per_block", "induced")
+# Un bloque parseado por separado (como en entrenamiento) queda dentro de <html><body>:
+# el contenedor tiene profundidad 3 (body, html, [document]) y padre 'body'
+STANDALONE_BLOCK_DEPTH = 3
+STANDALONE_BLOCK_PARENT = 'body'
+_loaded_models = {} # Modelos ya cargados por ruta (se cargan al primer uso, no al importar)
+
+def get_model(model_file=MODEL_FILE):
+    """
+    Devuelve el modelo extractor, cargándolo la primera vez que se pide.
+
+    Usa la exportación portable ('extractor_model.portable', arrays con mmap) si existe y
+    si no el .pkl; en ambos casos verifica el esquema de características.
+
+    Raises:
+        features.FeatureSchemaError: Si el esquema del modelo no coincide con FEATURE_SPEC.
+    """
+    if model_file not in _loaded_models:
+        _loaded_models[model_file] = features.load_model(model_file)
+    return _loaded_models[model_file]
 
 def get_clean_text(node):
     """Obtiene texto limpio de un nodo BeautifulSoup."""
     return node.get_text(strip=True) if node else ""
 
-def calculate_uppercase_ratio(text):
-    """Calcula la proporción de palabras en mayúsculas."""
-    try:
-        words = word_tokenize(text)
-    except Exception: return 0.0
-    if not words: return 0.0
-    uppercase_words = [w for w in words if w.isupper() and len(w) > 1]
-    return len(uppercase_words) / len(words)
-
-def calculate_stopword_ratio(text):
-    """Calcula la proporción de stopwords."""
-    try:
-        words = word_tokenize(text.lower())
-    except Exception: return 0.0
-    if not words: return 0.0
-    stopword_count = sum(1 for w in words if w in STOPWORDS)
-    return stopword_count / len(words)
-
-
-def extract_features(node, soup):
-    """Extrae un DICCIONARIO de características para UN nodo (IDÉNTICA A train_model.py)."""
-    features = {}
-    text = get_clean_text(node)
-    parent_node = node.parent if node and hasattr(node, 'parent') and node.parent and node.parent.name != '[document]' else None
-
-    # --- Características  ---
-    features['tag_name'] = node.name if node else 'None'
-    features['num_children'] = len(node.find_all(recursive=False)) if node else 0
-    features['parent_tag'] = parent_node.name if parent_node else 'None'
-    features['has_href'] = 1 if node and node.has_attr('href') else 0
-    features['has_src'] = 1 if node and node.has_attr('src') else 0
-    # No necesitamos 'class_list' directamente si el ColumnTransformer la ignora,
-    # pero sí las features derivadas de ella:
-    class_list_str = " ".join(node.get('class', [])).lower() if node else ""
-    features['text_length'] = len(text)
-    features['word_count'] = len(word_tokenize(text)) if text else 0
-    features['uppercase_ratio'] = calculate_uppercase_ratio(text) if text else 0.0
-    features['stopword_ratio'] = calculate_stopword_ratio(text) if text else 0.0
-    features['depth'] = len(list(node.parents)) if node and hasattr(node, 'parents') else 0
-    features['is_h2'] = 1 if node and node.name == 'h2' else 0
-    features['is_div'] = 1 if node and node.name == 'div' else 0
-    features['is_a'] = 1 if node and node.name == 'a' else 0
-    features['is_img'] = 1 if node and node.name == 'img' else 0
-    features['class_contains_title'] = 1 if 'title' in class_list_str or 'titulo' in class_list_str else 0
-    features['class_contains_kicker'] = 1 if 'kicker' in class_list_str or 'volanta' in class_list_str else 0
-    features['class_contains_image'] = 1 if 'image' in class_list_str or 'imagen' in class_list_str else 0
-
-    return features 
-
-def setup_driver():
-    """Configura e inicia el WebDriver de Selenium."""
-    print("Configurando WebDriver...")
-    chrome_options = Options()
-    # chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("window-size=1920x1080")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    try:
-        try:
-             service = ChromeService(ChromeDriverManager().install())
-             driver = webdriver.Chrome(service=service, options=chrome_options)
-        except Exception as e_wdm:
-             print(f"Fallo con webdriver-manager: {e_wdm}")
-             print("Intentando ruta local de chromedriver (asegúrate que esté en PATH)...")
-             driver = webdriver.Chrome(options=chrome_options)
-
-        print("WebDriver iniciado.")
-        return driver
-    except Exception as e:
-        print(f"Error fatal al iniciar WebDriver: {e}")
-        print("Asegúrate que ChromeDriver esté instalado y accesible en el PATH del sistema.")
-        return None
+def is_candidate_node(node):
+    """Se clasifican las etiquetas con texto propio o con hijos."""
+    return bool(node.name) and (node.string is None or bool(node.string.strip()))
+
+def standalone_body_values(container_values):
+    """
+    Fila de características del <body> que envuelve a un bloque parseado por separado.
+
+    Ese <body> solo contiene el contenedor, así que comparte su texto; el resto de
+    características son fijas. Permite reproducir en el modo por lotes la fila extra que
+    produce el modo por bloque (y el entrenamiento).
+    """
+    values = dict(zip(features.FEATURE_COLUMNS, container_values))
+    values.update({
+        'tag_name': 'body', 'num_children': 1, 'parent_tag': 'html', 'has_href': 0, 'has_src': 0,
+        'depth': STANDALONE_BLOCK_DEPTH - 1, 'is_h2': 0, 'is_div': 0, 'is_a': 0, 'is_img': 0,
+        'class_contains_title': 0, 'class_contains_kicker': 0, 'class_contains_image': 0,
+    })
+    return [values[name] for name in features.FEATURE_COLUMNS]
+
+def article_fields_from_predictions(predictions):
+    """
+    Campos de una noticia a partir de los nodos y roles predichos de su bloque.
+
+    Args:
+        predictions (list): Lista de tuplas (nodo, rol) del bloque, en orden del documento.
+
+    Returns:
+        dict: 'title', 'kicker', 'image_url' y 'link' ("N/A" si el modelo no los encontró).
+    """
+    title_text, kicker_text, image_url, link_url = "N/A", "N/A", "N/A", "N/A"
+
+    # Lógica de selección
+    title_node = next((node for node, role in predictions if role == 'Title'), None)
+    kicker_node = next((node for node, role in predictions if role == 'Kicker'), None)
+    # Busca específicamente la etiqueta <img> predicha como Image_URL
+    image_node = next((node for node, role in predictions if role == 'Image_URL' and node.name == 'img'), None)
+
+    if title_node:
+        title_text = get_clean_text(title_node)
+        # Extraer link si el nodo Title es <a>
+        if title_node.name == 'a' and title_node.has_attr('href'):
+            link_url = urljoin(BASE_URL, title_node.get('href'))
+
+    if kicker_node:
+        kicker_text = get_clean_text(kicker_node)
+        kicker_text = kicker_text if kicker_text else "N/A"
+
+    if image_node:
+        src = image_node.get('src')
+        if src:
+            image_url = urljoin(BASE_URL, src)
+
+    # Fallback para Link: Si no se obtuvo del Title, intentar buscar un <a> alrededor de la imagen
+    if link_url == "N/A" and image_node and image_node.parent and image_node.parent.name == 'a' and image_node.parent.has_attr('href'):
+         link_url = urljoin(BASE_URL, image_node.parent.get('href'))
+
+    return {"title": title_text, "kicker": kicker_text, "image_url": image_url, "link": link_url}
+
+def build_article_from_predictions(predictions, block_number):
+    """
+    Construye la noticia de un bloque a partir de sus nodos y roles predichos.
+
+    Args:
+        predictions (list): Lista de tuplas (nodo, rol) del bloque, en orden del documento.
+        block_number (int): Número del bloque (1-based), solo para el log.
+
+    Returns:
+        dict: Noticia con 'title', 'kicker', 'image_url' y 'link', o None si falta título o link.
+    """
+    article = article_fields_from_predictions(predictions)
+    title_text, kicker_text, image_url, link_url = article["title"], article["kicker"], article["image_url"], article["link"]
+
+    # Solo añadir si se encontró título (o link si es requisito)
+    if title_text != "N/A" and link_url != "N/A":
+        print(f"  Bloque {block_number}: OK -> T='{title_text[:30]}...', K='{kicker_text[:20]}...', Img={'Sí' if image_url!='N/A' else 'No'}, Link={'Sí' if link_url!='N/A' else 'No'}")
+        return article
+    print(f"  Bloque {block_number}: Omitido (Falta Título o Link principal)")
+    return None
+
+def predict_page_batched(page_html, model_pipeline, return_containers=False):
+    """
+    Clasifica todos los bloques de una página con una sola llamada a predict.
+
+    Parsea el HTML completo una vez, escribe las características de los nodos candidatos
+    de todos los contenedores en un único FeatureBuffer y reparte los roles predichos a
+    su bloque.
+
+    Args:
+        return_containers (bool): Si es True devuelve también los nodos contenedor, en el
+                                  mismo orden que las predicciones (el contenedor no siempre
+                                  es un nodo candidato, así que no se puede deducir de ellas).
+
+    Returns:
+        list: Por cada contenedor, la lista de tuplas (nodo, rol) de sus nodos.
+              Con return_containers, la tupla (contenedores, esa lista).
+    """
+    soup = BeautifulSoup(page_html, 'lxml')
+    containers = soup.select(NEWS_CONTAINER_SELECTOR)
+    buffer = features.FeatureBuffer()
+    token_stats = features.TokenStats() # Textos repetidos entre bloques se tokenizan una vez
+    selected_rows, nodes_to_process, block_ids = [], [], []
+    for block_id, container_node in enumerate(containers):
+        # Profundidad y padre del contenedor como si el bloque se hubiera parseado por separado
+        _, nodes, first_row = features.extract_subtree_features(
+            container_node, buffer=buffer, root_depth=STANDALONE_BLOCK_DEPTH,
+            root_parent_tag=STANDALONE_BLOCK_PARENT, token_stats=token_stats,
+        )
+        block_rows = []
+        if is_candidate_node(container_node):
+            # Mismas filas que el bloque aislado: <body>, el contenedor y sus descendientes.
+            # El contenedor representa también al <body>: mismo texto y ninguno es <a> ni <img>.
+            body_row = buffer.append_row(standalone_body_values(buffer.row(first_row)))
+            block_rows.append((body_row, container_node))
+            block_rows.append((first_row, container_node))
+        block_rows.extend(
+            (first_row + offset, node) for offset, node in enumerate(nodes) if offset and is_candidate_node(node)
+        )
+        for row, node in block_rows:
+            selected_rows.append(row)
+            nodes_to_process.append(node)
+            block_ids.append(block_id)
+
+    predictions_by_block = [[] for _ in containers]
+    if selected_rows:
+        # Una sola predicción para todos los nodos de la página
+        predicted_roles = model_pipeline.predict(buffer.to_frame(selected_rows))
+        for block_id, node, role in zip(block_ids, nodes_to_process, predicted_roles):
+            predictions_by_block[block_id].append((node, role))
+    return (containers, predictions_by_block) if return_containers else predictions_by_block
+
+def predict_block(html_content, model_pipeline):
+    """Clasifica los nodos de un único bloque (outerHTML del contenedor) con su propia llamada a predict."""
+    soup = BeautifulSoup(html_content, 'lxml')
+    container_node = soup.find(recursive=False)
+    if not container_node: container_node = soup
+
+    # La raíz (el <html> del bloque) no se clasifica, igual que con find_all
+    buffer, nodes, _ = features.extract_subtree_features(container_node)
+    selected_rows = [row for row, node in enumerate(nodes) if row and is_candidate_node(node)]
+    if not selected_rows:
+        return []
+
+    predicted_roles = model_pipeline.predict(buffer.to_frame(selected_rows))
+    return [(nodes[row], role) for row, role in zip(selected_rows, predicted_roles)]
+
+def extract_articles_with_model(page_html, model_pipeline):
+    """
+    Extrae las noticias de un HTML completo con una sola predicción (modo 'batched').
+
+    Sirve igual para el 'page_source' de Selenium que para un snapshot archivado.
+
+    Returns:
+        list: Noticias con 'title', 'kicker', 'image_url' y 'link'.
+    """
+    news_data = []
+    predictions_by_block = predict_page_batched(page_html, model_pipeline)
+    print(f"Se encontraron {len(predictions_by_block)} contenedores.")
+    if not predictions_by_block:
+        print("No se encontraron contenedores de noticias.")
+        return news_data
+    for i, predictions in enumerate(predictions_by_block):
+        if not predictions:
+            print(f"  Bloque {i+1}: No se extrajeron features.")
+            continue
+        article = build_article_from_predictions(predictions, i + 1)
+        if article:
+            news_data.append(article)
+    return news_data
+
+def extract_articles_induced(page_html, model_pipeline, rules_file=None):
+    """
+    Extrae las noticias con las reglas inducidas de selector_induction; el modelo solo se
+    ejecuta si no hay reglas, si cambió la huella del layout o si las reglas pierden confianza.
+    """
+    from model_ML import selector_induction
 
+    extractor = selector_induction.InducedExtractor(model_pipeline, rules_file or selector_induction.DEFAULT_RULES_FILE)
+    news_data, _ = extractor.extract(page_html)
+    return news_data
+
+def scrape_snapshot_with_model(archive, url, model_pipeline, until=None, inference_mode="batched", rules_file=None):
+    """
+    Como scrape_dynamically_with_model, pero sobre el snapshot archivado más reciente de 'url'
+    (hasta la fecha 'until', si se indica), sin navegador ni red. 'per_block' se trata como
+    'batched' (el HTML archivado ya está completo).
+    """
+    if inference_mode not in INFERENCE_MODES:
+        raise ValueError(f"Modo de inferencia desconocido: '{inference_mode}'. Usa uno de {INFERENCE_MODES}.")
+    entry = archive.latest(url, until=until)
+    if entry is None:
+        print(f"No hay snapshots archivados de {url}.")
+        return []
+    print(f"Reproduciendo el snapshot de {url} descargado el {entry['fetched_at']}...")
+    start_time = time.perf_counter()
+    page_html = archive.read(entry)
+    if inference_mode == "induced":
+        news_data = extract_articles_induced(page_html, model_pipeline, rules_file)
+    else:
+        inference_mode = "batched"
+        news_data = extract_articles_with_model(page_html, model_pipeline)
+    print(f"Inferencia '{inference_mode}' completada en {time.perf_counter() - start_time:.2f} s.")
+    print(f"\nScraping desde el archivo finalizado. Se extrajeron {len(news_data)} noticias.")
+    return news_data
 
-def scrape_dynamically_with_model(driver, url, model_pipeline):
-    """Realiza el scraping usando el pipeline ML para identificar elementos."""
+def scrape_dynamically_with_model(driver, url, model_pipeline, inference_mode="batched", readiness=None, archive=None,
+                                  rules_file=None):
+    """
+    Realiza el scraping usando el pipeline ML para identificar elementos.
+    El driver no se cierra aquí: su ciclo de vida lo gestiona quien lo creó (p. ej. el BrowserPool).
+
+    Args:
+        inference_mode (str): 'batched' (por defecto) toma el HTML de la página una vez y hace
+                              una sola predicción para todos los nodos de todos los bloques;
+                              'per_block' pide el outerHTML de cada contenedor y predice bloque
+                              a bloque (modo original, para comparar); 'induced' aplica las
+                              reglas inducidas de selector_induction y solo ejecuta el modelo
+                              para generarlas o regenerarlas.
+        readiness (PageReadiness): Cuándo se considera lista la página (p. ej. pool.readiness).
+                                   None = valores por defecto.
+        archive (SnapshotArchive): Si se indica, el HTML de la página se archiva para poder
+                                   repetir la extracción sin red (scrape_snapshot_with_model).
+        rules_file (str): Reglas del modo 'induced' (None = selector_induction.DEFAULT_RULES_FILE).
+    """
+    from selenium.webdriver.common.by import By
+
+    if inference_mode not in INFERENCE_MODES:
+        raise ValueError(f"Modo de inferencia desconocido: '{inference_mode}'. Usa uno de {INFERENCE_MODES}.")
     print(f"Navegando a {url}...")
     driver.get(url)
-    wait = WebDriverWait(driver, 20)
+    readiness = readiness or PageReadiness()
     news_data = []
 
     try:
-        print(f"Esperando los contenedores de noticias ({NEWS_CONTAINER_SELECTOR})...")
-        wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, NEWS_CONTAINER_SELECTOR)))
-        time.sleep(2) # Pausa adicional por si hay carga JS lenta
-        news_elements_selenium = driver.find_elements(By.CSS_SELECTOR, NEWS_CONTAINER_SELECTOR)
-        print(f"Se encontraron {len(news_elements_selenium)} contenedores.")
-
-        if not news_elements_selenium:
-            print("No se encontraron contenedores de noticias.")
-            return []
-
-        print("Procesando contenedores con el modelo...")
-        for i, element_selenium in enumerate(news_elements_selenium):
-            print(f"--- Procesando Bloque {i+1} ---")
-            try:
-                html_content = element_selenium.get_attribute('outerHTML')
-                soup = BeautifulSoup(html_content, 'lxml')
-                container_node = soup.find(recursive=False)
-                if not container_node: container_node = soup
-
-                nodes_to_process = []
-                node_feature_list = []
-                for node in container_node.find_all(True, recursive=True):
-                    if node.name and (node.string is None or node.string.strip()):
-                        features_dict = extract_features(node, soup) 
-                        node_feature_list.append(features_dict)
-                        nodes_to_process.append(node) 
-
-                if not node_feature_list:
-                    print(f"  Bloque {i+1}: No se extrajeron features.")
+        print(f"Esperando los contenedores de noticias ({NEWS_CONTAINER_SELECTOR}) y a que la página se asiente...")
+        ready = readiness.wait(driver, NEWS_CONTAINER_SELECTOR)
+        print(f"Página lista en {ready['first_seconds'] + ready['settle_seconds']:.2f} s ({ready['containers']} contenedores).")
+
+        start_time = time.perf_counter()
+        if inference_mode == "batched":
+            page_html = driver.page_source
+            archive_page(archive, url, page_html)
+            news_data = extract_articles_with_model(page_html, model_pipeline)
+        elif inference_mode == "induced":
+            page_html = driver.page_source
+            archive_page(archive, url, page_html)
+            news_data = extract_articles_induced(page_html, model_pipeline, rules_file)
+        else:
+            if archive is not None:
+                archive_page(archive, url, driver.page_source)
+            news_elements_selenium = driver.find_elements(By.CSS_SELECTOR, NEWS_CONTAINER_SELECTOR)
+            print(f"Se encontraron {len(news_elements_selenium)} contenedores.")
+
+            if not news_elements_selenium:
+                print("No se encontraron contenedores de noticias.")
+                return []
+
+            print("Procesando contenedores con el modelo...")
+            for i, element_selenium in enumerate(news_elements_selenium):
+                print(f"--- Procesando Bloque {i+1} ---")
+                try:
+                    predictions = predict_block(element_selenium.get_attribute('outerHTML'), model_pipeline)
+                    if not predictions:
+                        print(f"  Bloque {i+1}: No se extrajeron features.")
+                        continue
+                    article = build_article_from_predictions(predictions, i + 1)
+                    if article:
+                        news_data.append(article)
+
+                except Exception as e_inner:
+                    print(f"Error procesando el bloque {i+1}: {e_inner}")
+                    traceback.print_exc() # Imprime detalle del error
                     continue
-
-                # Convertir lista de diccionarios a DataFrame de Pandas
-                features_df = pd.DataFrame(node_feature_list)
-
-                # Predecir roles usando el pipeline cargado
-                predicted_roles = model_pipeline.predict(features_df)
-
-                # Combinar nodos con sus predicciones
-                predictions = [{'node': node, 'role': role}
-                               for node, role in zip(nodes_to_process, predicted_roles)]
-
-                # --- Post-procesamiento de predicciones ---
-                title_text, kicker_text, image_url, link_url = "N/A", "N/A", "N/A", "N/A"
-
-                # Lógica de selección
-                title_node = next((p['node'] for p in predictions if p['role'] == 'Title'), None)
-                kicker_node = next((p['node'] for p in predictions if p['role'] == 'Kicker'), None)
-                # Busca específicamente la etiqueta <img> predicha como Image_URL
-                image_node = next((p['node'] for p in predictions if p['role'] == 'Image_URL' and p['node'].name == 'img'), None)
-
-                if title_node:
-                    title_text = get_clean_text(title_node)
-                    # Extraer link si el nodo Title es <a>
-                    if title_node.name == 'a' and title_node.has_attr('href'):
-                        link_url = urljoin(BASE_URL, title_node.get('href'))
-
-                if kicker_node:
-                    kicker_text = get_clean_text(kicker_node)
-                    kicker_text = kicker_text if kicker_text else "N/A"
-
-                if image_node:
-                    src = image_node.get('src')
-                    if src:
-                        image_url = urljoin(BASE_URL, src)
-
-                # Fallback para Link: Si no se obtuvo del Title, intentar buscar un <a> alrededor de la imagen
-                if link_url == "N/A" and image_node and image_node.parent and image_node.parent.name == 'a' and image_node.parent.has_attr('href'):
-                     link_url = urljoin(BASE_URL, image_node.parent.get('href'))
-
-                # Solo añadir si se encontró título (o link si es requisito)
-                if title_text != "N/A" and link_url != "N/A":
-                    news_data.append({
-                        "title": title_text,
-                        "kicker": kicker_text,
-                        "image_url": image_url,
-                        "link": link_url
-                        })
-                    print(f"  Bloque {i+1}: OK -> T='{title_text[:30]}...', K='{kicker_text[:20]}...', Img={'Sí' if image_url!='N/A' else 'No'}, Link={'Sí' if link_url!='N/A' else 'No'}")
-                else:
-                     print(f"  Bloque {i+1}: Omitido (Falta Título o Link principal)")
-
-
-            except Exception as e_inner:
-                print(f"Error procesando el bloque {i+1}: {e_inner}")
-                traceback.print_exc() # Imprime detalle del error
-                continue
+        print(f"Inferencia '{inference_mode}' completada en {time.perf_counter() - start_time:.2f} s.")
 
     except TimeoutError:
         print("Timeout esperando los elementos.")
     except Exception as e_outer:
         print(f"Error general durante el scraping: {e_outer}")
         traceback.print_exc() # Imprime detalle del error
-    finally:
-        print("Cerrando WebDriver.")
-        if driver:
-            driver.quit()
 
     print(f"\nScraping dinámico finalizado. Se extrajeron {len(news_data)} noticias.")
     return news_data
 
 # --- SCRIPT PRINCIPAL ---
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scraper dinámico con el modelo NLP+DOM.")
+    parser.add_argument("--replay", metavar="ARCHIVE_DIR",
+                        help="Extrae del último snapshot archivado de la URL en lugar de abrir el navegador.")
+    parser.add_argument("--until", help="Con --replay: usa el último snapshot hasta esta fecha (AAAA-MM-DD).")
+    parser.add_argument("--inference-mode", choices=INFERENCE_MODES, default="batched",
+                        help="'induced' aplica reglas inducidas del modelo y solo lo re-ejecuta si cambia el layout.")
+    parser.add_argument("--rules-file", help="Reglas del modo 'induced' (por defecto model_ML/selector_rules.json).")
+    args = parser.parse_args()
     print("Iniciando Scraper Dinámico con Modelo NLP+DOM...")
 
+    # Los datos de NLTK deben venir instalados (en Docker, al construir la imagen)
+    try:
+        features.check_nltk_data()
+    except LookupError as e:
+        print(f"Error: {e}")
+        exit()
+
     # Cargar el pipeline (modelo + preprocesador) entrenado
     if not os.path.exists(MODEL_FILE):
         print(f"Error: Archivo del modelo '{MODEL_FILE}' no encontrado.")
@@ -241,23 +365,34 @@ if __name__ == "__main__":
 
     try:
         print(f"Cargando pipeline desde '{MODEL_FILE}'...")
-        # Carga el pipeline completo guardado por joblib
-        model_pipeline = joblib.load(MODEL_FILE)
+        # Formato portable si existe (si no, el .pkl de joblib), verificando su esquema de características
+        model_pipeline = get_model(MODEL_FILE)
         print("Pipeline cargado exitosamente.")
+    except features.FeatureSchemaError as e:
+        print(f"Modelo incompatible: {e}")
+        exit()
     except Exception as e:
         print(f"Error al cargar el pipeline: {e}")
         exit()
 
-    # Configurar y ejecutar Selenium
-    driver = setup_driver()
-    if not driver:
-        exit()
+    if args.replay:
+        # Sin navegador ni red: mismo modelo sobre el HTML archivado
+        scraped_data = scrape_snapshot_with_model(SnapshotArchive(args.replay), TARGET_URL, model_pipeline, until=args.until,
+                                                  inference_mode=args.inference_mode, rules_file=args.rules_file)
+    else:
+        # Configurar y ejecutar Selenium (sesión con ventana visible tomada del pool compartido)
+        print("Configurando WebDriver...")
+        with BrowserPool(size=1, headless=False) as pool, pool.session() as driver:
+            if not driver:
+                exit()
 
-    # Realizar scraping usando el pipeline
-    scraped_data = scrape_dynamically_with_model(driver, TARGET_URL, model_pipeline)
+            # Realizar scraping usando el pipeline
+            scraped_data = scrape_dynamically_with_model(driver, TARGET_URL, model_pipeline, inference_mode=args.inference_mode,
+                                                         readiness=pool.readiness, rules_file=args.rules_file)
 
     # Mostrar resultados (o procesar/guardar)
     if scraped_data:
+        import pandas as pd
         print("\n--- Datos Extraídos (primeros 5) ---")
         df_results = pd.DataFrame(scraped_data)
         print(df_results.head().to_string())
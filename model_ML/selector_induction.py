@@ -0,0 +1,254 @@
+"""
+Inducción de selectores a partir de las predicciones del modelo (modo de inferencia 'induced').
+
+El layout de Yogonet cambia pocas veces, así que no hace falta clasificar cada nodo en cada
+ejecución. El modelo se ejecuta una vez sobre la página y, para cada rol (Title, Kicker,
+Image_URL), se toma la ruta estructural (etiquetas y clases desde el contenedor) del nodo
+elegido en cada bloque. La ruta mayoritaria se compila a XPath. Las reglas se guardan en
+JSON junto con una huella del layout, y en las ejecuciones siguientes se aplican
+directamente con lxml, sin features ni predict.
+
+El modelo se vuelve a ejecutar (y las reglas se regeneran) si:
+* no hay reglas guardadas o la huella del layout de la página no coincide con la suya;
+* la tasa de contenedores con noticia válida cae más de 'confidence_drop' respecto a la
+  que tenían las reglas al inducirse.
+
+Las reglas solo se guardan si reproducen al menos 'min_agreement' de las noticias del modelo.
+"""
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+from lxml import html as lxml_html
+
+from model_ML import scraper_model_ml
+
+ROLES = ("Title", "Kicker", "Image_URL")
+DEFAULT_RULES_FILE = os.path.join(scraper_model_ml.SCRIPT_DIR, 'selector_rules.json')
+RULES_FORMAT_VERSION = 1
+CONTAINER_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' contenedor_dato_modulo ')]"
+MIN_SUPPORT = 0.6 # Fracción de los bloques con el rol que debe compartir la ruta mayoritaria
+MIN_AGREEMENT = 0.9 # Fracción de las noticias del modelo que las reglas deben reproducir
+DEFAULT_CONFIDENCE_DROP = 0.1 # Caída tolerada de la tasa de noticias válidas antes de re-inducir
+FINGERPRINT_MIN_SHARE = 0.5 # Una ruta entra en la huella si aparece en esta fracción de contenedores
+
+
+def _step(tag, class_attribute):
+    """Paso de ruta 'tag.clase1.clase2' (clases ordenadas), igual para nodos de bs4 y de lxml."""
+    classes = class_attribute if isinstance(class_attribute, list) else (class_attribute or "").split()
+    return tag + "".join(f".{name}" for name in sorted(classes))
+
+
+def bs4_path(node, container):
+    """Ruta estructural de un nodo de BeautifulSoup desde su contenedor (lista de pasos)."""
+    steps = []
+    while node is not None and node is not container:
+        steps.append(_step(node.name, node.get('class')))
+        node = node.parent
+    return list(reversed(steps)) if node is container else None
+
+
+def _step_xpath(step):
+    tag, *classes = step.split(".")
+    if not classes:
+        return tag
+    conditions = " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes)
+    return f"{tag}[{conditions}]"
+
+
+def compile_path(steps):
+    """Compila una ruta de pasos a un XPath relativo al contenedor."""
+    return "./" + "/".join(_step_xpath(step) for step in steps) if steps else "."
+
+
+def layout_fingerprint(page_html):
+    """
+    Huella del layout: SHA-256 de las rutas estructurales presentes en al menos
+    FINGERPRINT_MIN_SHARE de los contenedores (sin textos, enlaces ni bloques esporádicos).
+
+    Returns:
+        str: Huella hexadecimal, o None si la página no tiene contenedores.
+    """
+    containers = lxml_html.fromstring(page_html).xpath(CONTAINER_XPATH)
+    if not containers:
+        return None
+    counts = Counter()
+    for container in containers:
+        paths = set()
+        for element in container.iterdescendants():
+            if not isinstance(element.tag, str): # Comentarios
+                continue
+            steps = []
+            node = element
+            while node is not container:
+                steps.append(_step(node.tag, node.get('class')))
+                node = node.getparent()
+            paths.add(" > ".join(reversed(steps)))
+        counts.update(paths)
+    frequent = sorted(path for path, count in counts.items() if count >= FINGERPRINT_MIN_SHARE * len(containers))
+    return hashlib.sha256("\n".join(frequent).encode('utf-8')).hexdigest()
+
+
+def _text(element):
+    """Equivalente de get_text(strip=True) de BeautifulSoup: fragmentos de texto sin espacios, unidos."""
+    return "".join(text.strip() for text in element.itertext() if text.strip())
+
+
+def _first(container, xpath):
+    found = container.xpath(xpath) if xpath else []
+    return found[0] if found else None
+
+
+def fields_from_rules(container, rules):
+    """
+    Campos de un contenedor (lxml) con las reglas, con la misma lógica que
+    scraper_model_ml.article_fields_from_predictions.
+    """
+    title_text, kicker_text, image_url, link_url = "N/A", "N/A", "N/A", "N/A"
+    title_node = _first(container, rules.get("Title", {}).get("xpath"))
+    kicker_node = _first(container, rules.get("Kicker", {}).get("xpath"))
+    image_node = _first(container, rules.get("Image_URL", {}).get("xpath"))
+    if image_node is not None and image_node.tag != 'img':
+        image_node = None
+
+    if title_node is not None:
+        title_text = _text(title_node)
+        if title_node.tag == 'a' and title_node.get('href') is not None:
+            link_url = urljoin(scraper_model_ml.BASE_URL, title_node.get('href'))
+    if kicker_node is not None:
+        kicker_text = _text(kicker_node) or "N/A"
+    if image_node is not None and image_node.get('src'):
+        image_url = urljoin(scraper_model_ml.BASE_URL, image_node.get('src'))
+    if link_url == "N/A" and image_node is not None:
+        parent = image_node.getparent()
+        if parent is not None and parent.tag == 'a' and parent.get('href') is not None:
+            link_url = urljoin(scraper_model_ml.BASE_URL, parent.get('href'))
+    return {"title": title_text, "kicker": kicker_text, "image_url": image_url, "link": link_url}
+
+
+def apply_rules(page_html, rules):
+    """
+    Extrae las noticias de una página solo con las reglas.
+
+    Returns:
+        tuple: (news_data, total_contenedores, tasa de contenedores con noticia válida).
+    """
+    containers = lxml_html.fromstring(page_html).xpath(CONTAINER_XPATH)
+    news_data = []
+    for container in containers:
+        article = fields_from_rules(container, rules)
+        if article["title"] != "N/A" and article["link"] != "N/A":
+            news_data.append(article)
+    return news_data, len(containers), (len(news_data) / len(containers) if containers else 0.0)
+
+
+def induce_rules(page_html, model_pipeline):
+    """
+    Ejecuta el modelo sobre la página y compila la ruta mayoritaria de cada rol.
+
+    Returns:
+        tuple: (reglas {rol: {'path', 'xpath', 'support'}}, noticias extraídas por el modelo).
+    """
+    containers, predictions_by_block = scraper_model_ml.predict_page_batched(page_html, model_pipeline, return_containers=True)
+    paths = {role: Counter() for role in ROLES}
+    model_articles = []
+    for container, predictions in zip(containers, predictions_by_block):
+        if not predictions:
+            continue
+        for role in ROLES:
+            node = next((node for node, predicted in predictions
+                         if predicted == role and (role != 'Image_URL' or node.name == 'img')), None)
+            if node is not None:
+                path = bs4_path(node, container)
+                if path is not None:
+                    paths[role][tuple(path)] += 1
+        fields = scraper_model_ml.article_fields_from_predictions(predictions)
+        if fields["title"] != "N/A" and fields["link"] != "N/A":
+            model_articles.append(fields)
+
+    rules = {}
+    for role, counter in paths.items():
+        if not counter:
+            continue
+        path, count = counter.most_common(1)[0]
+        support = count / sum(counter.values())
+        if support >= MIN_SUPPORT:
+            rules[role] = {"path": list(path), "xpath": compile_path(list(path)), "support": round(support, 4)}
+    return rules, model_articles
+
+
+class InducedExtractor:
+    """Extracción con reglas inducidas, que recurre al modelo solo cuando hace falta (ver el docstring del módulo)."""
+
+    def __init__(self, model_pipeline, rules_path=DEFAULT_RULES_FILE, confidence_drop=DEFAULT_CONFIDENCE_DROP):
+        self.model_pipeline = model_pipeline
+        self.rules_path = rules_path
+        self.confidence_drop = confidence_drop
+        self.rule_set = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.rules_path):
+            return None
+        try:
+            with open(self.rules_path, 'r', encoding='utf-8') as f:
+                rule_set = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"No se pudieron leer las reglas de '{self.rules_path}': {e}")
+            return None
+        return rule_set if rule_set.get("format_version") == RULES_FORMAT_VERSION else None
+
+    def _save(self, rule_set):
+        temporary_path = self.rules_path + ".tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(rule_set, f, indent=2, ensure_ascii=False)
+        os.replace(temporary_path, self.rules_path)
+
+    def extract(self, page_html):
+        """
+        Noticias de la página: con las reglas si siguen valiendo y, si no, con el modelo
+        (re-induciendo y guardando las reglas).
+
+        Returns:
+            tuple: (news_data, origen): origen es 'rules' o 'model'.
+        """
+        fingerprint = layout_fingerprint(page_html)
+        if fingerprint is None:
+            print("No se encontraron contenedores de noticias.")
+            return [], "rules"
+        if self.rule_set is not None and self.rule_set["fingerprint"] == fingerprint:
+            news_data, total, valid_rate = apply_rules(page_html, self.rule_set["rules"])
+            threshold = self.rule_set["valid_rate"] - self.confidence_drop
+            if valid_rate >= threshold:
+                print(f"Reglas inducidas aplicadas: {len(news_data)} de {total} contenedores con noticia (sin inferencia).")
+                return news_data, "rules"
+            print(f"La tasa de noticias válidas con las reglas bajó a {valid_rate:.1%} (mínimo {threshold:.1%}). Se re-ejecuta el modelo.")
+        elif self.rule_set is not None:
+            print("La huella del layout cambió. Se re-ejecuta el modelo y se regeneran las reglas.")
+        else:
+            print(f"No hay reglas inducidas en '{self.rules_path}'. Se ejecuta el modelo para generarlas.")
+        return self._induce(page_html, fingerprint), "model"
+
+    def _induce(self, page_html, fingerprint):
+        rules, model_articles = induce_rules(page_html, self.model_pipeline)
+        rule_articles, total, valid_rate = apply_rules(page_html, rules)
+        reproduced = {tuple(article.values()) for article in rule_articles}
+        agreement = sum(tuple(article.values()) in reproduced for article in model_articles) / len(model_articles) if model_articles else 0.0
+        print(f"Reglas inducidas para {sorted(rules)}: reproducen {agreement:.1%} de las {len(model_articles)} noticias del modelo.")
+        if agreement >= MIN_AGREEMENT:
+            self.rule_set = {
+                "format_version": RULES_FORMAT_VERSION,
+                "fingerprint": fingerprint,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "valid_rate": round(valid_rate, 4),
+                "agreement": round(agreement, 4),
+                "containers": total,
+                "rules": rules,
+            }
+            self._save(self.rule_set)
+            print(f"Reglas guardadas en '{self.rules_path}'.")
+        else:
+            print(f"Las reglas no alcanzan el {MIN_AGREEMENT:.0%} de coincidencia con el modelo: no se guardan.")
+        return model_articles
@@ -0,0 +1,238 @@
+"""
+Almacén de bloques HTML para entrenamiento: un archivo de datos con un frame zstd por
+bloque, solo de escritura al final, y un índice JSON Lines con el desplazamiento de cada uno.
+
+Estructura de '<store_dir>/':
+
+* blocks.zst: frames zstd concatenados (cada bloque se puede leer por separado con su
+  desplazamiento y longitud).
+* index.jsonl: una línea por bloque con 'hash' (SHA-256 del HTML), 'offset', 'length',
+  'dict_id' (0 = sin diccionario), 'collected_at' y, si se conoce, 'url'.
+* store.json: versión del formato y diccionario zstd activo.
+* dict_<id>.zdict: diccionarios entrenados con train_dictionary(). Los bloques son pequeños
+  (~1 KB) y muy parecidos, así que con diccionario ocupan unas 3 veces menos.
+
+Los bloques se deduplican por hash del contenido. Cada frame se escribe antes que su línea
+del índice: si el proceso se interrumpe, al abrir el almacén se descarta el frame sin
+indexar o la línea incompleta. Se asume un solo proceso escritor a la vez; los lectores
+(read_only=True) ignoran lo incompleto sin modificar los archivos.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import zstandard
+
+FORMAT_VERSION = 1
+DATA_FILE = "blocks.zst"
+INDEX_FILE = "index.jsonl"
+METADATA_FILE = "store.json"
+DEFAULT_COMPRESSION_LEVEL = 10
+DEFAULT_DICT_SIZE = 16 * 1024
+DEFAULT_DICT_SAMPLES = 5000 # Bloques más recientes usados para entrenar el diccionario
+
+
+def content_hash(html_content):
+    """SHA-256 (hex) del HTML en UTF-8: identifica el bloque en el almacén y en labels.json."""
+    return hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+
+class BlockStore:
+    """Almacén comprimido y deduplicado de bloques HTML (ver el docstring del módulo)."""
+
+    def __init__(self, store_dir, compression_level=DEFAULT_COMPRESSION_LEVEL, read_only=False):
+        self.store_dir = store_dir
+        self.read_only = read_only
+        self.compression_level = compression_level
+        self.data_path = os.path.join(store_dir, DATA_FILE)
+        self.index_path = os.path.join(store_dir, INDEX_FILE)
+        self.metadata_path = os.path.join(store_dir, METADATA_FILE)
+        if read_only and not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"No existe el almacén de bloques '{store_dir}'.")
+        os.makedirs(store_dir, exist_ok=True)
+
+        self.metadata = {"format_version": FORMAT_VERSION, "active_dict_id": 0}
+        if os.path.exists(self.metadata_path):
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                self.metadata = json.load(f)
+            if self.metadata.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Versión de almacén no soportada: {self.metadata.get('format_version')}")
+
+        self._entries = [] # En orden de escritura (= orden de desplazamiento)
+        self._by_hash = {}
+        self._dictionaries = {}
+        self._compressors = {}
+        self._decompressors = {}
+        self._recover()
+        self._data_file = self._index_file = None
+        if not read_only:
+            self._data_file = open(self.data_path, 'ab')
+            self._index_file = open(self.index_path, 'a', encoding='utf-8')
+
+    # --- Apertura y recuperación ---
+
+    def _recover(self):
+        """Carga el índice y descarta lo escrito a medias por una ejecución interrumpida."""
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        valid_index_bytes = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break # Línea incompleta
+                    entry = json.loads(line)
+                    if entry["offset"] + entry["length"] > data_size:
+                        break # Índice por delante de los datos
+                    valid_index_bytes += len(line)
+                    self._entries.append(entry)
+                    self._by_hash[entry["hash"]] = entry
+            if valid_index_bytes < os.path.getsize(self.index_path) and not self.read_only:
+                print(f"Almacén '{self.store_dir}': se descarta el final incompleto del índice.")
+                os.truncate(self.index_path, valid_index_bytes)
+
+        indexed_size = self._entries[-1]["offset"] + self._entries[-1]["length"] if self._entries else 0
+        if data_size > indexed_size and not self.read_only:
+            print(f"Almacén '{self.store_dir}': se descartan {data_size - indexed_size} bytes sin indexar.")
+            os.truncate(self.data_path, indexed_size)
+
+    def close(self):
+        for handle in (self._data_file, self._index_file):
+            if handle is None or handle.closed:
+                continue
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # --- Diccionarios zstd ---
+
+    def _dictionary(self, dict_id):
+        if dict_id not in self._dictionaries:
+            with open(os.path.join(self.store_dir, f"dict_{dict_id}.zdict"), 'rb') as f:
+                self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(f.read())
+        return self._dictionaries[dict_id]
+
+    def _compressor(self, dict_id):
+        if dict_id not in self._compressors:
+            kwargs = {"dict_data": self._dictionary(dict_id)} if dict_id else {}
+            self._compressors[dict_id] = zstandard.ZstdCompressor(level=self.compression_level, **kwargs)
+        return self._compressors[dict_id]
+
+    def _decompressor(self, dict_id):
+        if dict_id not in self._decompressors:
+            kwargs = {"dict_data": self._dictionary(dict_id)} if dict_id else {}
+            self._decompressors[dict_id] = zstandard.ZstdDecompressor(**kwargs)
+        return self._decompressors[dict_id]
+
+    def train_dictionary(self, dict_size=DEFAULT_DICT_SIZE, max_samples=DEFAULT_DICT_SAMPLES):
+        """
+        Entrena un diccionario zstd con los bloques más recientes y lo activa para los nuevos.
+
+        Los bloques ya guardados no se recomprimen: cada uno recuerda su 'dict_id'.
+
+        Returns:
+            int: Id del diccionario activado.
+        """
+        with open(self.data_path, 'rb') as data_file:
+            samples = [self._read(entry, data_file).encode('utf-8') for entry in self._entries[-max_samples:]]
+        dictionary = zstandard.train_dictionary(dict_size, samples, level=self.compression_level)
+        dict_id = dictionary.dict_id()
+        dictionary_path = os.path.join(self.store_dir, f"dict_{dict_id}.zdict")
+        with open(dictionary_path + ".tmp", 'wb') as f:
+            f.write(dictionary.as_bytes())
+        os.replace(dictionary_path + ".tmp", dictionary_path)
+        self._dictionaries[dict_id] = dictionary
+        self.metadata["active_dict_id"] = dict_id
+        self._save_metadata()
+        print(f"Diccionario zstd {dict_id} ({len(dictionary.as_bytes())} bytes) entrenado con {len(samples)} bloques.")
+        return dict_id
+
+    def _save_metadata(self):
+        with open(self.metadata_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, indent=2)
+        os.replace(self.metadata_path + ".tmp", self.metadata_path)
+
+    # --- Escritura y lectura ---
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, block_hash):
+        return block_hash in self._by_hash
+
+    def add(self, html_content, url=None, collected_at=None):
+        """
+        Añade un bloque si su contenido no está ya en el almacén.
+
+        Returns:
+            tuple: (hash del bloque, True si se añadió o False si ya existía).
+        """
+        if self.read_only:
+            raise PermissionError(f"El almacén '{self.store_dir}' está abierto en solo lectura.")
+        block_hash = content_hash(html_content)
+        if block_hash in self._by_hash:
+            return block_hash, False
+
+        dict_id = self.metadata.get("active_dict_id", 0)
+        frame = self._compressor(dict_id).compress(html_content.encode('utf-8'))
+        offset = self._data_file.tell()
+        self._data_file.write(frame)
+        self._data_file.flush() # El frame llega al archivo antes que su línea del índice
+
+        entry = {
+            "hash": block_hash,
+            "offset": offset,
+            "length": len(frame),
+            "dict_id": dict_id,
+            "collected_at": collected_at or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        if url:
+            entry["url"] = url
+        self._index_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._index_file.flush()
+        self._entries.append(entry)
+        self._by_hash[block_hash] = entry
+        return block_hash, True
+
+    def _read(self, entry, data_file=None):
+        if data_file is None:
+            with open(self.data_path, 'rb') as f:
+                return self._read(entry, f)
+        data_file.seek(entry["offset"])
+        frame = data_file.read(entry["length"])
+        return self._decompressor(entry["dict_id"]).decompress(frame).decode('utf-8')
+
+    def get(self, block_hash):
+        """HTML de un bloque por su hash (KeyError si no existe)."""
+        return self._read(self._by_hash[block_hash])
+
+    def entries(self):
+        """Entradas del índice en orden de escritura."""
+        return list(self._entries)
+
+    def iter_blocks(self, hashes=None):
+        """
+        Recorre los bloques leyendo el archivo de datos de forma secuencial.
+
+        Args:
+            hashes (set): Si se indica, solo se devuelven esos bloques.
+
+        Yields:
+            tuple: (entrada del índice, HTML del bloque).
+        """
+        if self._data_file is not None:
+            self._data_file.flush()
+        with open(self.data_path, 'rb') as data_file:
+            for entry in self._entries:
+                if hashes is None or entry["hash"] in hashes:
+                    yield entry, self._read(entry, data_file)
+
+    def stats(self):
+        """Número de bloques y tamaño en disco del archivo de datos."""
+        return {"blocks": len(self._entries), "data_bytes": os.path.getsize(self.data_path)}
@@ -0,0 +1,145 @@
+"""
+Verifica que el extractor de model_ML/features.py produce exactamente las mismas
+características que la implementación original (un diccionario por nodo, get_text y
+word_tokenize por nodo, profundidad con node.parents) sobre los bloques HTML guardados.
+
+La implementación original se conserva aquí solo como referencia. Compara, para cada
+archivo de training_data/html_blocks, el DataFrame de referencia con el del FeatureBuffer
+(valores, tipos y orden de columnas) y muestra el tiempo de cada implementación.
+También comprueba que train_model.generate_stable_xpaths (un recorrido por bloque)
+devuelve los mismos XPaths que generate_stable_xpath nodo a nodo.
+Termina con código 1 si hay diferencias.
+
+Uso:
+    python model_ML/training_model/check_feature_parity.py
+"""
+import os
+import sys
+import time
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+for path in (PROJECT_ROOT, SCRIPT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import train_model # Verifica los datos de NLTK
+from nltk.tokenize import word_tokenize
+from model_ML import features
+
+
+# --- Implementación de referencia (original, un diccionario por nodo) ---
+
+def get_clean_text(node):
+    return node.get_text(strip=True) if node else ""
+
+def calculate_uppercase_ratio(text):
+    try:
+        words = word_tokenize(text)
+    except Exception:
+        return 0.0
+    if not words:
+        return 0.0
+    uppercase_words = [w for w in words if w.isupper() and len(w) > 1]
+    return len(uppercase_words) / len(words)
+
+def calculate_stopword_ratio(text):
+    try:
+        words = word_tokenize(text.lower())
+    except Exception:
+        return 0.0
+    if not words:
+        return 0.0
+    stopwords = features.get_stopwords()
+    return sum(1 for w in words if w in stopwords) / len(words)
+
+def reference_features(node):
+    feature_row = {}
+    text = get_clean_text(node)
+    parent_node = node.parent if node and hasattr(node, 'parent') and node.parent and node.parent.name != '[document]' else None
+    class_list_str = " ".join(node.get('class', [])).lower() if node else ""
+    feature_row['tag_name'] = node.name if node else 'None'
+    feature_row['num_children'] = len(node.find_all(recursive=False)) if node else 0
+    feature_row['parent_tag'] = parent_node.name if parent_node else 'None'
+    feature_row['has_href'] = 1 if node and node.has_attr('href') else 0
+    feature_row['has_src'] = 1 if node and node.has_attr('src') else 0
+    feature_row['text_length'] = len(text)
+    feature_row['word_count'] = len(word_tokenize(text)) if text else 0
+    feature_row['uppercase_ratio'] = calculate_uppercase_ratio(text) if text else 0.0
+    feature_row['stopword_ratio'] = calculate_stopword_ratio(text) if text else 0.0
+    feature_row['depth'] = len(list(node.parents)) if node and hasattr(node, 'parents') else 0
+    feature_row['is_h2'] = 1 if node and node.name == 'h2' else 0
+    feature_row['is_div'] = 1 if node and node.name == 'div' else 0
+    feature_row['is_a'] = 1 if node and node.name == 'a' else 0
+    feature_row['is_img'] = 1 if node and node.name == 'img' else 0
+    feature_row['class_contains_title'] = 1 if 'title' in class_list_str or 'titulo' in class_list_str else 0
+    feature_row['class_contains_kicker'] = 1 if 'kicker' in class_list_str or 'volanta' in class_list_str else 0
+    feature_row['class_contains_image'] = 1 if 'image' in class_list_str or 'imagen' in class_list_str else 0
+    return feature_row
+
+
+# --- Comparación ---
+
+def load_blocks(html_dir):
+    """Devuelve [(nombre, html)] de los bloques guardados, en orden de nombre."""
+    blocks = []
+    for filename in sorted(os.listdir(html_dir)):
+        if filename.endswith(".html"):
+            with open(os.path.join(html_dir, filename), 'r', encoding='utf-8') as f:
+                blocks.append((filename, f.read()))
+    return blocks
+
+
+# Raíz del bloque tal como la toman train_model.py y scraper_model_ml.py
+block_root = train_model.block_root
+
+
+if __name__ == "__main__":
+    blocks = load_blocks(train_model.HTML_DIR)
+    if not blocks:
+        print(f"No hay bloques HTML en '{train_model.HTML_DIR}'.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    reference = []
+    for _, html_content in blocks:
+        rows = [reference_features(node) for node in block_root(html_content).find_all(True, recursive=True)]
+        reference.append(pd.DataFrame(rows, columns=features.FEATURE_COLUMNS))
+    reference_seconds = time.perf_counter() - start
+
+    token_stats = features.TokenStats()
+    start = time.perf_counter()
+    single_pass = []
+    for _, html_content in blocks:
+        buffer = features.FeatureBuffer()
+        features.extract_subtree_features(block_root(html_content), buffer=buffer, token_stats=token_stats)
+        single_pass.append(buffer.to_frame(range(1, len(buffer)))) # Sin la raíz, como find_all
+    single_pass_seconds = time.perf_counter() - start
+
+    mismatches = 0
+    total_nodes = 0
+    for (filename, _), expected, actual in zip(blocks, reference, single_pass):
+        total_nodes += len(expected)
+        try:
+            pd.testing.assert_frame_equal(expected, actual, check_exact=True)
+        except AssertionError as e:
+            mismatches += 1
+            print(f"DIFERENCIA en {filename}: {e}")
+
+    xpath_mismatches = 0
+    for filename, html_content in blocks:
+        root = block_root(html_content)
+        xpaths = train_model.generate_stable_xpaths(root)
+        for node in [root] + root.find_all(True):
+            if xpaths[id(node)] != train_model.generate_stable_xpath(node):
+                xpath_mismatches += 1
+                print(f"DIFERENCIA de XPath en {filename}: {train_model.generate_stable_xpath(node)} != {xpaths[id(node)]}")
+
+    print(f"{len(blocks)} bloques, {total_nodes} nodos.")
+    print(f"Extractor original: {reference_seconds:.2f} s | Extractor de una pasada: {single_pass_seconds:.2f} s "
+          f"(x{reference_seconds / single_pass_seconds:.1f})")
+    if mismatches or xpath_mismatches:
+        print(f"{mismatches} bloques con diferencias de características y {xpath_mismatches} XPaths distintos.")
+        sys.exit(1)
+    print(f"Características idénticas en todos los bloques (esquema v{features.FEATURE_SCHEMA_VERSION}) y mismos XPaths.")
\ No newline at end of file
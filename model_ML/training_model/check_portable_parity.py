@@ -0,0 +1,74 @@
+"""
+Verifica que la exportación portable del modelo (model_ML/portable_model.py) predice
+exactamente lo mismo que el pipeline de sklearn guardado en el .pkl.
+
+Extrae las características de todos los nodos de training_data/html_blocks, compara
+etiquetas y probabilidades (igualdad exacta) y muestra los tiempos de carga y de
+predicción de ambos formatos. Termina con código 1 si hay diferencias.
+
+Uso:
+    python model_ML/training_model/check_portable_parity.py [ruta/al/modelo.pkl]
+
+Por defecto usa el modelo de model_ML/ (el que carga scraper_model_ml.py).
+"""
+import os
+import sys
+import time
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+for path in (PROJECT_ROOT, SCRIPT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import train_model # Verifica los datos de NLTK
+from check_feature_parity import load_blocks, block_root
+from model_ML import features, portable_model
+
+
+if __name__ == "__main__":
+    model_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(PROJECT_ROOT, 'model_ML', 'extractor_model.pkl')
+    portable_dir = portable_model.portable_path_for(model_file)
+    if not os.path.exists(os.path.join(portable_dir, portable_model.MANIFEST_FILE)):
+        print(f"No existe la exportación portable '{portable_dir}'. Genérala con: python model_ML/portable_model.py {model_file}")
+        sys.exit(1)
+    blocks = load_blocks(train_model.HTML_DIR)
+    if not blocks:
+        print(f"No hay bloques HTML en '{train_model.HTML_DIR}'.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    pipeline = features.load_model(model_file, prefer_portable=False)
+    pickle_load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    portable = features.load_model(model_file)
+    portable_load_seconds = time.perf_counter() - start
+
+    buffer = features.FeatureBuffer()
+    token_stats = features.TokenStats()
+    rows = []
+    for _, html_content in blocks:
+        _, _, first_row = features.extract_subtree_features(block_root(html_content), buffer=buffer, token_stats=token_stats)
+        rows.extend(range(first_row + 1, len(buffer))) # Sin la raíz, como find_all
+    X = buffer.to_frame(rows)
+
+    start = time.perf_counter()
+    expected = pipeline.predict_proba(X)
+    pickle_predict_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = portable.predict_proba(X)
+    portable_predict_seconds = time.perf_counter() - start
+
+    expected_labels = pipeline.classes_.take(np.argmax(expected, axis=1))
+    actual_labels = portable.predict(X)
+    label_mismatches = int(np.count_nonzero(expected_labels != actual_labels))
+    proba_mismatches = int(np.count_nonzero((expected != actual).any(axis=1)))
+
+    print(f"{len(blocks)} bloques, {len(X)} nodos.")
+    print(f"Carga: .pkl {pickle_load_seconds * 1000:.1f} ms | portable {portable_load_seconds * 1000:.1f} ms")
+    print(f"Predicción: sklearn {pickle_predict_seconds * 1000:.1f} ms | portable {portable_predict_seconds * 1000:.1f} ms")
+    if label_mismatches or proba_mismatches:
+        print(f"DIFERENCIAS: {label_mismatches} etiquetas y {proba_mismatches} filas de probabilidades distintas.")
+        sys.exit(1)
+    print("Etiquetas y probabilidades idénticas en todos los nodos.")
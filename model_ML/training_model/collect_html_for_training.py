@@ -1,43 +1,50 @@
-import time
+"""
+Recolecta bloques HTML de noticias para entrenar el extractor.
+
+* Modo por defecto: abre TARGET_URL con Selenium y guarda hasta MAX_BLOCKS_TO_SAVE bloques
+  como archivos block_N.html en OUTPUT_DIR (sobrescribe los de ejecuciones anteriores).
+* Modo almacén (--store DIR): recorre por HTTP muchas páginas de listado y fechas con el
+  crawler y guarda cada contenedor en un BlockStore (block_store.py), deduplicado por hash
+  del contenido y comprimido con zstd. Las ejecuciones sucesivas solo añaden bloques nuevos.
+
+Ejemplos:
+    python collect_html_for_training.py
+    python collect_html_for_training.py --store training_data/block_store --pages 20 \\
+        --page-url-template "{seed}?page={page}" https://www.yogonet.com/international/
+    python collect_html_for_training.py --store training_data/block_store \\
+        --dates 2024-01-01:2024-03-31 "https://www.yogonet.com/international/archive/{date}"
+    python collect_html_for_training.py --store training_data/block_store --import-dir training_data/html_blocks
+    python collect_html_for_training.py --store training_data/block_store --export-dir /tmp/to_label --limit 200
+"""
+import argparse
+import glob
 import os
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import sys
+from datetime import date, timedelta
+
+# Permite importar 'modules' (pool de navegadores compartido) al ejecutar el script directamente
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 # --- CONFIGURACIÓN ---
 TARGET_URL = "https://www.yogonet.com/international/"
 NEWS_CONTAINER_SELECTOR = "div.contenedor_dato_modulo" # Selector inicial para los bloques
 OUTPUT_DIR = "training_data/html_blocks" # Directorio para guardar los HTML
 MAX_BLOCKS_TO_SAVE = 50 # Limita cuántos bloques guardar para empezar
+DICTIONARY_MIN_BLOCKS = 1000 # Bloques mínimos para que --train-dictionary tenga sentido
+
+def collect_html_blocks(driver, url, output_dir, max_blocks, readiness=None):
+    """
+    Navega, extrae y guarda los bloques HTML de noticias.
+    El driver no se cierra aquí: su ciclo de vida lo gestiona quien lo creó (p. ej. el BrowserPool).
+    """
+    from selenium.webdriver.common.by import By
+    from modules.page_readiness import PageReadiness
 
-def setup_driver():
-    """Configura e inicia el WebDriver de Selenium."""
-    print("Configurando WebDriver...")
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("window-size=1920x1080")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    try:
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("WebDriver iniciado.")
-        return driver
-    except Exception as e:
-        print(f"Error al iniciar WebDriver: {e}")
-        return None
-
-def collect_html_blocks(driver, url, output_dir, max_blocks):
-    """Navega, extrae y guarda los bloques HTML de noticias."""
     print(f"Navegando a {url}...")
     driver.get(url)
-    wait = WebDriverWait(driver, 20)
+    readiness = readiness or PageReadiness()
     saved_count = 0
 
     # Crear directorio de salida si no existe
@@ -47,7 +54,7 @@ def collect_html_blocks(driver, url, output_dir, max_blocks):
 
     try:
         print(f"Esperando los contenedores de noticias ({NEWS_CONTAINER_SELECTOR})...")
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, NEWS_CONTAINER_SELECTOR)))
+        readiness.wait(driver, NEWS_CONTAINER_SELECTOR)
         news_elements_selenium = driver.find_elements(By.CSS_SELECTOR, NEWS_CONTAINER_SELECTOR)
         print(f"Se encontraron {len(news_elements_selenium)} contenedores.")
 
@@ -74,25 +81,133 @@ def collect_html_blocks(driver, url, output_dir, max_blocks):
         print("Timeout esperando los elementos.")
     except Exception as e_outer:
         print(f"Error general durante la recolección: {e_outer}")
-    finally:
-        print("Cerrando WebDriver.")
-        if driver:
-            driver.quit()
 
     print(f"\nRecolección finalizada. Se guardaron {saved_count} bloques HTML.")
     return saved_count
 
+def expand_date_seeds(seed_urls, date_range, date_format):
+    """
+    Expande las semillas con '{date}' a una URL por día del rango 'AAAA-MM-DD:AAAA-MM-DD'.
+    Las semillas sin '{date}' se devuelven tal cual.
+    """
+    if not date_range:
+        return list(seed_urls)
+    first, last = (date.fromisoformat(value) for value in date_range.split(":"))
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    expanded = []
+    for seed_url in seed_urls:
+        if "{date}" in seed_url:
+            expanded.extend(seed_url.replace("{date}", day.strftime(date_format)) for day in days)
+        else:
+            expanded.append(seed_url)
+    return expanded
+
+
+def extract_container_blocks(page_html, page_url):
+    """Devuelve el HTML de cada contenedor de noticia de la página (mismo XPath que el scraper)."""
+    from lxml import html as lxml_html
+    import modules.scraper as scraper
+
+    document = lxml_html.fromstring(page_html)
+    return [lxml_html.tostring(container, encoding='unicode').strip() for container in document.xpath(scraper.NEWS_CONTAINER_XPATH)]
+
+
+def collect_into_store(store, seed_urls, max_pages, page_url_template, max_workers, delay):
+    """
+    Recorre las páginas con el crawler y añade sus bloques al almacén.
+
+    Returns:
+        tuple: (bloques encontrados, bloques nuevos).
+    """
+    import modules.crawler as crawler
+
+    found = added = 0
+    for page_url, blocks in crawler.iter_pages(
+        seed_urls, extract_container_blocks, max_pages=max_pages, page_url_template=page_url_template,
+        max_workers=max_workers, delay=delay,
+    ):
+        page_added = sum(store.add(block, url=page_url)[1] for block in blocks)
+        found += len(blocks)
+        added += page_added
+        print(f"{page_url}: {len(blocks)} bloques, {page_added} nuevos.")
+    return found, added
+
+
+def import_directory(store, directory):
+    """Migra al almacén los archivos .html de un directorio (p. ej. el OUTPUT_DIR clásico)."""
+    found = added = 0
+    for file_path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            found += 1
+            added += store.add(f.read(), url=os.path.basename(file_path))[1]
+    return found, added
+
+
+def export_blocks(store, directory, limit=None):
+    """Escribe bloques del almacén como '<hash>.html' para etiquetarlos (la clave en labels.json es el nombre)."""
+    os.makedirs(directory, exist_ok=True)
+    exported = 0
+    for entry, html_content in store.iter_blocks():
+        if limit is not None and exported >= limit:
+            break
+        with open(os.path.join(directory, f"{entry['hash']}.html"), 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        exported += 1
+    return exported
+
+
 # --- SCRIPT PRINCIPAL ---
 if __name__ == "__main__":
-    print("Iniciando script de recolección de HTML para entrenamiento...")
+    parser = argparse.ArgumentParser(description="Recolecta bloques HTML de noticias para entrenar el extractor.")
+    parser.add_argument("seeds", nargs="*", default=[TARGET_URL], help="URLs de listado (modo --store). Admiten '{date}' con --dates.")
+    parser.add_argument("--store", default=None, help="Directorio del almacén de bloques. Sin él se usa el modo Selenium clásico.")
+    parser.add_argument("--pages", type=int, default=1, help="Páginas por semilla.")
+    parser.add_argument("--page-url-template", default=None, help="Plantilla de paginación, p. ej. '{seed}?page={page}'. Sin ella se sigue el enlace 'siguiente'.")
+    parser.add_argument("--dates", default=None, help="Rango AAAA-MM-DD:AAAA-MM-DD para expandir '{date}' en las semillas.")
+    parser.add_argument("--date-format", default="%Y-%m-%d", help="Formato de '{date}' en las URLs.")
+    parser.add_argument("--workers", type=int, default=4, help="Descargas simultáneas.")
+    parser.add_argument("--delay", type=float, default=1.0, help="Segundos mínimos entre peticiones al mismo host.")
+    parser.add_argument("--import-dir", default=None, help="Importa al almacén los .html de este directorio (no descarga nada).")
+    parser.add_argument("--export-dir", default=None, help="Escribe los bloques del almacén como '<hash>.html' en este directorio (no descarga nada).")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de bloques a exportar con --export-dir.")
+    parser.add_argument("--train-dictionary", action="store_true", help="Entrena un diccionario zstd con los bloques guardados para comprimir mejor los siguientes.")
+    args = parser.parse_args()
+
+    if args.store is None:
+        from modules.browser_pool import BrowserPool
+
+        print("Iniciando script de recolección de HTML para entrenamiento...")
+        print("Configurando WebDriver...")
+        with BrowserPool(size=1) as pool, pool.session() as driver:
+            if not driver:
+                exit()
+
+            num_saved = collect_html_blocks(driver, TARGET_URL, OUTPUT_DIR, MAX_BLOCKS_TO_SAVE, pool.readiness)
+
+        if num_saved > 0:
+            print(f"\nArchivos HTML guardados en la carpeta: '{OUTPUT_DIR}'")
+        else:
+            print("\nNo se guardaron archivos HTML. Revisa posibles errores.")
+        sys.exit(0)
 
-    driver = setup_driver()
-    if not driver:
-        exit()
+    from block_store import BlockStore
 
-    num_saved = collect_html_blocks(driver, TARGET_URL, OUTPUT_DIR, MAX_BLOCKS_TO_SAVE)
+    with BlockStore(args.store) as store:
+        if args.export_dir:
+            exported = export_blocks(store, args.export_dir, args.limit)
+            print(f"{exported} bloques exportados en '{args.export_dir}'.")
+            sys.exit(0)
+        if args.import_dir:
+            found, added = import_directory(store, args.import_dir)
+        else:
+            seed_urls = expand_date_seeds(args.seeds, args.dates, args.date_format)
+            found, added = collect_into_store(store, seed_urls, args.pages, args.page_url_template, args.workers, args.delay)
+        print(f"\n{found} bloques encontrados: {added} nuevos, {found - added} duplicados. El almacén tiene {len(store)} bloques.")
 
-    if num_saved > 0:
-        print(f"\nArchivos HTML guardados en la carpeta: '{OUTPUT_DIR}'")
-    else:
-        print("\nNo se guardaron archivos HTML. Revisa posibles errores.")
\ No newline at end of file
+        if args.train_dictionary:
+            if len(store) < DICTIONARY_MIN_BLOCKS:
+                print(f"Se necesitan al menos {DICTIONARY_MIN_BLOCKS} bloques para entrenar el diccionario (hay {len(store)}).")
+            else:
+                store.train_dictionary()
+        stats = store.stats()
+        print(f"Datos comprimidos: {stats['data_bytes'] / 1024:.1f} KB en '{args.store}'.")
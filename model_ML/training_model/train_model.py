@@ -1,76 +1,76 @@
 import os
+import sys
 import json
+import argparse
+import hashlib
+import itertools
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
+from bs4.element import Tag
 import nltk
 import joblib
 import re
 import traceback
 
 
-# --- Forzar descarga/verificación de NLTK 'stopwords' ---
-try:
-    print("Verificando/Descargando recurso NLTK 'stopwords'...")
-    nltk.data.find('corpora/stopwords')
-    print("Recurso 'stopwords' encontrado.")
-except LookupError:
-    print("Recurso 'stopwords' no encontrado. Descargando...")
+# Permite importar 'model_ML.features' al ejecutar el script directamente
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from model_ML import features, portable_model
+
+# --- Verificar/Descargar los datos de NLTK del extractor (solo en entrenamiento; el scraper no descarga) ---
+print("Verificando recursos NLTK...")
+missing_resources = features.missing_nltk_resources()
+if missing_resources:
+    print(f"Recursos NLTK no encontrados: {missing_resources}. Descargando...")
     try:
-        nltk.download('stopwords', quiet=False)
-        print("Descarga de 'stopwords' completada.")
-        nltk.data.find('corpora/stopwords') # Verificar de nuevo
+        for resource_name in missing_resources:
+            nltk.download(resource_name, quiet=False)
+        features.check_nltk_data() # Verificar de nuevo
+        print("Descarga de recursos NLTK completada.")
     except Exception as e_download:
-         print(f"\nError durante la descarga de NLTK 'stopwords': {e_download}")
+         print(f"\nError durante la descarga de recursos NLTK: {e_download}")
          exit()
-
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+else:
+    print("Recursos NLTK encontrados.")
 
 # --- Machine Learning Imports ---
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, RandomizedSearchCV, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline 
 from sklearn.metrics import classification_report
 from sklearn.exceptions import NotFittedError
+from sklearn.base import clone
 
 # --- Configuración (con rutas relativas al script) ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 HTML_DIR = os.path.join(SCRIPT_DIR, "training_data", "html_blocks")
 LABELS_FILE = os.path.join(SCRIPT_DIR, "labels.json")
 MODEL_OUTPUT_FILE = os.path.join(SCRIPT_DIR, "extractor_model.pkl")
-
-# Carga las stopwords (después de asegurar que existen)
-STOPWORDS = set(stopwords.words('english'))
+# Cache de características por bloque, indexado por el hash del HTML: los bloques sin cambios no se re-extraen
+FEATURE_CACHE_DIR = os.path.join(SCRIPT_DIR, "feature_cache")
+FEATURE_CACHE_VERSION = 1 # Subir si cambia lo que se guarda por bloque (p. ej. el cálculo del XPath)
+STREAM_BATCH_SIZE = 2000 # Bloques en vuelo como máximo al extraer en el pool
+
+# Espacio de la búsqueda de hiperparámetros opcional (--search)
+SEARCH_SPACE = {
+    'preprocessor__num__scaler': [StandardScaler(), 'passthrough'],
+    'classifier__n_estimators': [100, 150, 300],
+    'classifier__max_depth': [15, 25, None],
+    'classifier__min_samples_leaf': [1, 2, 4],
+    'classifier__max_features': ['sqrt', 'log2'],
+    'classifier__class_weight': ['balanced', 'balanced_subsample'],
+}
 
 # --- Funciones de Extracción de Características ---
-
-def get_clean_text(node):
-    """Obtiene texto limpio de un nodo BeautifulSoup."""
-    return node.get_text(strip=True) if node else ""
-
-def calculate_uppercase_ratio(text):
-    """Calcula la proporción de palabras en mayúsculas."""
-    try:
-        words = word_tokenize(text)
-    except Exception as e_tok:
-        return 0.0
-    if not words:
-        return 0.0
-    uppercase_words = [w for w in words if w.isupper() and len(w) > 1]
-    return len(uppercase_words) / len(words)
-
-def calculate_stopword_ratio(text):
-    """Calcula la proporción de stopwords."""
-    try:
-        words = word_tokenize(text.lower())
-    except Exception as e_tok:
-        return 0.0
-    if not words:
-        return 0.0
-    stopword_count = sum(1 for w in words if w in STOPWORDS)
-    return stopword_count / len(words)
+# Las características se definen una sola vez en model_ML/features.py (FEATURE_SPEC)
 
 def generate_stable_xpath(node):
     """Genera un XPath posicional simple."""
@@ -93,38 +93,271 @@ def generate_stable_xpath(node):
     return "/" + "/".join(reversed(path)) if path else ""
 
 
-def extract_features_for_training(node, soup):
-    """Extrae un DICCIONARIO de características para UN nodo."""
-    features = {}
-    text = get_clean_text(node)
-    parent_node = node.parent if node and hasattr(node, 'parent') and node.parent and node.parent.name != '[document]' else None
-
-    # --- Características ---
-    features['tag_name'] = node.name if node else 'None'
-    features['num_children'] = len(node.find_all(recursive=False)) if node else 0
-    features['parent_tag'] = parent_node.name if parent_node else 'None'
-    features['has_href'] = 1 if node and node.has_attr('href') else 0
-    features['has_src'] = 1 if node and node.has_attr('src') else 0
-    features['class_list'] = " ".join(node.get('class', [])) if node else ""
-    features['text_length'] = len(text)
-    features['word_count'] = len(word_tokenize(text)) if text else 0
-    features['uppercase_ratio'] = calculate_uppercase_ratio(text) if text else 0.0
-    features['stopword_ratio'] = calculate_stopword_ratio(text) if text else 0.0
-    features['depth'] = len(list(node.parents)) if node and hasattr(node, 'parents') else 0
-    features['is_h2'] = 1 if node and node.name == 'h2' else 0
-    features['is_div'] = 1 if node and node.name == 'div' else 0
-    features['is_a'] = 1 if node and node.name == 'a' else 0
-    features['is_img'] = 1 if node and node.name == 'img' else 0
-    features['class_contains_title'] = 1 if 'title' in features['class_list'].lower() or 'titulo' in features['class_list'].lower() else 0
-    features['class_contains_kicker'] = 1 if 'kicker' in features['class_list'].lower() or 'volanta' in features['class_list'].lower() else 0
-    features['class_contains_image'] = 1 if 'image' in features['class_list'].lower() or 'imagen' in features['class_list'].lower() else 0
-
-    features['xpath'] = generate_stable_xpath(node)
-
-    return features
+def _attrs_key(attrs):
+    """Clave hashable de los atributos; iguales si y solo si los diccionarios son iguales."""
+    return tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in attrs.items()))
+
+
+def _structure_ids(root):
+    """
+    Asigna a cada etiqueta del subárbol un entero que coincide si y solo si dos etiquetas son
+    iguales según Tag.__eq__ (nombre, atributos y contenido, recursivamente).
+
+    Se calcula de abajo hacia arriba: la clave de cada etiqueta usa los enteros de sus hijos,
+    así que cada nodo se visita una sola vez.
+    """
+    structure_ids = {}
+    interned = {}
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.contents if isinstance(child, Tag))
+            continue
+        contents_key = tuple(
+            structure_ids[id(child)] if isinstance(child, Tag) else str(child)
+            for child in node.contents
+        )
+        key = (node.name, _attrs_key(node.attrs), contents_key)
+        structure_ids[id(node)] = interned.setdefault(key, len(interned))
+    return structure_ids
+
+
+def generate_stable_xpaths(root):
+    """
+    XPath posicional de 'root' y de todas sus etiquetas descendientes en un solo recorrido.
+
+    Produce exactamente lo mismo que generate_stable_xpath nodo a nodo, incluido que
+    siblings.index() devuelve la posición del primer hermano *igual* (mismo nombre,
+    atributos y contenido): dos hermanos idénticos comparten índice.
+
+    Returns:
+        dict: id(etiqueta) -> XPath.
+    """
+    structure_ids = _structure_ids(root)
+    # Las etiquetas cuyo padre es el documento no forman parte de la ruta
+    is_top_level = root.parent is None or root.parent.name == '[document]'
+    root_path = "" if is_top_level else generate_stable_xpath(root)
+    xpaths = {id(root): root_path or (f"/{root.name}[1]" if root.name else "")}
+
+    stack = [(root, root_path)]
+    while stack:
+        parent, parent_path = stack.pop()
+        positions = {}
+        first_position = {} # (nombre, estructura) -> posición del primer hermano igual
+        for child in parent.contents:
+            if not isinstance(child, Tag):
+                continue
+            positions[child.name] = positions.get(child.name, 0) + 1
+            index = first_position.setdefault((child.name, structure_ids[id(child)]), positions[child.name])
+            child_path = "" if parent.name == '[document]' else f"{parent_path}/{child.name}[{index}]"
+            xpaths[id(child)] = child_path or f"/{child.name}[1]"
+            stack.append((child, child_path))
+    return xpaths
+
+
+def build_label_index(labels):
+    """Índice XPath -> rol de las etiquetas de un archivo de labels.json."""
+    return {item['xpath']: item['role'] for item in labels}
+
+
+def extract_block_features(container_node, buffer, token_stats=None):
+    """
+    Añade al buffer las filas de todas las etiquetas de un bloque (sin la raíz, como find_all).
+
+    Returns:
+        list: Tuplas (fila_del_buffer, xpath) de los nodos añadidos, en orden del documento.
+    """
+    _, nodes, first_row = features.extract_subtree_features(container_node, buffer=buffer, token_stats=token_stats)
+    xpaths = generate_stable_xpaths(container_node)
+    return [(first_row + offset, xpaths[id(node)]) for offset, node in enumerate(nodes) if offset]
+
+
+def block_root(html_content):
+    """Raíz del bloque guardado (su primer nodo; el documento si no tiene etiquetas)."""
+    soup = BeautifulSoup(html_content, 'lxml')
+    container_node = next(soup.children, None)
+    if not container_node or not hasattr(container_node, 'find_all'):
+        container_node = soup
+    return container_node
+
+
+def block_cache_key(html_content):
+    """Clave del cache: hash del HTML y de las versiones del esquema y del cache."""
+    digest = hashlib.sha256(f"{FEATURE_CACHE_VERSION}:{features.FEATURE_SCHEMA_VERSION}:".encode('utf-8'))
+    digest.update(html_content.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def featurize_block(html_content, token_stats=None):
+    """
+    Características y XPaths de todas las etiquetas de un bloque (sin la raíz).
+
+    Returns:
+        tuple: (dict columna -> array de NumPy, lista de XPaths en el mismo orden).
+    """
+    buffer = features.FeatureBuffer()
+    block_rows = extract_block_features(block_root(html_content), buffer, token_stats)
+    return buffer.to_arrays([row for row, _ in block_rows]), [xpath for _, xpath in block_rows]
+
+
+_worker_token_stats = None # Una TokenStats por proceso, compartida por los bloques que procesa
+
+
+def featurize_html(task):
+    """
+    Tarea del pool: extrae (o lee del cache) las características de un bloque HTML.
+
+    Args:
+        task (tuple): (HTML del bloque, directorio del cache o None).
+
+    Returns:
+        dict: 'columns' y 'xpaths' (ver featurize_block), 'cached' (bool) y 'error' (str o None).
+    """
+    global _worker_token_stats
+    html_content, cache_dir = task
+    try:
+        cache_path = None
+        if cache_dir:
+            # pickle directo: con entradas tan pequeñas joblib.load es ~10 veces más lento
+            cache_path = os.path.join(cache_dir, f"{block_cache_key(html_content)}.pkl")
+            try:
+                with open(cache_path, 'rb') as f:
+                    columns, xpaths = pickle.load(f)
+                return {'columns': columns, 'xpaths': xpaths, 'cached': True, 'error': None}
+            except Exception:
+                pass # Sin entrada (o ilegible): se extrae de nuevo
+
+        if _worker_token_stats is None:
+            _worker_token_stats = features.TokenStats()
+        columns, xpaths = featurize_block(html_content, _worker_token_stats)
+
+        if cache_path:
+            # Escritura atómica: otro proceso nunca lee una entrada a medias
+            temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary_path, 'wb') as f:
+                pickle.dump((columns, xpaths), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, cache_path)
+        return {'columns': columns, 'xpaths': xpaths, 'cached': False, 'error': None}
+    except Exception:
+        return {'columns': None, 'xpaths': None, 'cached': False, 'error': traceback.format_exc()}
+
+
+def featurize_file(task):
+    """Tarea del pool: como featurize_html, pero lee el HTML de la ruta (ruta, directorio del cache)."""
+    filepath, cache_dir = task
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+    except Exception:
+        return {'columns': None, 'xpaths': None, 'cached': False, 'error': traceback.format_exc()}
+    return featurize_html((html_content, cache_dir))
+
+
+def _map_tasks(function, tasks, workers, total):
+    """Aplica 'function' a las tareas en orden, en este proceso (workers=1) o en un pool."""
+    workers = max(1, min(workers, total))
+    if workers == 1:
+        return map(function, tasks)
+    # Lotes de varias tareas por envío: reduce el coste de IPC con miles de bloques pequeños
+    chunksize = max(1, min(total, STREAM_BATCH_SIZE) // (workers * 4))
+    return _map_in_batches(function, tasks, workers, chunksize)
+
+
+def _map_in_batches(function, tasks, workers, chunksize):
+    # executor.map consume todo el iterable al empezar: por lotes, solo hay STREAM_BATCH_SIZE tareas en memoria
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = iter(tasks)
+        while True:
+            batch = list(itertools.islice(tasks, STREAM_BATCH_SIZE))
+            if not batch:
+                return
+            yield from executor.map(function, batch, chunksize=chunksize)
+
+
+def featurize_files(filepaths, workers=1, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Extrae las características de varios archivos en un pool de procesos.
+
+    Args:
+        filepaths (list): Rutas de los HTML.
+        workers (int): Procesos del pool (1 = en este proceso).
+        cache_dir (str): Directorio del cache por hash de contenido (None = sin cache).
+
+    Returns:
+        list: Resultados de featurize_file, en el mismo orden que 'filepaths'.
+    """
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    tasks = [(filepath, cache_dir) for filepath in filepaths]
+    return list(_map_tasks(featurize_file, tasks, workers, len(tasks)))
+
+
+def featurize_store(store, block_hashes, workers=1, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Extrae las características de bloques de un BlockStore leyéndolo en streaming.
+
+    El almacén se lee de forma secuencial y solo hay STREAM_BATCH_SIZE bloques en memoria a
+    la vez, por grande que sea.
+
+    Args:
+        store (BlockStore): Almacén abierto.
+        block_hashes (set): Hashes de los bloques a procesar (los que no existen se ignoran).
+
+    Returns:
+        dict: hash -> resultado de featurize_html.
+    """
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    entries = [entry for entry in store.entries() if entry['hash'] in block_hashes]
+    tasks = ((html_content, cache_dir) for _, html_content in store.iter_blocks(block_hashes))
+    results = _map_tasks(featurize_html, tasks, workers, len(entries))
+    return {entry['hash']: result for entry, result in zip(entries, results)}
+
+
+def store_block_hash(label_key):
+    """Hash de contenido de una clave de labels.json ('<hash>' o '<hash>.html'), o None si no lo es."""
+    block_hash = label_key[:-len('.html')] if label_key.endswith('.html') else label_key
+    return block_hash if re.fullmatch(r"[0-9a-f]{64}", block_hash) else None
+
+
+def search_hyperparameters(pipeline, X_train, y_train, n_iter=20, cv_folds=5, n_jobs=1):
+    """
+    Búsqueda aleatoria con validación cruzada estratificada sobre SEARCH_SPACE (f1 macro).
+
+    Cada combinación y fold se entrena en un proceso del pool (el bosque usa un solo núcleo
+    para no sobresuscribir la CPU).
+
+    Returns:
+        tuple: (mejores parámetros, puntuación media de validación).
+    """
+    n_splits = max(2, min(cv_folds, int(y_train.value_counts().min())))
+    search = RandomizedSearchCV(
+        clone(pipeline).set_params(classifier__n_jobs=1),
+        SEARCH_SPACE,
+        n_iter=n_iter,
+        scoring='f1_macro',
+        cv=StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42),
+        n_jobs=n_jobs,
+        refit=False,
+        random_state=42,
+    )
+    search.fit(X_train, y_train)
+    return search.best_params_, search.best_score_
 
 # --- Proceso Principal de Entrenamiento ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena el modelo extractor a partir de los bloques etiquetados.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos para extraer características y para la búsqueda (por defecto, uno por CPU).")
+    parser.add_argument("--cache-dir", default=FEATURE_CACHE_DIR, help="Directorio del cache de características por bloque.")
+    parser.add_argument("--no-cache", action="store_true", help="Extrae todos los bloques sin leer ni escribir el cache.")
+    parser.add_argument("--search", action="store_true", help="Busca hiperparámetros con validación cruzada antes de entrenar.")
+    parser.add_argument("--search-iter", type=int, default=20, help="Combinaciones a evaluar en la búsqueda.")
+    parser.add_argument("--cv-folds", type=int, default=5, help="Folds de la validación cruzada de la búsqueda.")
+    parser.add_argument("--store", default=None, help="Almacén de bloques (collect_html_for_training.py --store): las claves de labels.json que son un hash de contenido se leen de él.")
+    args = parser.parse_args()
+
     print("Iniciando proceso de entrenamiento del modelo...")
 
     # 1. Cargar Etiquetas
@@ -147,48 +380,65 @@ if __name__ == "__main__":
 
     # 2. Extraer Características y Crear Dataset
     print("Procesando archivos HTML y extrayendo características...")
-    all_node_data = []
-
+    store = None
+    if args.store:
+        from block_store import BlockStore
+        store = BlockStore(args.store, read_only=True)
+        print(f"Almacén de bloques '{args.store}' con {len(store)} bloques.")
+
+    labeled_files = [] # (clave de labels.json, ruta del HTML o hash del bloque en el almacén, etiquetas)
+    store_hashes = set()
     for filename, labels in labels_data.items():
+        block_hash = store_block_hash(filename)
+        if store is not None and block_hash in store:
+            store_hashes.add(block_hash)
+            labeled_files.append((filename, block_hash, labels))
+            continue
         filepath = os.path.join(HTML_DIR, filename)
         if not os.path.exists(filepath):
             print(f"Advertencia: Archivo HTML '{filepath}' no encontrado, omitiendo.")
             continue
-
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-
-            soup = BeautifulSoup(html_content, 'lxml')
-            container_node = next(soup.children, None)
-            if not container_node or not hasattr(container_node, 'find_all'):
-                 container_node = soup
-
-            label_map = {item['xpath']: item['role'] for item in labels}
-            nodes_processed_in_block = 0
-
-            for node in container_node.find_all(True, recursive=True):
-                if not node.name or (isinstance(node, str) and not node.strip()): continue
-
-                features_dict = extract_features_for_training(node, soup)
-                node_xpath = features_dict.pop('xpath')
-                role = label_map.get(node_xpath, 'Other')
-
-                features_dict['role'] = role
-                all_node_data.append(features_dict)
-                nodes_processed_in_block +=1
-
-        except Exception as e:
-            print(f"\nError procesando el archivo '{filename}': {e}")
-            traceback.print_exc()
+        labeled_files.append((filename, filepath, labels))
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    start_time = time.perf_counter()
+    if store is not None:
+        store_results = featurize_store(store, store_hashes, workers=args.workers, cache_dir=cache_dir)
+        store.close()
+        file_results = iter(featurize_files([source for _, source, _ in labeled_files if source not in store_hashes], workers=args.workers, cache_dir=cache_dir))
+        results = [store_results[source] if source in store_hashes else next(file_results) for _, source, _ in labeled_files]
+    else:
+        results = featurize_files([filepath for _, filepath, _ in labeled_files], workers=args.workers, cache_dir=cache_dir)
+    cached_blocks = sum(1 for result in results if result['cached'])
+    print(f"Características de {len(results)} bloques en {time.perf_counter() - start_time:.2f} s "
+          f"({cached_blocks} desde el cache, {args.workers} procesos).")
+
+    column_parts = {name: [] for name in features.FEATURE_COLUMNS}
+    roles = []
+    unmatched_labels = 0
+    unmatched_files = 0
+    for (filename, _, labels), result in zip(labeled_files, results):
+        if result['error']:
+            print(f"\nError procesando el archivo '{filename}':\n{result['error']}")
             continue
-
-    if not all_node_data:
+        label_index = build_label_index(labels)
+        for name in features.FEATURE_COLUMNS:
+            column_parts[name].append(result['columns'][name])
+        roles.extend(label_index.get(node_xpath, 'Other') for node_xpath in result['xpaths'])
+        unmatched = len(label_index.keys() - set(result['xpaths']))
+        if unmatched:
+            unmatched_labels += unmatched
+            unmatched_files += 1
+    if unmatched_labels:
+        print(f"Advertencia: {unmatched_labels} etiquetas de '{os.path.basename(LABELS_FILE)}' (en {unmatched_files} archivos) no corresponden a ningún nodo.")
+
+    if not roles:
         print("Error: No se pudieron extraer características/datos.")
         exit()
 
     # Crear DataFrame y limpiar NaNs
-    df = pd.DataFrame(all_node_data)
+    df = pd.DataFrame({name: np.concatenate(parts) for name, parts in column_parts.items()}, columns=features.FEATURE_COLUMNS)
+    df['role'] = roles
     for col in df.columns:
         if df[col].isnull().any():
              if pd.api.types.is_numeric_dtype(df[col]): df[col] = df[col].fillna(0)
@@ -212,9 +462,9 @@ if __name__ == "__main__":
     # 3. Preprocesamiento y Pipeline
     print("\nDefiniendo pipeline de preprocesamiento y modelo...")
 
-    numeric_features = ['num_children', 'text_length', 'word_count', 'uppercase_ratio', 'stopword_ratio', 'depth']
-    binary_features = ['has_href', 'has_src', 'is_h2', 'is_div', 'is_a', 'is_img', 'class_contains_title', 'class_contains_kicker', 'class_contains_image']
-    categorical_features = ['tag_name', 'parent_tag']
+    numeric_features = features.NUMERIC_FEATURES
+    binary_features = features.BINARY_FEATURES
+    categorical_features = features.CATEGORICAL_FEATURES
 
     numeric_transformer = Pipeline(steps=[('scaler', StandardScaler())])
     categorical_transformer = Pipeline(steps=[('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))])
@@ -263,6 +513,16 @@ if __name__ == "__main__":
          print(f"Error durante train_test_split: {e_split}. Intentando sin stratify...")
          X_train, X_test, y_train, y_test = train_test_split(X_filtered, y_filtered, test_size=0.3, random_state=42)
 
+    if args.search:
+        print(f"\nBuscando hiperparámetros ({args.search_iter} combinaciones, {args.cv_folds} folds, {args.workers} procesos)...")
+        start_time = time.perf_counter()
+        best_params, best_score = search_hyperparameters(
+            pipeline, X_train, y_train, n_iter=args.search_iter, cv_folds=args.cv_folds, n_jobs=args.workers,
+        )
+        print(f"Búsqueda completada en {time.perf_counter() - start_time:.1f} s. F1 macro (CV): {best_score:.3f}")
+        print(f"Mejores parámetros: {best_params}")
+        pipeline.set_params(**best_params)
+
     pipeline.fit(X_train, y_train)
     print("Entrenamiento completado.")
 
@@ -281,7 +541,15 @@ if __name__ == "__main__":
     print(f"\nGuardando el pipeline entrenado en '{MODEL_OUTPUT_FILE}'...")
     try:
         joblib.dump(pipeline, MODEL_OUTPUT_FILE)
+        # El esquema versionado viaja con el modelo: scraper_model_ml.py rechaza modelos sin él o distintos
+        schema_file = features.save_schema(MODEL_OUTPUT_FILE)
         print("Pipeline guardado exitosamente.")
+        print(f"Esquema de características (v{features.FEATURE_SCHEMA_VERSION}) guardado en '{schema_file}'.")
+        # Exportación portable (arrays NumPy con mmap) que usa scraper_model_ml.py si está disponible
+        portable_dir = portable_model.export_pipeline(
+            pipeline, portable_model.portable_path_for(MODEL_OUTPUT_FILE), source_model_path=MODEL_OUTPUT_FILE
+        )
+        print(f"Modelo exportado en formato portable: '{portable_dir}'.")
         print(f"\n¡Listo! Puedes usar '{MODEL_OUTPUT_FILE}' con 'dynamic_scraper_nlp.py'.")
     except Exception as e_save:
         print(f"Error al guardar el pipeline: {e_save}")
\ No newline at end of file
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+# Id numérico de los artículos en las URLs de Yogonet: .../2025/05/08/104122-flutter-evaluates-...
+ARTICLE_ID_PATTERN = re.compile(r"/(\d+)-[^/]*/?$")
+
+
+def extract_article_id(link):
+    """Devuelve el id numérico del artículo a partir de su URL, o None si no lo tiene."""
+    match = ARTICLE_ID_PATTERN.search(link or "")
+    return int(match.group(1)) if match else None
+
+
+def content_hash(article):
+    """Hash de los campos visibles de un artículo, para detectar cambios en noticias ya vistas."""
+    content = "\x1f".join(str(article.get(field, "")) for field in ("title", "kicker", "image_url"))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ArticleIndex:
+    """
+    Índice persistente (SQLite) de artículos ya procesados y validadores HTTP de los listados.
+
+    Los cambios (artículos vistos y ETag/Last-Modified) quedan pendientes hasta commit(),
+    que debe llamarse cuando los datos ya llegaron a su destino: si la ejecución falla
+    antes, la siguiente vuelve a procesar las mismas noticias.
+    """
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.db_path = db_path
+        # El crawler consulta los validadores desde varios hilos: conexión compartida con lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                link TEXT PRIMARY KEY,
+                article_id INTEGER,
+                content_hash TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_article_id ON articles (article_id);
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TEXT NOT NULL
+            );
+        """)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _known_hash(self, article_id, link):
+        """Hash guardado para el artículo, buscando por id numérico y, si no hay, por enlace."""
+        if article_id is not None:
+            row = self.connection.execute(
+                "SELECT content_hash FROM articles WHERE article_id = ? LIMIT 1", (article_id,)
+            ).fetchone()
+            if row:
+                return row[0]
+        row = self.connection.execute("SELECT content_hash FROM articles WHERE link = ?", (link,)).fetchone()
+        return row[0] if row else None
+
+    def iter_new(self, articles):
+        """
+        Versión en streaming de filter_new(): consume cualquier iterable de artículos y
+        entrega solo los nuevos o modificados a medida que llegan.
+
+        Yields:
+            dict: Artículos nuevos o cuyo contenido cambió, sin duplicados en la ejecución.
+        """
+        seen_in_batch = set()
+        total = new = 0
+        for article in articles:
+            total += 1
+            link = article.get("link")
+            article_id = extract_article_id(link)
+            batch_key = article_id if article_id is not None else link
+            if batch_key in seen_in_batch:
+                continue
+            seen_in_batch.add(batch_key)
+            with self._lock:
+                known_hash = self._known_hash(article_id, link)
+            if known_hash != content_hash(article):
+                new += 1
+                yield article
+        print(f"Índice incremental: {new} noticias nuevas o modificadas de {total} extraídas.")
+
+    def filter_new(self, articles):
+        """
+        Descarta los artículos ya vistos sin cambios.
+
+        Args:
+            articles (list): Lista de diccionarios con al menos 'link'.
+
+        Returns:
+            list: Artículos nuevos o cuyo contenido cambió, sin duplicados dentro del lote.
+        """
+        return list(self.iter_new(articles))
+
+    def mark_seen(self, articles):
+        """Registra (pendiente de commit) los artículos como procesados."""
+        now = _now()
+        with self._lock:
+            self.connection.executemany(
+                """
+                INSERT INTO articles (link, article_id, content_hash, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    article_id = excluded.article_id,
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen
+                """,
+                [(a["link"], extract_article_id(a["link"]), content_hash(a), now, now) for a in articles],
+            )
+
+    def get_validators(self, url):
+        """Devuelve (etag, last_modified) guardados para la URL, o (None, None)."""
+        with self._lock:
+            row = self.connection.execute("SELECT etag, last_modified FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return row if row else (None, None)
+
+    def save_validators(self, url, etag, last_modified):
+        """Guarda (pendiente de commit) los validadores HTTP de la última descarga de la URL."""
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, _now()),
+            )
+
+    def commit(self):
+        with self._lock:
+            self.connection.commit()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
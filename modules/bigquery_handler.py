@@ -1,57 +1,431 @@
-from google.cloud import bigquery
+from datetime import datetime, timezone
 import pandas as pd
 
-def load_df_to_bigquery(dataframe, project_id, dataset_id, table_id):
+import modules.metrics as metrics
+
+# Modos de carga: 'truncate' reemplaza la tabla, 'append' añade filas y
+# 'merge' carga a una tabla staging y hace MERGE (upsert por 'link') sobre la tabla destino.
+LOAD_MODES = ("truncate", "append", "merge")
+PARTITION_FIELD = "scrape_date"
+CLUSTERING_FIELDS = ["link"]
+STAGING_SUFFIX = "_staging"
+
+# Esquema explícito de la tabla (nombre, tipo, modo): evita re-inferirlo en cada carga.
+# Se define sin el cliente de BigQuery para que importar este módulo no cargue google.cloud.
+TABLE_FIELDS = [
+    ("title", "STRING", "NULLABLE"),
+    ("kicker", "STRING", "NULLABLE"),
+    ("image_url", "STRING", "NULLABLE"),
+    ("link", "STRING", "REQUIRED"),
+    ("title_word_count", "INTEGER", "NULLABLE"),
+    ("title_char_count", "INTEGER", "NULLABLE"),
+    ("title_capital_words", "STRING", "REPEATED"),
+    (PARTITION_FIELD, "DATE", "REQUIRED"),
+]
+TABLE_COLUMNS = [name for name, _, _ in TABLE_FIELDS]
+MIGRATED_SUFFIX = "_migrated" # Tabla temporal de la migración de una tabla con otra estructura
+# Nombres de tipo de SQL estándar que la API puede devolver en lugar de los de TABLE_FIELDS
+_LEGACY_TYPES = {"INT64": "INTEGER", "FLOAT64": "FLOAT", "BOOL": "BOOLEAN"}
+
+
+class TableLayoutError(ValueError):
+    """La tabla destino ya existe con otra partición, clustering o esquema: hay que migrarla."""
+
+
+def _bigquery():
+    """Importa el cliente de BigQuery solo cuando se va a cargar algo (tarda ~0.5 s)."""
+    from google.cloud import bigquery
+    return bigquery
+
+
+def table_schema():
+    """Esquema de la tabla como lista de bigquery.SchemaField."""
+    bigquery = _bigquery()
+    return [bigquery.SchemaField(name, field_type, mode=mode) for name, field_type, mode in TABLE_FIELDS]
+
+
+def with_scrape_date(dataframe):
+    """Devuelve una copia del DataFrame con las columnas del esquema y la fecha de scraping."""
+    df = dataframe.copy()
+    if PARTITION_FIELD not in df.columns:
+        df[PARTITION_FIELD] = datetime.now(timezone.utc).date()
+    return df[[column for column in TABLE_COLUMNS if column in df.columns]]
+
+
+def _partitioned_table(table_full_id):
+    """Definición de la tabla destino particionada por fecha de scraping y clusterizada por 'link'."""
+    bigquery = _bigquery()
+    table = bigquery.Table(table_full_id, schema=table_schema())
+    table.time_partitioning = bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY, field=PARTITION_FIELD)
+    table.clustering_fields = CLUSTERING_FIELDS
+    return table
+
+
+def table_layout_mismatches(table):
+    """
+    Compara una tabla existente (bigquery.Table) con la partición, el clustering y el
+    esquema de TABLE_FIELDS.
+
+    Returns:
+        list: Descripción de cada diferencia; vacía si la tabla tiene la estructura esperada.
+    """
+    mismatches = []
+    partitioning = table.time_partitioning
+    if partitioning is None or partitioning.field != PARTITION_FIELD:
+        found = f"particionada por '{partitioning.field}'" if partitioning is not None else "sin particionar"
+        mismatches.append(f"{found} en lugar de por '{PARTITION_FIELD}'")
+    if list(table.clustering_fields or []) != CLUSTERING_FIELDS:
+        mismatches.append(f"clustering {table.clustering_fields or []} en lugar de {CLUSTERING_FIELDS}")
+
+    existing = {field.name: field for field in table.schema}
+    for name, field_type, mode in TABLE_FIELDS:
+        field = existing.get(name)
+        if field is None:
+            mismatches.append(f"falta la columna '{name}'")
+            continue
+        found_type = _LEGACY_TYPES.get(field.field_type, field.field_type)
+        if found_type != field_type:
+            mismatches.append(f"'{name}' es {found_type} en lugar de {field_type}")
+        if (field.mode or "NULLABLE") != mode:
+            mismatches.append(f"'{name}' es {field.mode or 'NULLABLE'} en lugar de {mode}")
+    for name, field in existing.items():
+        if name not in TABLE_COLUMNS and field.mode == "REQUIRED":
+            mismatches.append(f"columna REQUIRED '{name}' que el scraper no carga")
+    return mismatches
+
+
+def _column_definition(name, field_type, mode):
+    sql_type = {"INTEGER": "INT64", "FLOAT": "FLOAT64", "BOOLEAN": "BOOL"}.get(field_type, field_type)
+    if mode == "REPEATED":
+        return f"{name} ARRAY<{sql_type}>"
+    return f"{name} {sql_type}" + (" NOT NULL" if mode == "REQUIRED" else "")
+
+
+def build_migration_query(table_full_id, existing_columns=()):
+    """
+    Sentencias para migrar una sola vez una tabla creada con otra estructura (p. ej. la de
+    versiones anteriores, sin partición ni 'scrape_date'): copia las filas a una tabla nueva
+    particionada y clusterizada con el esquema de TABLE_FIELDS, borra la original y renombra
+    la nueva. Las columnas que no existen se rellenan (la fecha de hoy para 'scrape_date')
+    y se descartan las filas sin 'link'.
+
+    Args:
+        existing_columns (iterable): Columnas que ya tiene la tabla original.
+    """
+    migrated_full_id = f"{table_full_id}{MIGRATED_SUFFIX}"
+    table_id = table_full_id.split(".")[-1]
+    existing_columns = set(existing_columns)
+    columns = ",\n            ".join(_column_definition(*field) for field in TABLE_FIELDS)
+    select = []
+    for name, field_type, mode in TABLE_FIELDS:
+        column_type = _column_definition(name, field_type, "NULLABLE").split(" ", 1)[1]
+        if name in existing_columns:
+            select.append(name)
+        elif name == PARTITION_FIELD:
+            select.append(f"CURRENT_DATE() AS {name}")
+        elif mode == "REPEATED":
+            select.append(f"ARRAY<{column_type}>[] AS {name}")
+        else:
+            select.append(f"CAST(NULL AS {column_type}) AS {name}")
+    select_clause = ", ".join(select)
+    return f"""
+        CREATE TABLE `{migrated_full_id}` (
+            {columns}
+        )
+        PARTITION BY {PARTITION_FIELD}
+        CLUSTER BY {", ".join(CLUSTERING_FIELDS)}
+        AS SELECT {select_clause}
+        FROM `{table_full_id}`
+        WHERE link IS NOT NULL;
+        DROP TABLE `{table_full_id}`;
+        ALTER TABLE `{migrated_full_id}` RENAME TO `{table_id}`;
+    """
+
+
+def _ensure_table(client, table_full_id):
+    """
+    Crea la tabla destino si no existe y comprueba que la existente tiene la partición, el
+    clustering y el esquema esperados. create_table(exists_ok=True) no modifica una tabla
+    ya creada, y las cargas fallarían después con errores de esquema poco claros.
+
+    Raises:
+        TableLayoutError: Si la tabla tiene otra estructura, con la migración a ejecutar.
+    """
+    client.create_table(_partitioned_table(table_full_id), exists_ok=True)
+    table = client.get_table(table_full_id)
+    mismatches = table_layout_mismatches(table)
+    if mismatches:
+        raise TableLayoutError(
+            f"La tabla {table_full_id} ya existe con otra estructura ({'; '.join(mismatches)}). "
+            f"Mígrala una sola vez (revisa las columnas antes de ejecutarlo):\n"
+            f"{build_migration_query(table_full_id, [field.name for field in table.schema])}"
+        )
+
+
+def build_merge_query(target_full_id, staging_full_id):
+    """
+    Construye la sentencia MERGE de la tabla staging sobre la tabla destino.
+
+    Las filas se identifican por 'link'; si un enlace aparece varias veces en staging se
+    usa una sola. Las filas existentes conservan su 'scrape_date' (partición original).
+    """
+    update_columns = [column for column in TABLE_COLUMNS if column not in ("link", PARTITION_FIELD)]
+    all_columns = TABLE_COLUMNS
+    update_clause = ", ".join(f"{column} = S.{column}" for column in update_columns)
+    insert_columns = ", ".join(all_columns)
+    insert_values = ", ".join(f"S.{column}" for column in all_columns)
+    return f"""
+        MERGE `{target_full_id}` T
+        USING (
+            SELECT * EXCEPT(_row_number) FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY link ORDER BY {PARTITION_FIELD} DESC) AS _row_number
+                FROM `{staging_full_id}`
+            )
+            WHERE _row_number = 1
+        ) S
+        ON T.link = S.link
+        WHEN MATCHED THEN
+            UPDATE SET {update_clause}
+        WHEN NOT MATCHED THEN
+            INSERT ({insert_columns}) VALUES ({insert_values})
+    """
+
+
+def build_publish_query(target_full_id, staging_full_id, load_mode):
+    """
+    Construye la sentencia que pasa el contenido de la tabla staging a la tabla destino:
+    'truncate' la reemplaza (DELETE e INSERT en una transacción, que conserva la partición
+    y el clustering de la tabla), 'append' inserta las filas y 'merge' hace MERGE por 'link'.
+    """
+    if load_mode == "merge":
+        return build_merge_query(target_full_id, staging_full_id)
+    columns = ", ".join(TABLE_COLUMNS)
+    insert = f"INSERT INTO `{target_full_id}` ({columns}) SELECT {columns} FROM `{staging_full_id}`"
+    if load_mode == "append":
+        return insert
+    return f"""
+        BEGIN TRANSACTION;
+        DELETE FROM `{target_full_id}` WHERE TRUE;
+        {insert};
+        COMMIT TRANSACTION;
+    """
+
+
+def _load_job_config(write_disposition, source_format=None):
+    bigquery = _bigquery()
+    job_config = bigquery.LoadJobConfig(
+        write_disposition=write_disposition,
+        # CREATE_IF_NEEDED crea la tabla si no existe.
+        # CREATE_NEVER falla si la tabla no existe.
+        create_disposition="CREATE_IF_NEEDED",
+        schema=table_schema(),
+        autodetect=False,
+    )
+    if source_format == "PARQUET":
+        job_config.source_format = source_format
+        # Las columnas list<string> de Parquet se cargan como campos REPEATED
+        parquet_options = bigquery.ParquetOptions()
+        parquet_options.enable_list_inference = True
+        job_config.parquet_options = parquet_options
+    return job_config
+
+
+def _record_load(job):
+    """Suma a las métricas las filas y bytes de un LoadJob terminado."""
+    metrics.increment("rows_loaded", job.output_rows or 0)
+    metrics.increment("bytes_uploaded", getattr(job, "input_file_bytes", None) or 0)
+
+
+def _run_load(client, table_full_id, load_mode, start_load_job, source_format=None):
+    """
+    Ejecuta la carga según el modo, delegando el envío de los datos en 'start_load_job'.
+
+    Args:
+        start_load_job (callable): Recibe (tabla_destino, job_config) y devuelve el LoadJob.
+    """
+    with metrics.span("bigquery_load", table=table_full_id, load_mode=load_mode):
+        _run_load_job(client, table_full_id, load_mode, start_load_job, source_format)
+
+
+def _run_load_job(client, table_full_id, load_mode, start_load_job, source_format=None):
+    _ensure_table(client, table_full_id)
+
+    if load_mode == "merge":
+        # Carga en la tabla staging y la fusiona con MERGE en la tabla destino
+        staging_full_id = f"{table_full_id}{STAGING_SUFFIX}"
+        print(f"Cargando datos en la tabla staging {staging_full_id}...")
+        job = start_load_job(staging_full_id, _load_job_config("WRITE_TRUNCATE", source_format))
+        job.result()
+        _record_load(job)
+        _publish(client, table_full_id, staging_full_id, load_mode)
+        return
+
+    # WRITE_APPEND añade los datos a la tabla existente.
+    # WRITE_TRUNCATE borra la tabla y la reemplaza.
+    write_disposition = "WRITE_APPEND" if load_mode == "append" else "WRITE_TRUNCATE"
+    print("Iniciando job de carga a BigQuery...")
+    job = start_load_job(table_full_id, _load_job_config(write_disposition, source_format))
+    job.result()  # Esperar a que el job termine
+    _record_load(job)
+    print(f"Cargadas {job.output_rows} filas en la tabla {table_full_id}.")
+
+
+def _publish(client, table_full_id, staging_full_id, load_mode):
+    """Pasa la tabla staging a la tabla destino con una sola sentencia y borra la staging."""
+    print(f"Pasando {staging_full_id} a {table_full_id} (modo: {load_mode})...")
+    with metrics.span("bigquery_publish", table=table_full_id, load_mode=load_mode):
+        query_job = client.query(build_publish_query(table_full_id, staging_full_id, load_mode))
+        query_job.result()
+    client.delete_table(staging_full_id, not_found_ok=True)
+    affected = query_job.num_dml_affected_rows
+    print(f"Tabla {table_full_id} actualizada" + (f": {affected} filas insertadas/actualizadas." if affected is not None else "."))
+
+
+def get_client(project_id, client=None):
+    """Devuelve 'client' o, si es None, un bigquery.Client para el proyecto."""
+    return client if client is not None else _bigquery().Client(project=project_id)
+
+
+def load_df_to_staging(dataframe, project_id, dataset_id, table_id, append=False, client=None):
+    """
+    Carga un DataFrame a la tabla staging (<table_id>_staging) sin tocar la tabla destino.
+
+    El primer bloque de una ejecución (append=False) reemplaza la staging, descartando lo
+    que hubiera dejado una ejecución fallida, y comprueba la tabla destino; los siguientes
+    se añaden. publish_staging pasa después todo a la tabla destino de una vez.
+
+    Returns:
+        bool: True si la carga terminó correctamente, False en caso contrario.
+    """
+    table_full_id = f"{project_id}.{dataset_id}.{table_id}"
+    staging_full_id = f"{table_full_id}{STAGING_SUFFIX}"
+    try:
+        client = get_client(project_id, client)
+        if not append:
+            _ensure_table(client, table_full_id)
+        df = with_scrape_date(dataframe)
+        write_disposition = "WRITE_APPEND" if append else "WRITE_TRUNCATE"
+        with metrics.span("bigquery_load", table=staging_full_id, load_mode="append" if append else "truncate"):
+            job = client.load_table_from_dataframe(df, staging_full_id, job_config=_load_job_config(write_disposition))
+            job.result()
+        _record_load(job)
+        print(f"Cargadas {job.output_rows} filas en la tabla staging {staging_full_id}.")
+        return True
+    except Exception as e:
+        print(f"Error al cargar datos a la tabla staging {staging_full_id}: {e}")
+        print(f"  - Detalles del error: {type(e).__name__}")
+        return False
+
+
+def publish_staging(project_id, dataset_id, table_id, load_mode="truncate", client=None):
+    """
+    Pasa el contenido de la tabla staging a la tabla destino con una sola sentencia
+    (ver build_publish_query) y borra la staging.
+
+    Returns:
+        bool: True si la tabla destino se actualizó, False en caso contrario (la staging se conserva).
+    """
+    if load_mode not in LOAD_MODES:
+        print(f"Modo de carga desconocido: '{load_mode}'. Usa uno de {LOAD_MODES}.")
+        return False
+    table_full_id = f"{project_id}.{dataset_id}.{table_id}"
+    try:
+        _publish(get_client(project_id, client), table_full_id, f"{table_full_id}{STAGING_SUFFIX}", load_mode)
+        return True
+    except Exception as e:
+        print(f"Error al actualizar la tabla {table_full_id} desde la staging: {e}")
+        print(f"  - Detalles del error: {type(e).__name__}")
+        return False
+
+
+def drop_staging(project_id, dataset_id, table_id, client=None):
+    """Borra la tabla staging sin tocar la tabla destino (p. ej. si el pipeline no terminó)."""
+    staging_full_id = f"{project_id}.{dataset_id}.{table_id}{STAGING_SUFFIX}"
+    try:
+        get_client(project_id, client).delete_table(staging_full_id, not_found_ok=True)
+        print(f"Tabla staging {staging_full_id} borrada.")
+    except Exception as e:
+        print(f"No se pudo borrar la tabla staging {staging_full_id}: {e}")
+
+
+def load_df_to_bigquery(dataframe, project_id, dataset_id, table_id, load_mode="truncate", client=None):
     """
     Carga un DataFrame de Pandas a una tabla de BigQuery.
-    La tabla se creará si no existe y se añadirán los datos (append).
+    La tabla se creará si no existe, particionada por 'scrape_date' y clusterizada por 'link'.
 
     Args:
         dataframe (pd.DataFrame): El DataFrame a cargar.
         project_id (str): El ID del proyecto de Google Cloud.
         dataset_id (str): El ID del dataset de BigQuery.
         table_id (str): El ID de la tabla de BigQuery.
+        load_mode (str): 'truncate' (por defecto) reemplaza la tabla, 'append' añade las
+                         filas y 'merge' hace upsert por 'link' vía una tabla staging.
+        client: Cliente de BigQuery a usar (p. ej. un cliente local de pruebas que implemente
+                load_table_from_dataframe, create_table, get_table, query y delete_table).
+                Si es None se crea un bigquery.Client para el proyecto.
+
+    Returns:
+        bool: True si la carga terminó correctamente, False en caso contrario.
     """
     if not isinstance(dataframe, pd.DataFrame) or dataframe.empty:
         print("DataFrame vacío o inválido, no se cargará nada a BigQuery.")
-        return
+        return False
+    if load_mode not in LOAD_MODES:
+        print(f"Modo de carga desconocido: '{load_mode}'. Usa uno de {LOAD_MODES}.")
+        return False
 
     # Configurar el ID completo de la tabla
     table_full_id = f"{project_id}.{dataset_id}.{table_id}"
-    print(f"Intentando cargar datos a BigQuery tabla: {table_full_id}")
+    print(f"Intentando cargar datos a BigQuery tabla: {table_full_id} (modo: {load_mode})")
 
     try:
         # Inicializar el cliente de BigQuery.
-        client = bigquery.Client(project=project_id)
+        if client is None:
+            client = _bigquery().Client(project=project_id)
         print(f"Cliente de BigQuery inicializado para el proyecto: {client.project}")
 
-        # Configuración del Job de carga
-        job_config = bigquery.LoadJobConfig(
-            # WRITE_APPEND añade los datos a la tabla existente.
-            # WRITE_TRUNCATE borraría la tabla y la reemplazaría.
-            write_disposition="WRITE_TRUNCATE",
-            # CREATE_IF_NEEDED crea la tabla si no existe.
-            # CREATE_NEVER falla si la tabla no existe.
-            create_disposition="CREATE_IF_NEEDED",
-            # Autodetectar esquema basado en el DataFrame
-            autodetect=True
+        df = with_scrape_date(dataframe)
+        _run_load(
+            client, table_full_id, load_mode,
+            lambda destination, job_config: client.load_table_from_dataframe(df, destination, job_config=job_config),
         )
+        return True
 
-        print("Iniciando job de carga a BigQuery...")
-        # Cargar el DataFrame a BigQuery
-        job = client.load_table_from_dataframe(
-            dataframe, table_full_id, job_config=job_config
-        )
-        job.result()  # Esperar a que el job termine
+    except Exception as e:
+        print(f"Error al cargar datos a BigQuery: {e}")
+        print(f"  - Detalles del error: {type(e).__name__}")
+        return False
 
-        # Verificar el resultado
-        table = client.get_table(table_full_id)  # Obtener la tabla actualizada
-        print(
-            f"Cargados {job.output_rows} filas. Total de filas en la tabla {table_full_id}: {table.num_rows}."
-        )
-        print(f"Esquema de la tabla ({len(table.schema)} columnas): {[(field.name, field.field_type) for field in table.schema]}")
 
+def load_parquet_to_bigquery(parquet_path, project_id, dataset_id, table_id, load_mode="truncate", client=None):
+    """
+    Carga un archivo Parquet local (con las columnas de TABLE_COLUMNS) a una tabla de BigQuery.
+
+    Mismos modos y cliente opcional que load_df_to_bigquery; el cliente debe implementar
+    load_table_from_file en lugar de load_table_from_dataframe.
+
+    Returns:
+        bool: True si la carga terminó correctamente, False en caso contrario.
+    """
+    if load_mode not in LOAD_MODES:
+        print(f"Modo de carga desconocido: '{load_mode}'. Usa uno de {LOAD_MODES}.")
+        return False
+
+    table_full_id = f"{project_id}.{dataset_id}.{table_id}"
+    print(f"Cargando '{parquet_path}' a BigQuery tabla: {table_full_id} (modo: {load_mode})")
+
+    try:
+        if client is None:
+            client = _bigquery().Client(project=project_id)
+        with open(parquet_path, 'rb') as parquet_file:
+            def start_load_job(destination, job_config):
+                parquet_file.seek(0)
+                return client.load_table_from_file(parquet_file, destination, job_config=job_config)
+
+            _run_load(client, table_full_id, load_mode, start_load_job, "PARQUET")
+        return True
 
     except Exception as e:
         print(f"Error al cargar datos a BigQuery: {e}")
-        print(f"  - Detalles del error: {type(e).__name__}")
\ No newline at end of file
+        print(f"  - Detalles del error: {type(e).__name__}")
+        return False
@@ -0,0 +1,287 @@
+"""
+Huellas por contenedor de noticia para saltar los bloques que no cambiaron desde la ejecución anterior.
+
+Cada 'div.contenedor_dato_modulo' recibe dos hashes calculados en un solo recorrido de
+su subárbol (sobre el mismo documento parseado que luego usa la extracción):
+* esqueleto: etiquetas, clases y anidamiento, sin textos ni atributos variables;
+* contenido: textos y los atributos 'href'/'src' que usan los extractores.
+
+Las huellas de cada página se guardan por ejecución en SQLite. Un bloque cuyo par
+(esqueleto, contenido) ya apareció en la última ejecución de esa página no se extrae ni
+pasa al procesamiento; un bloque modificado sí, y main.py carga con 'merge' para que
+actualice la fila de su 'link' en lugar de duplicarla. Si una parte de los esqueletos
+de la página no aparecía en la ejecución anterior, el layout cambió: se emite una
+alerta (log con severidad WARNING) y,
+si hay un extractor con modelo, la página pasa a extraerse con él. La página vuelve a los
+selectores cuando el modelo ya no recupera ninguna noticia que ellos no encuentren.
+
+Como ArticleIndex, lo registrado queda pendiente hasta commit(): si la carga falla, la
+siguiente ejecución vuelve a extraer los mismos bloques.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from lxml import etree
+from lxml import html as lxml_html
+
+import modules.metrics as metrics
+import modules.scraper as scraper
+
+DEFAULT_KEEP_RUNS = 20 # Ejecuciones cuyas huellas se conservan
+DEFAULT_LAYOUT_CHANGE_SHARE = 0.2 # Fracción de contenedores con esqueleto nuevo que se considera cambio de layout
+CONTENT_ATTRIBUTES = ("href", "src")
+
+
+def block_fingerprint(container):
+    """
+    Hashes de esqueleto y de contenido de un contenedor, en un solo recorrido de su subárbol.
+
+    Returns:
+        tuple: (hash del esqueleto, hash del contenido), en hexadecimal.
+    """
+    skeleton = hashlib.sha1()
+    content = hashlib.sha1()
+    for event, element in etree.iterwalk(container, events=("start", "end")):
+        if not isinstance(element.tag, str): # Comentarios e instrucciones: solo cuenta su 'tail'
+            if event == "end" and element.tail and element.tail.strip():
+                content.update(element.tail.strip().encode('utf-8') + b"\x1f")
+            continue
+        if event == "start":
+            skeleton.update(f"<{element.tag}.{'.'.join(sorted((element.get('class') or '').split()))}".encode('utf-8'))
+            if element.text and element.text.strip():
+                content.update(element.text.strip().encode('utf-8') + b"\x1f")
+            for attribute in CONTENT_ATTRIBUTES:
+                value = element.get(attribute)
+                if value:
+                    content.update(f"{attribute}={value}\x1f".encode('utf-8'))
+        else:
+            skeleton.update(b">")
+            if element is not container and element.tail and element.tail.strip():
+                content.update(element.tail.strip().encode('utf-8') + b"\x1f")
+    return skeleton.hexdigest(), content.hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class FingerprintStore:
+    """
+    Huellas de los contenedores por ejecución y página (SQLite), y páginas con el modelo seleccionado.
+
+    Abrir el store inicia una ejecución nueva; sus huellas y la propia ejecución quedan
+    pendientes hasta commit(), que además borra las ejecuciones más antiguas que 'keep_runs'.
+    """
+
+    def __init__(self, db_path, keep_runs=DEFAULT_KEEP_RUNS):
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.db_path = db_path
+        self.keep_runs = keep_runs
+        # El crawler extrae páginas desde varios hilos: conexión compartida con lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS block_fingerprints (
+                run_id INTEGER NOT NULL,
+                page_url TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                skeleton_hash TEXT NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_block_fingerprints_page ON block_fingerprints (page_url, run_id);
+            CREATE TABLE IF NOT EXISTS model_pages (
+                page_url TEXT PRIMARY KEY,
+                selected_at TEXT NOT NULL
+            );
+        """)
+        self.connection.commit()
+        self.run_id = self.connection.execute("INSERT INTO runs (started_at) VALUES (?)", (_now(),)).lastrowid
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def previous_fingerprints(self, page_url):
+        """Huellas (esqueleto, contenido) de la última ejecución confirmada que vio la página, o None."""
+        with self._lock:
+            rows = self.connection.execute(
+                """
+                SELECT skeleton_hash, content_hash FROM block_fingerprints
+                WHERE page_url = ? AND run_id = (
+                    SELECT MAX(run_id) FROM block_fingerprints WHERE page_url = ? AND run_id < ?
+                )
+                """,
+                (page_url, page_url, self.run_id),
+            ).fetchall()
+        return rows or None
+
+    def record(self, page_url, fingerprints):
+        """Registra (pendiente de commit) las huellas de los contenedores de la página, en orden."""
+        with self._lock:
+            self.connection.executemany(
+                "INSERT INTO block_fingerprints (run_id, page_url, position, skeleton_hash, content_hash) VALUES (?, ?, ?, ?, ?)",
+                [(self.run_id, page_url, position, skeleton, content) for position, (skeleton, content) in enumerate(fingerprints)],
+            )
+
+    def model_selected(self, page_url):
+        with self._lock:
+            return self.connection.execute("SELECT 1 FROM model_pages WHERE page_url = ?", (page_url,)).fetchone() is not None
+
+    def select_model(self, page_url, selected=True):
+        """Marca (pendiente de commit) que la página se extrae con el modelo, o la devuelve a los selectores."""
+        with self._lock:
+            if selected:
+                self.connection.execute("INSERT OR REPLACE INTO model_pages (page_url, selected_at) VALUES (?, ?)", (page_url, _now()))
+            else:
+                self.connection.execute("DELETE FROM model_pages WHERE page_url = ?", (page_url,))
+
+    def commit(self):
+        with self._lock:
+            self.connection.execute("DELETE FROM block_fingerprints WHERE run_id <= ?", (self.run_id - self.keep_runs,))
+            self.connection.execute("DELETE FROM runs WHERE run_id <= ?", (self.run_id - self.keep_runs,))
+            self.connection.commit()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+class ChangeFilter:
+    """
+    Extractor que solo extrae los contenedores nuevos o modificados (ver el docstring del módulo).
+
+    Tiene la misma interfaz que HybridExtractor (parse_page, report), así que se pasa como
+    'extractor=' al scraper y al crawler.
+    """
+
+    def __init__(self, store, extractor=None, model_extractor_factory=None, skip_unchanged=True,
+                 layout_change_share=DEFAULT_LAYOUT_CHANGE_SHARE):
+        """
+        Args:
+            store (FingerprintStore): Huellas de las ejecuciones.
+            extractor (HybridExtractor): Extractor de los bloques a extraer (None = selectores).
+            model_extractor_factory (callable): Crea el extractor con modelo (p. ej. un HybridExtractor)
+                                                para las páginas cuyo layout cambió; se llama solo si hace falta.
+            skip_unchanged (bool): Si es False, todas las huellas se calculan y guardan pero todo se extrae.
+            layout_change_share (float): Fracción de contenedores con esqueleto nuevo que dispara la alerta.
+        """
+        self.store = store
+        self.extractor = extractor
+        self.model_extractor_factory = model_extractor_factory
+        self.skip_unchanged = skip_unchanged
+        self.layout_change_share = layout_change_share
+        self._model_extractor = None
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(("pages", "blocks", "unchanged", "extracted", "layout_changes", "model_pages"), 0)
+
+    def parse_page(self, page_html, page_url=scraper.TARGET_URL):
+        """
+        Extrae las noticias de los contenedores nuevos o modificados de un HTML completo.
+
+        Returns:
+            tuple: (news_data, total_contenedores), con el total de la página (incluidos los saltados).
+        """
+        if not page_html:
+            return [], 0
+        containers = lxml_html.fromstring(page_html).xpath(scraper.NEWS_CONTAINER_XPATH)
+        with metrics.span("block_fingerprint", containers=len(containers)):
+            fingerprints = [block_fingerprint(container) for container in containers]
+        previous = self.store.previous_fingerprints(page_url)
+
+        layout_changed = False
+        if previous is not None and containers:
+            previous_skeletons = {skeleton for skeleton, _ in previous}
+            new_skeletons = sum(skeleton not in previous_skeletons for skeleton, _ in fingerprints)
+            layout_changed = new_skeletons / len(containers) >= self.layout_change_share
+            if layout_changed:
+                self._alert(page_url, new_skeletons, len(containers), previous, fingerprints)
+
+        if self.skip_unchanged and previous is not None:
+            known = set(previous)
+            changed = [container for container, fingerprint in zip(containers, fingerprints) if fingerprint not in known]
+        else:
+            changed = containers
+
+        model_extractor = self._get_model_extractor(page_url, layout_changed) if changed else None
+        if model_extractor is not None:
+            news_data, recovered = model_extractor.parse_containers(changed, page_url)
+            if recovered == 0 and not layout_changed:
+                # Los selectores ya encuentran todas las noticias del layout nuevo
+                print(f"Los selectores vuelven a cubrir {page_url}: deja de usarse el modelo para esta página.")
+                self.store.select_model(page_url, False)
+        elif self.extractor is not None:
+            news_data, _ = self.extractor.parse_containers(changed, page_url)
+        else:
+            news_data = scraper.extract_containers(changed, page_url)
+        self.store.record(page_url, fingerprints)
+
+        unchanged = len(containers) - len(changed)
+        if unchanged:
+            print(f"{page_url}: {unchanged} de {len(containers)} contenedores sin cambios desde la ejecución anterior; se extraen {len(changed)}.")
+        self._count(pages=1, blocks=len(containers), unchanged=unchanged, extracted=len(changed),
+                    layout_changes=int(layout_changed), model_pages=int(model_extractor is not None))
+        metrics.increment("containers_found", len(containers))
+        metrics.increment("blocks_unchanged", unchanged)
+        metrics.increment("articles_kept", len(news_data))
+        metrics.increment("articles_dropped", len(changed) - len(news_data))
+        return news_data, len(containers)
+
+    def _alert(self, page_url, new_skeletons, total, previous, fingerprints):
+        previous_layout = Counter(skeleton for skeleton, _ in previous).most_common(1)[0][0]
+        current_layout = Counter(skeleton for skeleton, _ in fingerprints).most_common(1)[0][0]
+        message = (f"Cambio de layout en {page_url}: {new_skeletons} de {total} contenedores con una estructura "
+                   f"que no aparecía en la ejecución anterior.")
+        print(f"ALERTA: {message}")
+        metrics.increment("layout_changes")
+        metrics.emit("layout_change", message, severity="WARNING", page_url=page_url, new_skeletons=new_skeletons,
+                     containers=total, previous_skeleton=previous_layout, current_skeleton=current_layout)
+
+    def _get_model_extractor(self, page_url, layout_changed):
+        """Extractor con modelo para la página si su layout cambió (ahora o en una ejecución anterior sin resolver)."""
+        if self.model_extractor_factory is None:
+            return None
+        if layout_changed:
+            self.store.select_model(page_url)
+        elif not self.store.model_selected(page_url):
+            return None
+        with self._lock:
+            if self._model_extractor is None:
+                try:
+                    self._model_extractor = self.model_extractor_factory()
+                    print("Layout cambiado: las páginas afectadas se extraen con el modelo ML como fallback de los selectores.")
+                except Exception as e:
+                    print(f"No se pudo cargar el extractor con modelo ({e}). Se siguen usando los selectores.")
+                    self.model_extractor_factory = None
+                    return None
+            return self._model_extractor
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self.stats[name] += value
+
+    def report(self):
+        """Resumen de bloques saltados y cambios de layout (y el del extractor con modelo, si se usó)."""
+        for extractor in (self.extractor, self._model_extractor):
+            if extractor is not None:
+                extractor.report()
+        with self._lock:
+            stats = dict(self.stats)
+        blocks = stats["blocks"] or 1
+        print(f"Huellas de bloques: {stats['pages']} páginas, {stats['blocks']} contenedores, "
+              f"{stats['unchanged'] / blocks:.1%} sin cambios (no extraídos), {stats['layout_changes']} cambios de layout.")
+        metrics.emit("block_fingerprint", "Contenedores sin cambios saltados",
+                     unchanged_rate=round(stats["unchanged"] / blocks, 4), **stats)
+        return stats
@@ -0,0 +1,271 @@
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import modules.metrics as metrics
+import modules.page_readiness as page_readiness
+# Selenium se importa dentro de las funciones que crean navegadores: el backend HTTP y el
+# crawler no lo necesitan y su import cuesta ~0.2 s en cada arranque del Job
+
+# --- Configuración ---
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+# Archivo donde se guarda la ruta del chromedriver ya resuelto, para no consultar la red en cada arranque
+DRIVER_PATH_CACHE_FILE = os.environ.get(
+    "CHROMEDRIVER_CACHE_FILE",
+    os.path.join(os.path.expanduser("~"), ".cache", "yogonet-scraper", "chromedriver.json"),
+)
+DEFAULT_POOL_SIZE = 1
+DEFAULT_MAX_PAGES_PER_SESSION = 50 # Páginas antes de reciclar una sesión
+DEFAULT_MAX_RSS_MB = 1024 # Memoria (chromedriver + Chrome) a partir de la cual se recicla una sesión
+# 'eager': driver.get vuelve con el DOM listo, sin esperar a imágenes ni iframes; los
+# scrapers esperan después a sus contenedores con page_readiness
+DEFAULT_PAGE_LOAD_STRATEGY = "eager"
+
+
+def build_chrome_options(headless=True, page_load_strategy=DEFAULT_PAGE_LOAD_STRATEGY):
+    """Opciones de Chrome comunes a todos los scrapers del proyecto."""
+    from selenium.webdriver.chrome.options import Options
+    chrome_options = Options()
+    chrome_options.page_load_strategy = page_load_strategy
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("window-size=1920x1080")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    return chrome_options
+
+
+def resolve_driver_path():
+    """
+    Devuelve la ruta del binario de chromedriver, resolviéndola por red solo la primera vez.
+
+    Orden: variable de entorno CHROMEDRIVER_PATH, ruta guardada en DRIVER_PATH_CACHE_FILE
+    y, por último, ChromeDriverManager().install() (cuyo resultado se guarda en el cache).
+
+    Returns:
+        str: Ruta al ejecutable, o None si no se pudo resolver (Selenium lo buscará en el PATH).
+    """
+    env_path = os.environ.get("CHROMEDRIVER_PATH")
+    if env_path and os.path.exists(env_path):
+        return env_path
+
+    try:
+        with open(DRIVER_PATH_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached_path = json.load(f).get("driver_path")
+        if cached_path and os.path.exists(cached_path):
+            return cached_path
+    except (OSError, ValueError):
+        pass
+
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        print("Instalando/Actualizando ChromeDriver...")
+        driver_path = ChromeDriverManager().install()
+    except Exception as e:
+        print(f"Fallo con webdriver-manager: {e}")
+        return None
+
+    try:
+        os.makedirs(os.path.dirname(DRIVER_PATH_CACHE_FILE), exist_ok=True)
+        with open(DRIVER_PATH_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"driver_path": driver_path}, f)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar la ruta de ChromeDriver en cache: {e}")
+    return driver_path
+
+
+def create_driver(headless=True, blocked_url_patterns=None, page_load_strategy=DEFAULT_PAGE_LOAD_STRATEGY):
+    """
+    Configura e inicia un WebDriver de Chrome con el chromedriver cacheado.
+
+    Args:
+        blocked_url_patterns (list): Patrones de URL que no se descargan (ver
+                                     page_readiness.block_resources). None = los de por
+                                     defecto; lista vacía = sin bloqueo.
+
+    Returns:
+        webdriver.Chrome: El driver iniciado, o None si no se pudo iniciar.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+
+    chrome_options = build_chrome_options(headless, page_load_strategy)
+    try:
+        with metrics.span("webdriver_start"):
+            driver_path = resolve_driver_path()
+            if driver_path:
+                driver = webdriver.Chrome(service=ChromeService(driver_path), options=chrome_options)
+            else:
+                print("Intentando ruta local de chromedriver (asegúrate que esté en PATH)...")
+                driver = webdriver.Chrome(options=chrome_options)
+            page_readiness.block_resources(driver, blocked_url_patterns)
+        print("WebDriver iniciado correctamente.")
+        return driver
+    except Exception as e:
+        print(f"Error al iniciar WebDriver: {e}")
+        print("Asegúrate de que Google Chrome y ChromeDriver estén correctamente instalados y en el PATH,")
+        print("o que la ruta del binario de Chrome esté especificada en las opciones si ejecutas en Docker.")
+        return None
+
+
+def _process_tree_rss_mb(pid):
+    """Suma la memoria residente (MB) de un proceso y sus descendientes. Solo Linux (/proc)."""
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children", 'r') as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+def driver_rss_mb(driver):
+    """Memoria residente (MB) de chromedriver y el navegador que controla, o 0 si no se puede medir."""
+    try:
+        return _process_tree_rss_mb(driver.service.process.pid)
+    except AttributeError:
+        return 0
+
+
+class _Session:
+    """Un WebDriver del pool junto con el número de páginas que ha servido."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Pool de sesiones de Chrome reutilizables entre páginas.
+
+    Las sesiones se crean bajo demanda (o todas a la vez con warm_up) hasta 'size',
+    se entregan una por URL con session() y se reciclan tras 'max_pages_per_session'
+    páginas o cuando chromedriver + Chrome superan 'max_rss_mb'.
+
+    'readiness' (page_readiness.PageReadiness) es la política de espera que usan los
+    scrapers con las sesiones del pool.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages_per_session=DEFAULT_MAX_PAGES_PER_SESSION,
+                 max_rss_mb=DEFAULT_MAX_RSS_MB, headless=True, blocked_url_patterns=None,
+                 page_load_strategy=DEFAULT_PAGE_LOAD_STRATEGY, readiness=None):
+        self.size = max(1, size)
+        self.max_pages_per_session = max_pages_per_session
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.blocked_url_patterns = blocked_url_patterns
+        self.page_load_strategy = page_load_strategy
+        self.readiness = readiness or page_readiness.PageReadiness()
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def warm_up(self):
+        """Arranca todas las sesiones del pool por adelantado."""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            session = self._new_session()
+            if session is None:
+                return
+            self._idle.put(session)
+
+    def _new_session(self):
+        driver = create_driver(self.headless, self.blocked_url_patterns, self.page_load_strategy)
+        if driver is None:
+            with self._lock:
+                self._created -= 1
+            return None
+        return _Session(driver)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            return self._new_session()
+        return self._idle.get()
+
+    def _discard(self, session):
+        try:
+            session.driver.quit()
+        except Exception as e:
+            print(f"Error al cerrar el WebDriver: {e}")
+        with self._lock:
+            self._created -= 1
+
+    def _needs_recycle(self, session):
+        if self.max_pages_per_session and session.pages >= self.max_pages_per_session:
+            print(f"Reciclando sesión de Chrome tras {session.pages} páginas.")
+            return True
+        if self.max_rss_mb:
+            rss_mb = driver_rss_mb(session.driver)
+            if rss_mb > self.max_rss_mb:
+                print(f"Reciclando sesión de Chrome: {rss_mb:.0f} MB > {self.max_rss_mb} MB.")
+                return True
+        return False
+
+    @contextmanager
+    def session(self):
+        """
+        Entrega un WebDriver del pool para procesar una página.
+
+        Yields:
+            webdriver.Chrome: El driver, o None si no se pudo iniciar Chrome.
+        """
+        session = self._acquire()
+        if session is None:
+            yield None
+            return
+        healthy = False
+        try:
+            yield session.driver
+            healthy = True
+        finally:
+            session.pages += 1
+            if self._closed or not healthy or self._needs_recycle(session):
+                self._discard(session)
+            else:
+                self._idle.put(session)
+
+    def close(self):
+        """Cierra todas las sesiones inactivas del pool."""
+        self._closed = True
+        closed = 0
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(session)
+            closed += 1
+        if closed:
+            print(f"Pool de WebDriver cerrado ({closed} sesiones).")
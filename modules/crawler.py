@@ -0,0 +1,267 @@
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse
+from lxml import html as lxml_html
+
+import modules.scraper as scraper
+
+# --- Configuración por defecto ---
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 2 # Peticiones simultáneas máximas contra un mismo host
+DEFAULT_DELAY = 1.0 # Segundos mínimos entre dos peticiones al mismo host
+
+# Enlaces de paginación que se siguen cuando no hay plantilla de URL
+NEXT_PAGE_XPATH = (
+    "//link[@rel='next']/@href | //a[@rel='next']/@href"
+    " | //a[contains(concat(' ', normalize-space(@class), ' '), ' siguiente ')]/@href"
+)
+
+
+class _HostLimiter:
+    """Limita la concurrencia por host y respeta un retardo mínimo entre peticiones."""
+
+    def __init__(self, per_host_limit, delay):
+        self.per_host_limit = per_host_limit
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._semaphores[host]
+
+    def _reserve_slot(self, host):
+        """Reserva el siguiente instante libre para el host y devuelve cuánto hay que esperar."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+            return slot - now
+
+    def fetch(self, url, article_index=None, archive=None):
+        host = urlparse(url).netloc
+        with self._semaphore(host):
+            pause = self._reserve_slot(host)
+            if pause > 0:
+                time.sleep(pause)
+            return scraper.fetch_page_http(url, article_index=article_index, archive=archive)
+
+
+def build_page_url(seed_url, page, page_url_template=None):
+    """
+    Construye la URL de la página 'page' (1 = la propia semilla) de un listado.
+
+    Args:
+        seed_url (str): URL de la primera página del listado.
+        page (int): Número de página, empezando en 1.
+        page_url_template (str): Plantilla con los campos '{seed}' y '{page}',
+                                 p. ej. '{seed}?page={page}'. None si no se usa plantilla.
+    """
+    if page == 1 or not page_url_template:
+        return seed_url
+    return page_url_template.format(seed=seed_url, page=page)
+
+
+def find_next_page_url(page_html, page_url):
+    """Devuelve la URL absoluta del enlace 'siguiente página' del HTML, o None si no existe."""
+    try:
+        hrefs = lxml_html.fromstring(page_html).xpath(NEXT_PAGE_XPATH)
+    except Exception:
+        return None
+    return urljoin(page_url, hrefs[0]) if hrefs else None
+
+
+def _parse_articles(page_html, page_url, extractor=None):
+    news_data, _ = scraper.parse_news_html(page_html, page_url, extractor)
+    return news_data
+
+
+def _iter_crawled_pages(seed_urls, max_pages, page_url_template, max_workers, per_host_limit,
+                        delay, article_index, stats, parse_page=_parse_articles, archive=None):
+    """
+    Descarga y parsea las páginas de forma concurrente y las entrega a medida que terminan.
+
+    Como mucho hay 2 * max_workers páginas en vuelo: si el consumidor del generador se
+    retrasa, no se encolan más descargas (el resto de URLs espera en 'to_submit').
+
+    Args:
+        parse_page (callable): (html, url) -> lista de elementos de la página. Por defecto
+                               las noticias; una lista vacía detiene la paginación.
+        archive (SnapshotArchive): Archivo donde guardar cada página descargada (opcional).
+
+    Yields:
+        tuple: (índice_semilla, página, URL, lista de elementos) por cada página descargada.
+    """
+    limiter = _HostLimiter(per_host_limit, delay)
+    max_in_flight = max(1, max_workers) * 2
+    visited = set()
+    to_submit = deque()
+
+    def fetch_and_parse(url):
+        page_html = limiter.fetch(url, article_index, archive)
+        if page_html is None or page_html is scraper.NOT_MODIFIED:
+            return page_html, []
+        return page_html, parse_page(page_html, url)
+
+    def enqueue(seed_index, page, url):
+        if url in visited:
+            return
+        visited.add(url)
+        to_submit.append((seed_index, page, url))
+
+    for seed_index, seed_url in enumerate(seed_urls):
+        if page_url_template:
+            for page in range(1, max_pages + 1):
+                enqueue(seed_index, page, build_page_url(seed_url, page, page_url_template))
+        else:
+            enqueue(seed_index, 1, seed_url)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        while to_submit or pending:
+            while to_submit and len(pending) < max_in_flight:
+                seed_index, page, url = to_submit.popleft()
+                pending[executor.submit(fetch_and_parse, url)] = (seed_index, page, url)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                seed_index, page, url = pending.pop(future)
+                try:
+                    page_html, news_data = future.result()
+                except Exception as e:
+                    print(f"Error procesando la página {url}: {e}")
+                    page_html, news_data = None, []
+                if page_html is None:
+                    stats["failed"] += 1
+                    continue
+                if page_html is scraper.NOT_MODIFIED:
+                    stats["not_modified"] += 1
+                    continue
+                stats["downloaded"] += 1
+                if not page_url_template and page < max_pages and news_data:
+                    next_url = find_next_page_url(page_html, url)
+                    if next_url:
+                        enqueue(seed_index, page + 1, next_url)
+                yield seed_index, page, url, news_data
+
+
+def _print_summary(stats, elapsed, unique_articles):
+    print(f"Crawler finalizado ({elapsed:.2f} s): {stats['downloaded']} páginas descargadas, {stats['not_modified']} sin cambios, {stats['failed']} fallidas, {unique_articles} noticias únicas.")
+
+
+def crawl(seed_urls, max_pages=1, page_url_template=None, max_workers=DEFAULT_MAX_WORKERS,
+          per_host_limit=DEFAULT_PER_HOST_LIMIT, delay=DEFAULT_DELAY, article_index=None, archive=None,
+          extractor=None):
+    """
+    Recorre de forma concurrente varias secciones y páginas de Yogonet por HTTP.
+
+    Con 'page_url_template' todas las páginas se conocen de antemano y se descargan en
+    paralelo; sin plantilla se sigue el enlace 'siguiente' de cada página descargada.
+
+    Args:
+        seed_urls (list): URLs de la primera página de cada sección/edición.
+        max_pages (int): Profundidad de paginación por semilla (1 = solo la primera página).
+        page_url_template (str): Plantilla de paginación (ver build_page_url), opcional.
+        max_workers (int): Tamaño del pool de hilos.
+        per_host_limit (int): Peticiones simultáneas máximas por host.
+        delay (float): Segundos mínimos entre peticiones al mismo host.
+        article_index (ArticleIndex): Índice incremental para peticiones condicionales (opcional).
+                                      Las páginas sin cambios (304) no se parsean ni se paginan.
+        archive (SnapshotArchive): Archivo donde guardar cada página descargada, para
+                                   re-ejecutar el pipeline sin red (opcional).
+        extractor (HybridExtractor): Extractor selectores + modelo ML para las noticias (opcional).
+
+    Returns:
+        list: Lista de diccionarios con 'title', 'kicker', 'image_url' y 'link',
+              sin enlaces duplicados y en orden de semilla y página.
+    """
+    if not seed_urls:
+        print("No hay URLs semilla para el crawler.")
+        return []
+
+    print(f"Iniciando crawler: {len(seed_urls)} semillas, hasta {max_pages} páginas por semilla, {max_workers} workers.")
+    start_time = time.perf_counter()
+    stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
+    results = {} # (índice_semilla, página) -> lista de artículos
+    for seed_index, page, _, page_news in _iter_crawled_pages(
+        seed_urls, max_pages, page_url_template, max_workers, per_host_limit, delay, article_index, stats,
+        parse_page=functools.partial(_parse_articles, extractor=extractor), archive=archive,
+    ):
+        results[(seed_index, page)] = page_news
+
+    news_data = []
+    seen_links = set()
+    for key in sorted(results):
+        for article in results[key]:
+            if article["link"] not in seen_links:
+                seen_links.add(article["link"])
+                news_data.append(article)
+
+    _print_summary(stats, time.perf_counter() - start_time, len(news_data))
+    return news_data
+
+
+def iter_crawl(seed_urls, max_pages=1, page_url_template=None, max_workers=DEFAULT_MAX_WORKERS,
+               per_host_limit=DEFAULT_PER_HOST_LIMIT, delay=DEFAULT_DELAY, article_index=None, archive=None,
+               extractor=None):
+    """
+    Versión en streaming de crawl(): entrega cada noticia en cuanto se parsea su página.
+
+    Mismos argumentos que crawl(). Las noticias salen en orden de llegada de las páginas
+    (no de semilla y página) y sin enlaces duplicados. Las descargas en vuelo están
+    acotadas, por lo que un consumidor lento frena el crawl en lugar de acumular páginas.
+
+    Yields:
+        dict: Noticia con 'title', 'kicker', 'image_url' y 'link'.
+    """
+    if not seed_urls:
+        print("No hay URLs semilla para el crawler.")
+        return
+
+    print(f"Iniciando crawler en streaming: {len(seed_urls)} semillas, hasta {max_pages} páginas por semilla, {max_workers} workers.")
+    start_time = time.perf_counter()
+    stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
+    seen_links = set()
+    for _, _, _, page_news in _iter_crawled_pages(
+        seed_urls, max_pages, page_url_template, max_workers, per_host_limit, delay, article_index, stats,
+        parse_page=functools.partial(_parse_articles, extractor=extractor), archive=archive,
+    ):
+        for article in page_news:
+            if article["link"] not in seen_links:
+                seen_links.add(article["link"])
+                yield article
+
+    _print_summary(stats, time.perf_counter() - start_time, len(seen_links))
+
+
+def iter_pages(seed_urls, parse_page, max_pages=1, page_url_template=None, max_workers=DEFAULT_MAX_WORKERS,
+               per_host_limit=DEFAULT_PER_HOST_LIMIT, delay=DEFAULT_DELAY):
+    """
+    Recorre las mismas páginas que crawl() pero con un parser propio (p. ej. para guardar
+    el HTML de los contenedores en lugar de las noticias ya extraídas).
+
+    Args:
+        parse_page (callable): (html, url) -> lista de elementos de la página.
+        Resto: como en crawl().
+
+    Yields:
+        tuple: (URL de la página, lista de elementos), en orden de llegada.
+    """
+    if not seed_urls:
+        print("No hay URLs semilla para el crawler.")
+        return
+
+    print(f"Iniciando crawler: {len(seed_urls)} semillas, hasta {max_pages} páginas por semilla, {max_workers} workers.")
+    start_time = time.perf_counter()
+    stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
+    for _, _, url, items in _iter_crawled_pages(
+        seed_urls, max_pages, page_url_template, max_workers, per_host_limit, delay, None, stats, parse_page
+    ):
+        yield url, items
+    print(f"Crawler finalizado ({time.perf_counter() - start_time:.2f} s): {stats['downloaded']} páginas descargadas, {stats['failed']} fallidas.")
@@ -0,0 +1,195 @@
+"""
+Extractor combinado: selectores CSS primero y el modelo ML solo para los bloques en que fallan.
+
+Cada contenedor pasa por las reglas de scraper.extract_article_fields (el coste de siempre).
+Solo si los selectores lanzan una excepción o dejan en "N/A" alguno de 'fallback_fields' (por
+defecto título y enlace, sin los que el bloque se descartaría), el bloque se envía al modelo de
+model_ML. Los campos "N/A" se completan con los del modelo y los que sí encontraron los
+selectores se conservan. Con los cuatro campos, los bloques sin kicker o sin imagen también
+pasan por el modelo. Los bloques que van al modelo en una
+misma página se clasifican con una sola predicción (scraper_model_ml.predict_page_batched).
+El resultado del modelo se guarda en un cache LRU por hash del HTML del bloque, así que un
+bloque repetido (entre páginas o secciones de una misma ejecución) no vuelve a predecirse.
+
+Los contadores 'blocks_selector', 'blocks_fallback', 'fallback_cache_hits',
+'fallback_model_blocks' y 'blocks_recovered' se acumulan en metrics.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from lxml import html as lxml_html
+
+import modules.metrics as metrics
+import modules.scraper as scraper
+
+ARTICLE_FIELDS = ("title", "kicker", "image_url", "link")
+DEFAULT_FALLBACK_FIELDS = ("title", "link") # Solo los bloques que se perderían van al modelo
+DEFAULT_CACHE_SIZE = 10000 # Bloques cuyo resultado del modelo se guarda
+STAT_NAMES = ("blocks", "selector", "fallback", "cache_hits", "model_blocks", "recovered")
+
+
+def block_hash(container):
+    """SHA-256 del HTML de un contenedor (clave del cache de resultados del modelo)."""
+    return hashlib.sha256(lxml_html.tostring(container, encoding="utf-8", with_tail=False)).hexdigest()
+
+
+def _is_valid(article):
+    return article["title"] not in ("", "N/A") and article["link"] not in ("", "N/A")
+
+
+class HybridExtractor:
+    """Extractor selectores + modelo ML (ver el docstring del módulo); seguro entre hilos."""
+
+    def __init__(self, model_pipeline=None, model_file=None, fallback_fields=DEFAULT_FALLBACK_FIELDS,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            model_pipeline: Modelo ya cargado. Si es None se carga 'model_file' (o el de
+                            scraper_model_ml), verificando antes los datos de NLTK.
+            fallback_fields (iterable): Campos que, si los selectores dejan en "N/A", envían el bloque al modelo.
+            cache_size (int): Entradas del cache LRU de resultados del modelo (0 = sin cache).
+        """
+        unknown = set(fallback_fields) - set(ARTICLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos desconocidos en fallback_fields: {sorted(unknown)}. Usa {ARTICLE_FIELDS}.")
+        if model_pipeline is None:
+            from model_ML import features, scraper_model_ml
+            features.check_nltk_data()
+            model_pipeline = scraper_model_ml.get_model(model_file or scraper_model_ml.MODEL_FILE)
+        self.model_pipeline = model_pipeline
+        self.fallback_fields = tuple(fallback_fields)
+        self.cache_size = cache_size
+        self._cache = OrderedDict() # hash del bloque -> campos predichos por el modelo
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(STAT_NAMES, 0)
+
+    @classmethod
+    def from_config(cls, config, section='extractor'):
+        """Lee model_file, fallback_fields y cache_size de la sección indicada."""
+        return cls(
+            model_file=config.get(section, 'model_file', fallback='') or None,
+            fallback_fields=config.get(section, 'fallback_fields', fallback='').split() or DEFAULT_FALLBACK_FIELDS,
+            cache_size=config.getint(section, 'cache_size', fallback=DEFAULT_CACHE_SIZE),
+        )
+
+    def parse_page(self, page_html, page_url=scraper.TARGET_URL):
+        """
+        Extrae las noticias de un HTML completo; misma interfaz que scraper.parse_news_html.
+
+        Returns:
+            tuple: (news_data, total_contenedores).
+        """
+        if not page_html:
+            return [], 0
+        containers = lxml_html.fromstring(page_html).xpath(scraper.NEWS_CONTAINER_XPATH)
+        news_data, _ = self.parse_containers(containers, page_url)
+        metrics.increment("containers_found", len(containers))
+        metrics.increment("articles_kept", len(news_data))
+        metrics.increment("articles_dropped", len(containers) - len(news_data))
+        return news_data, len(containers)
+
+    def parse_containers(self, containers, page_url=scraper.TARGET_URL):
+        """
+        Extrae las noticias de contenedores ya parseados (p. ej. solo los que cambiaron, ver block_fingerprint).
+
+        Returns:
+            tuple: (news_data, noticias que solo se obtuvieron gracias al modelo).
+        """
+        articles = []
+        needs_model = [] # Índices de los bloques que van al modelo
+        for i, container in enumerate(containers):
+            try:
+                article = scraper.extract_article_fields(container, page_url)
+            except Exception as e:
+                print(f"Error de los selectores en el bloque {i}: {e}. Se usa el modelo.")
+                article = dict.fromkeys(ARTICLE_FIELDS, "N/A")
+            articles.append(article)
+            if any(article[field] in ("", "N/A") for field in self.fallback_fields):
+                needs_model.append(i)
+
+        model_fields, cache_hits, model_blocks = self._predict_fields([containers[i] for i in needs_model])
+        recovered = 0
+        for i, fields in zip(needs_model, model_fields):
+            selector_valid = _is_valid(articles[i])
+            for field in ARTICLE_FIELDS:
+                if articles[i][field] in ("", "N/A") and fields[field] != "N/A":
+                    articles[i][field] = fields[field]
+            recovered += not selector_valid and _is_valid(articles[i])
+
+        news_data = [article for article in articles if _is_valid(article)]
+        self._count(blocks=len(containers), selector=len(containers) - len(needs_model), fallback=len(needs_model),
+                    cache_hits=cache_hits, model_blocks=model_blocks, recovered=recovered)
+        return news_data, recovered
+
+    def _predict_fields(self, containers):
+        """
+        Campos del modelo para cada contenedor, desde el cache o con una única predicción
+        para todos los que faltan.
+
+        Returns:
+            tuple: (lista de dicts de campos, aciertos de cache, bloques predichos).
+        """
+        if not containers:
+            return [], 0, 0
+        from model_ML import scraper_model_ml
+
+        hashes = [block_hash(container) for container in containers]
+        results = {}
+        with self._lock:
+            for key in hashes:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[key] = self._cache[key]
+        cache_hits = sum(key in results for key in hashes)
+
+        missing = {} # hash -> HTML del bloque (sin repetidos dentro de la página)
+        for key, container in zip(hashes, containers):
+            if key not in results and key not in missing:
+                missing[key] = lxml_html.tostring(container, encoding="unicode", with_tail=False)
+        if missing:
+            # Los bloques se reúnen en un documento: predict_page_batched los clasifica como
+            # si cada uno se hubiera parseado por separado, con una sola llamada a predict
+            page_html = "<html><body>" + "".join(missing.values()) + "</body></html>"
+            with metrics.span("model_fallback", blocks=len(missing)):
+                predictions_by_block = scraper_model_ml.predict_page_batched(page_html, self.model_pipeline)
+            if len(predictions_by_block) != len(missing): # Contenedores anidados: bloque a bloque
+                predictions_by_block = [scraper_model_ml.predict_block(block, self.model_pipeline) for block in missing.values()]
+            with self._lock:
+                for key, predictions in zip(missing, predictions_by_block):
+                    fields = scraper_model_ml.article_fields_from_predictions(predictions)
+                    results[key] = fields
+                    if self.cache_size > 0:
+                        self._cache[key] = fields
+                        if len(self._cache) > self.cache_size:
+                            self._cache.popitem(last=False)
+        return [results[key] for key in hashes], cache_hits, len(missing)
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self.stats[name] += value
+        metrics.increment("blocks_selector", values["selector"])
+        metrics.increment("blocks_fallback", values["fallback"])
+        metrics.increment("fallback_cache_hits", values["cache_hits"])
+        metrics.increment("fallback_model_blocks", values["model_blocks"])
+        metrics.increment("blocks_recovered", values["recovered"])
+
+    def report(self):
+        """Muestra (y emite como log JSON) la tasa de bloques resueltos por selectores y por el modelo."""
+        with self._lock:
+            stats = dict(self.stats)
+        return report_stats(stats)
+
+
+def report_stats(stats):
+    """Resumen de unos contadores del extractor (ver HybridExtractor.stats); los devuelve sin cambios."""
+    blocks = stats["blocks"] or 1
+    fallback = stats["fallback"] or 1
+    print(f"Extractor híbrido: {stats['blocks']} bloques, {stats['selector'] / blocks:.1%} resueltos por selectores, "
+          f"{stats['fallback'] / blocks:.1%} al modelo ({stats['cache_hits'] / fallback:.1%} desde el cache, "
+          f"{stats['model_blocks']} predichos), {stats['recovered']} noticias recuperadas por el modelo.")
+    metrics.emit("hybrid_extractor", "Tasa de fallback del extractor híbrido",
+                 selector_rate=round(stats["selector"] / blocks, 4), fallback_rate=round(stats["fallback"] / blocks, 4),
+                 cache_hit_rate=round(stats["cache_hits"] / fallback, 4), **stats)
+    return stats
@@ -0,0 +1,218 @@
+"""
+Instrumentación ligera del pipeline: tramos con tiempo (spans), contadores y logs JSON.
+
+Los módulos registran sus etapas con el registro global del proceso:
+
+    with metrics.span("page_load", url=url):
+        driver.get(url)
+    metrics.increment("articles_kept", len(news_data))
+
+Los tiempos y contadores se acumulan siempre (el coste es un perf_counter y un lock por
+tramo). Con 'json_logs = true' en la sección [metrics] de config.ini, además cada tramo
+se emite como una línea JSON en stdout con 'severity' y 'message', que Cloud Logging
+interpreta como log estructurado en Cloud Run. log_summary() emite el resumen final.
+
+La sección [metrics] también permite perfilar toda la ejecución con cProfile o tracemalloc
+(ver start_profiling / stop_profiling).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+PROFILERS = ("none", "cprofile", "tracemalloc")
+# Variables de entorno de Cloud Run Jobs que se adjuntan como etiquetas a cada log JSON
+CLOUD_RUN_LABELS = {"job": "CLOUD_RUN_JOB", "execution": "CLOUD_RUN_EXECUTION", "task_index": "CLOUD_RUN_TASK_INDEX"}
+DEFAULT_PROFILE_TOP = 25 # Funciones (cProfile) o líneas (tracemalloc) que se muestran
+
+
+class Metrics:
+    """Tiempos por tramo y contadores de una ejecución; seguro entre hilos."""
+
+    def __init__(self, json_logs=False, stream=None, labels=None):
+        self.json_logs = json_logs
+        self.stream = stream
+        self.labels = labels or {}
+        self._lock = threading.Lock()
+        self._spans = {} # nombre -> {'count', 'total_s', 'max_s', 'errors'}
+        self._counters = {}
+        self._start = time.perf_counter()
+
+    def emit(self, event, message=None, severity="INFO", **fields):
+        """Escribe una línea JSON de log estructurado (solo con json_logs activado)."""
+        if not self.json_logs:
+            return
+        record = {
+            "severity": severity,
+            "message": message or event,
+            "event": event,
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        }
+        if self.labels:
+            record["logging.googleapis.com/labels"] = self.labels
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            print(line, file=self.stream or sys.stdout, flush=True)
+
+    @contextmanager
+    def span(self, name, **fields):
+        """Mide el bloque 'with' y lo acumula bajo 'name'; los 'fields' solo van al log JSON."""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, failed, **fields)
+
+    def record(self, name, elapsed, failed=False, **fields):
+        """Acumula un tramo ya medido (p. ej. una parte de una espera) como si fuera un span."""
+        with self._lock:
+            stats = self._spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0})
+            stats["count"] += 1
+            stats["total_s"] += elapsed
+            stats["max_s"] = max(stats["max_s"], elapsed)
+            stats["errors"] += failed
+        self.emit("span", f"{name}: {elapsed * 1000:.1f} ms", severity="ERROR" if failed else "INFO",
+                  span=name, duration_ms=round(elapsed * 1000, 3), error=failed, **fields)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def summary(self):
+        """Copia de los tramos y contadores acumulados, y el tiempo total desde la creación."""
+        with self._lock:
+            spans = {
+                name: {**stats, "total_s": round(stats["total_s"], 6), "max_s": round(stats["max_s"], 6)}
+                for name, stats in self._spans.items()
+            }
+            counters = dict(self._counters)
+        return {"elapsed_s": round(time.perf_counter() - self._start, 3), "spans": spans, "counters": counters}
+
+    def log_summary(self):
+        """Muestra el resumen: una línea JSON con json_logs, o una tabla legible si no."""
+        summary = self.summary()
+        if self.json_logs:
+            self.emit("run_summary", f"Ejecución finalizada en {summary['elapsed_s']:.2f} s", **summary)
+            return
+        print(f"\nMétricas de la ejecución ({summary['elapsed_s']:.2f} s en total):")
+        for name, stats in sorted(summary["spans"].items(), key=lambda item: -item[1]["total_s"]):
+            errors = f", {stats['errors']} con error" if stats["errors"] else ""
+            print(f"  {name:24} {stats['total_s']:9.3f} s  ({stats['count']} veces, máx {stats['max_s']:.3f} s{errors})")
+        for name, value in sorted(summary["counters"].items()):
+            print(f"  {name:24} {value}")
+
+
+_registry = Metrics()
+_profiler = None # (tipo, perfilador, archivo de salida, top) mientras hay un perfil activo
+
+
+def get_metrics():
+    return _registry
+
+
+def span(name, **fields):
+    return _registry.span(name, **fields)
+
+
+def record(name, elapsed, failed=False, **fields):
+    _registry.record(name, elapsed, failed, **fields)
+
+
+def increment(name, value=1):
+    _registry.increment(name, value)
+
+
+def emit(event, message=None, severity="INFO", **fields):
+    _registry.emit(event, message, severity, **fields)
+
+
+def log_summary():
+    _registry.log_summary()
+
+
+def configure(config):
+    """
+    Aplica la sección [metrics] de config.ini al registro global.
+
+    Args:
+        config (configparser.ConfigParser): Configuración cargada (o None para los valores por defecto).
+    """
+    if config is None:
+        return
+    _registry.json_logs = config.getboolean('metrics', 'json_logs', fallback=False)
+    _registry.labels = {label: os.environ[variable] for label, variable in CLOUD_RUN_LABELS.items() if os.environ.get(variable)}
+
+
+def start_profiling(config):
+    """
+    Inicia el perfilado de [metrics] 'profile': none (por defecto), cprofile o tracemalloc.
+
+    Returns:
+        bool: True si se inició un perfilador.
+    """
+    global _profiler
+    kind = config.get('metrics', 'profile', fallback='none').strip().lower() if config is not None else 'none'
+    if kind not in PROFILERS:
+        print(f"Perfilador desconocido: '{kind}'. Usa uno de {PROFILERS}.")
+        return False
+    if kind == 'none':
+        return False
+    output_path = config.get('metrics', 'profile_output', fallback='').strip() or None
+    top = config.getint('metrics', 'profile_top', fallback=DEFAULT_PROFILE_TOP)
+    if kind == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        import tracemalloc
+        tracemalloc.start()
+        profiler = tracemalloc
+    _profiler = (kind, profiler, output_path, top)
+    print(f"Perfilado activado: {kind}.")
+    return True
+
+
+def stop_profiling():
+    """Detiene el perfilador activo y muestra (y guarda, si hay 'profile_output') sus resultados."""
+    global _profiler
+    if _profiler is None:
+        return
+    kind, profiler, output_path, top = _profiler
+    _profiler = None
+    if kind == 'cprofile':
+        import io
+        import pstats
+        profiler.disable()
+        if output_path:
+            profiler.dump_stats(output_path) # Se abre con pstats o snakeviz
+            print(f"Perfil de cProfile guardado en '{output_path}'.")
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+        print(report.getvalue())
+        return
+
+    snapshot = profiler.take_snapshot()
+    current_bytes, peak_bytes = profiler.get_traced_memory()
+    profiler.stop()
+    if output_path:
+        snapshot.dump(output_path) # Se carga con tracemalloc.Snapshot.load
+        print(f"Snapshot de tracemalloc guardado en '{output_path}'.")
+    top_lines = [
+        {"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics('lineno')[:top]
+    ]
+    if _registry.json_logs:
+        emit("tracemalloc", f"Pico de memoria Python: {peak_bytes / 1024 / 1024:.1f} MB",
+             current_mb=round(current_bytes / 1024 / 1024, 2), peak_mb=round(peak_bytes / 1024 / 1024, 2), top=top_lines)
+        return
+    print(f"\ntracemalloc: {current_bytes / 1024 / 1024:.1f} MB en uso, pico {peak_bytes / 1024 / 1024:.1f} MB. Líneas con más memoria:")
+    for line in top_lines:
+        print(f"  {line['size_kb']:10.1f} KB  {line['count']:7} bloques  {line['location']}")
@@ -0,0 +1,119 @@
+"""
+Detección de página lista para los scrapers con Selenium, en lugar de pausas fijas.
+
+PageReadiness.wait() espera al primer contenedor y después a que la página se asiente.
+Se considera asentada cuando el número de contenedores no cambia durante 'stable_ms' y
+el DOM no recibe mutaciones durante 'quiet_ms'; un MutationObserver instalado en la
+página registra la última mutación. Todo con topes configurables. Una página que ya
+llegó completa sale tras 'stable_ms' (medio segundo por defecto) en lugar de los 2 s fijos.
+
+block_resources() bloquea vía CDP las peticiones que el extractor no necesita (fuentes,
+imágenes, vídeo y scripts de terceros), para que la página se asiente antes.
+"""
+import time
+
+DEFAULT_READY_TIMEOUT = 30 # Segundos máximos hasta el primer contenedor
+DEFAULT_STABLE_MS = 500 # El número de contenedores no debe cambiar durante este tiempo
+DEFAULT_QUIET_MS = 300 # Sin mutaciones del DOM durante este tiempo
+DEFAULT_MAX_SETTLE = 5.0 # Segundos máximos de espera tras el primer contenedor
+DEFAULT_POLL_MS = 100
+# Recursos que el extractor nunca usa: solo lee el DOM (las imágenes, por su atributo src)
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*adservice.google.*", "*facebook.net*", "*hotjar.com*",
+]
+
+# Devuelve [contenedores, ms desde la última mutación]; instala el observador la primera vez
+_POLL_SCRIPT = """
+if (!window.__readinessLastMutation) {
+    window.__readinessLastMutation = performance.now();
+    new MutationObserver(function () { window.__readinessLastMutation = performance.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return [document.querySelectorAll(arguments[0]).length, performance.now() - window.__readinessLastMutation];
+"""
+
+
+class PageReadiness:
+    """Política de espera de página lista (ver el docstring del módulo)."""
+
+    def __init__(self, timeout=DEFAULT_READY_TIMEOUT, stable_ms=DEFAULT_STABLE_MS, quiet_ms=DEFAULT_QUIET_MS,
+                 max_settle=DEFAULT_MAX_SETTLE, poll_ms=DEFAULT_POLL_MS):
+        self.timeout = timeout
+        self.stable_ms = stable_ms
+        self.quiet_ms = quiet_ms
+        self.max_settle = max_settle
+        self.poll_ms = poll_ms
+
+    @classmethod
+    def from_config(cls, config, section='browser'):
+        """Lee ready_timeout, stable_ms, quiet_ms, max_settle_s y poll_ms de la sección indicada."""
+        if config is None:
+            return cls()
+        return cls(
+            timeout=config.getfloat(section, 'ready_timeout', fallback=DEFAULT_READY_TIMEOUT),
+            stable_ms=config.getint(section, 'stable_ms', fallback=DEFAULT_STABLE_MS),
+            quiet_ms=config.getint(section, 'quiet_ms', fallback=DEFAULT_QUIET_MS),
+            max_settle=config.getfloat(section, 'max_settle_s', fallback=DEFAULT_MAX_SETTLE),
+            poll_ms=config.getint(section, 'poll_ms', fallback=DEFAULT_POLL_MS),
+        )
+
+    def wait(self, driver, selector):
+        """
+        Espera a que 'selector' aparezca y la página se asiente.
+
+        Returns:
+            dict: 'containers' (número final), 'first_seconds' (hasta el primer contenedor),
+                  'settle_seconds' (asentamiento) y 'reason': 'stable' o 'max_settle' (tope alcanzado).
+
+        Raises:
+            selenium.common.exceptions.TimeoutException: Si no aparece ningún contenedor en 'timeout' s.
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        poll_seconds = self.poll_ms / 1000
+        start = time.monotonic()
+        count, since_mutation_ms = driver.execute_script(_POLL_SCRIPT, selector)
+        while not count:
+            if time.monotonic() - start >= self.timeout:
+                raise TimeoutException(f"Ningún elemento '{selector}' tras {self.timeout} s.")
+            time.sleep(poll_seconds)
+            count, since_mutation_ms = driver.execute_script(_POLL_SCRIPT, selector)
+
+        first_seen = last_change = time.monotonic()
+        reason = "max_settle"
+        while time.monotonic() - first_seen < self.max_settle:
+            stable_for_ms = (time.monotonic() - last_change) * 1000
+            if stable_for_ms >= self.stable_ms and since_mutation_ms >= self.quiet_ms:
+                reason = "stable"
+                break
+            time.sleep(poll_seconds)
+            new_count, since_mutation_ms = driver.execute_script(_POLL_SCRIPT, selector)
+            if new_count != count:
+                count, last_change = new_count, time.monotonic()
+        now = time.monotonic()
+        return {"containers": count, "first_seconds": first_seen - start, "settle_seconds": now - first_seen, "reason": reason}
+
+
+def block_resources(driver, url_patterns=None):
+    """
+    Bloquea las peticiones cuyas URL coinciden con los patrones (comodín '*') vía CDP.
+
+    Solo funciona con Chrome/Chromium; con otros navegadores no hace nada.
+
+    Returns:
+        bool: True si el bloqueo quedó activo.
+    """
+    patterns = DEFAULT_BLOCKED_URL_PATTERNS if url_patterns is None else url_patterns
+    if not patterns:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        return True
+    except Exception as e:
+        print(f"No se pudo activar el bloqueo de recursos: {e}")
+        return False
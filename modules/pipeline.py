@@ -0,0 +1,240 @@
+import os
+import queue
+import threading
+import time
+
+import modules.bigquery_handler as bigquery_handler
+import modules.metrics as metrics
+
+DEFAULT_MAX_PENDING_CHUNKS = 4 # Bloques procesados en espera de los destinos antes de frenar el scraping
+INDEX_FIELDS = ["title", "kicker", "image_url", "link"]
+_END_OF_STREAM = object()
+
+
+class CsvSink:
+    """
+    Escribe los bloques en un CSV local a medida que llegan (cabecera solo en el primero).
+
+    El CSV es un destino auxiliar: si falla la escritura se avisa y se deja de escribir,
+    pero el pipeline continúa.
+    """
+
+    name = "CSV"
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.rows = 0
+        self._file = None
+        self._failed = False
+
+    def write(self, dataframe):
+        if self._failed:
+            return True
+        try:
+            if self._file is None:
+                csv_dir = os.path.dirname(self.csv_path)
+                if csv_dir and not os.path.exists(csv_dir):
+                    os.makedirs(csv_dir)
+                    print(f"Directorio '{csv_dir}' creado.")
+                self._file = open(self.csv_path, 'w', encoding='utf-8-sig', newline='')
+            dataframe.to_csv(self._file, header=self.rows == 0, index=False)
+            self._file.flush()
+            self.rows += len(dataframe)
+        except Exception as e:
+            print(f"Error al guardar el DataFrame en CSV local: {e}")
+            self._failed = True
+        return True
+
+    def close(self, completed=True):
+        if self._file is not None:
+            self._file.close()
+            print(f"\n{self.rows} filas procesadas guardadas localmente en: {self.csv_path}")
+        return True
+
+
+class BigQuerySink:
+    """
+    Carga cada bloque a la tabla staging (<table_id>_staging) en cuanto llega y, al cerrar,
+    la pasa a la tabla destino con una sola sentencia (bigquery_handler.publish_staging).
+
+    Las filas llegan a BigQuery durante el crawl, pero la tabla destino solo cambia si el
+    pipeline termina: 'truncate' la reemplaza con toda la ejecución o no la toca, y 'merge'
+    hace un único MERGE. Si el pipeline no terminó se borra la staging.
+    """
+
+    name = "BigQuery"
+
+    def __init__(self, project_id, dataset_id, table_id, load_mode="truncate", client=None):
+        """
+        Args:
+            client: Cliente de BigQuery con load_table_from_dataframe, create_table, get_table,
+                    query y delete_table (None = bigquery.Client del proyecto).
+        """
+        self.target = (project_id, dataset_id, table_id)
+        self.load_mode = load_mode
+        self.client = client
+        self.rows = 0
+
+    def write(self, dataframe):
+        if dataframe is None or dataframe.empty:
+            return True
+        if self.client is None:
+            self.client = bigquery_handler.get_client(self.target[0])
+        loaded = bigquery_handler.load_df_to_staging(dataframe, *self.target, append=self.rows > 0, client=self.client)
+        if loaded:
+            self.rows += len(dataframe)
+        return loaded
+
+    def close(self, completed=True):
+        if self.rows == 0:
+            return True
+        if not completed:
+            print("El pipeline no terminó: la tabla destino no se toca y se borra la staging.")
+            bigquery_handler.drop_staging(*self.target, client=self.client)
+            return True
+        print(f"Pasando las {self.rows} filas de la ejecución a la tabla destino...")
+        return bigquery_handler.publish_staging(*self.target, load_mode=self.load_mode, client=self.client)
+
+
+class SpoolSink:
+    """
+    Guarda cada bloque en el spool Parquet y lo vacía a BigQuery cuando los archivos
+    pendientes alcanzan el tamaño de lote del spool, y al cerrar.
+
+    En modo 'truncate' no se carga nada hasta close(completed=True): un vaciado a mitad de
+    ejecución reemplazaría la tabla y, si el pipeline fallara después, la dejaría solo con
+    parte de los datos. Como BigQuerySink, una ejecución fallida no toca la tabla.
+    Sin 'bigquery_target' solo escribe en disco (los lotes quedan para otra ejecución).
+    """
+
+    name = "Spool"
+
+    def __init__(self, spool, bigquery_target=None, load_mode="append", max_retries=None, client=None):
+        self.spool = spool
+        self.bigquery_target = bigquery_target
+        self.load_mode = load_mode
+        self.max_retries = max_retries
+        self.client = client
+
+    def _flush(self):
+        kwargs = {"load_mode": self.load_mode, "client": self.client}
+        if self.max_retries is not None:
+            kwargs["max_retries"] = self.max_retries
+        return self.spool.flush_to_bigquery(*self.bigquery_target, **kwargs)
+
+    def write(self, dataframe):
+        self.spool.write_batch(dataframe)
+        if (self.bigquery_target and self.load_mode != "truncate"
+                and self.spool.pending_bytes() >= self.spool.max_batch_bytes):
+            return self._flush()
+        return True
+
+    def close(self, completed=True):
+        # Si el pipeline no terminó, los lotes quedan pendientes para la siguiente ejecución
+        if self.bigquery_target and completed:
+            return self._flush()
+        return True
+
+
+class IndexSink:
+    """Registra en el índice incremental (pendiente de commit) las noticias de cada bloque entregado."""
+
+    name = "Índice incremental"
+
+    def __init__(self, article_index):
+        self.article_index = article_index
+
+    def write(self, dataframe):
+        columns = [field for field in INDEX_FIELDS if field in dataframe.columns]
+        self.article_index.mark_seen(dataframe[columns].to_dict('records'))
+        return True
+
+    def close(self, completed=True):
+        return True
+
+
+def run_pipeline(chunks, sinks, max_pending_chunks=DEFAULT_MAX_PENDING_CHUNKS, preview_rows=5):
+    """
+    Envía bloques procesados a los destinos a medida que se generan.
+
+    Los destinos se ejecutan en un hilo propio conectado al productor por una cola acotada:
+    mientras un destino lento (p. ej. un job de BigQuery) trabaja, el scraping continúa
+    hasta llenar la cola y luego se bloquea (backpressure), de modo que la memoria queda
+    acotada a 'max_pending_chunks' bloques sin importar cuántas páginas se recorran.
+    Cada bloque pasa por los destinos en el orden de 'sinks'; si uno falla se deja de
+    producir y los siguientes bloques se descartan.
+
+    Args:
+        chunks (iterable): DataFrames procesados (p. ej. processor.iter_processed_chunks).
+        sinks (list): Destinos con métodos write(df) -> bool y close(completed) -> bool.
+        max_pending_chunks (int): Tamaño de la cola entre el productor y los destinos.
+        preview_rows (int): Filas del primer bloque que se muestran por consola (0 = ninguna).
+
+    Returns:
+        tuple: (bool, int) True si todos los bloques llegaron a todos los destinos, y el
+               número de filas entregadas.
+    """
+    chunk_queue = queue.Queue(maxsize=max(1, max_pending_chunks))
+    state = {"ok": True, "rows": 0, "chunks": 0, "first_delivery": None}
+    start_time = time.perf_counter()
+
+    def consume():
+        while True:
+            dataframe = chunk_queue.get()
+            if dataframe is _END_OF_STREAM:
+                return
+            if not state["ok"]:
+                continue # Vaciar la cola sin escribir para no bloquear al productor
+            for sink in sinks:
+                try:
+                    with metrics.span(f"sink:{sink.name}", rows=len(dataframe)):
+                        written = sink.write(dataframe)
+                except Exception as e:
+                    print(f"Error en el destino {sink.name}: {e}")
+                    written = False
+                if not written:
+                    print(f"El destino {sink.name} falló: se detiene el pipeline.")
+                    state["ok"] = False
+                    break
+            else:
+                state["rows"] += len(dataframe)
+                state["chunks"] += 1
+                if state["first_delivery"] is None:
+                    state["first_delivery"] = time.perf_counter() - start_time
+
+    consumer = threading.Thread(target=consume, name="pipeline-sinks", daemon=True)
+    consumer.start()
+    produced = 0
+    try:
+        for dataframe in chunks:
+            if not state["ok"]:
+                break
+            if produced == 0 and preview_rows:
+                print(f"\n--- DataFrame Procesado (primeras {preview_rows} filas del primer bloque) ---")
+                print(dataframe.head(preview_rows))
+            produced += 1
+            chunk_queue.put(dataframe) # Bloquea si los destinos van atrasados
+    except Exception as e:
+        print(f"Error durante el scraping/procesamiento en streaming: {e}")
+        state["ok"] = False
+    finally:
+        chunk_queue.put(_END_OF_STREAM)
+        consumer.join()
+        # Detener el productor (y las descargas en vuelo) si se salió antes de agotarlo
+        close_chunks = getattr(chunks, "close", None)
+        if close_chunks is not None:
+            close_chunks()
+
+    for sink in sinks:
+        try:
+            closed = sink.close(completed=state["ok"])
+        except Exception as e:
+            print(f"Error al cerrar el destino {sink.name}: {e}")
+            closed = False
+        if not closed:
+            state["ok"] = False
+
+    elapsed = time.perf_counter() - start_time
+    first_delivery = f"{state['first_delivery']:.2f} s" if state["first_delivery"] is not None else "-"
+    print(f"Pipeline finalizado ({elapsed:.2f} s): {state['rows']} filas en {state['chunks']} bloques entregadas; primer bloque entregado a los {first_delivery}.")
+    return state["ok"], state["rows"]
\ No newline at end of file
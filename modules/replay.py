@@ -0,0 +1,156 @@
+"""
+Re-ejecución del pipeline sobre el archivo de snapshots (ver snapshot_archive), sin red.
+
+Permite repetir la extracción, el procesamiento y la carga sobre meses de páginas ya
+descargadas, p. ej. tras cambiar los selectores o el modelo, o para rellenar una tabla
+nueva. Los snapshots se extraen en paralelo en un pool de procesos y cada noticia lleva
+como 'scrape_date' la fecha (UTC) de su snapshot, de modo que el backfill cae en las
+particiones de BigQuery de cuando se descargó la página.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import modules.metrics as metrics
+import modules.scraper as scraper
+from modules.snapshot_archive import SnapshotArchive
+
+EXTRACTORS = ("selectors", "model", "hybrid")
+DEFAULT_WORKERS = os.cpu_count() or 1
+_hybrid_extractor = None # Uno por proceso: su cache de bloques sirve para todos los snapshots del worker
+
+
+def _load_model(model_file):
+    from model_ML import features, scraper_model_ml
+    features.check_nltk_data()
+    return scraper_model_ml.get_model(model_file or scraper_model_ml.MODEL_FILE)
+
+
+def _get_hybrid_extractor(model_file):
+    global _hybrid_extractor
+    if _hybrid_extractor is None:
+        from modules.hybrid_extractor import HybridExtractor
+        _hybrid_extractor = HybridExtractor(model_pipeline=_load_model(model_file))
+    return _hybrid_extractor
+
+
+def extract_snapshot(task):
+    """
+    Extrae las noticias de un snapshot archivado (se ejecuta en los workers del pool).
+
+    Args:
+        task (tuple): (archive_dir, entrada del índice, extractor, model_file).
+
+    Returns:
+        tuple: (noticias del snapshot, cada una con 'scrape_date' = fecha de descarga (UTC);
+                contadores del extractor 'hybrid' para este snapshot, o None con los demás).
+    """
+    archive_dir, entry, extractor, model_file = task
+    page_html = SnapshotArchive(archive_dir).read(entry)
+    hybrid_stats = None
+    if extractor == "model":
+        from model_ML import scraper_model_ml
+        news_data = scraper_model_ml.extract_articles_with_model(page_html, _load_model(model_file))
+    elif extractor == "hybrid":
+        hybrid = _get_hybrid_extractor(model_file)
+        before = dict(hybrid.stats)
+        news_data, _ = hybrid.parse_page(page_html, entry["url"])
+        hybrid_stats = {name: value - before[name] for name, value in hybrid.stats.items()}
+    else:
+        news_data, _ = scraper.parse_news_html(page_html, entry["url"])
+    scrape_date = datetime.fromisoformat(entry["fetched_at"]).date()
+    return [{**article, "scrape_date": scrape_date} for article in news_data], hybrid_stats
+
+
+def iter_replayed_articles(archive, since=None, until=None, urls=None, extractor="selectors",
+                           workers=DEFAULT_WORKERS, model_file=None, shard=None):
+    """
+    Entrega las noticias de los snapshots archivados entre 'since' y 'until', en orden de descarga.
+
+    Como mucho hay 2 * workers snapshots en vuelo, así que un consumidor lento (p. ej. la
+    carga a BigQuery) frena la extracción en lugar de acumular resultados en memoria.
+    Un enlace que aparece en varios snapshots se entrega una sola vez, con la fecha del
+    primero (cuando se vio por primera vez).
+
+    Args:
+        archive (SnapshotArchive): Archivo de snapshots.
+        since, until (str): Rango de fechas 'AAAA-MM-DD' (inclusive), opcional.
+        urls (list): Solo los snapshots de estas URLs (None = todas).
+        extractor (str): 'selectors' (reglas de scraper.py), 'model' (modelo ML en modo por lotes)
+                         o 'hybrid' (selectores y el modelo solo para los bloques en que fallan).
+        workers (int): Procesos del pool (1 = en este proceso).
+        model_file (str): Modelo para el extractor 'model' (None = el de scraper_model_ml).
+        shard (tuple): (índice, total) para repartir los snapshots entre tareas (ver sharding);
+                       cada tarea toma uno de cada 'total'. None = todos.
+
+    Yields:
+        dict: Noticia con 'title', 'kicker', 'image_url', 'link' y 'scrape_date'.
+    """
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"Extractor desconocido: '{extractor}'. Usa uno de {EXTRACTORS}.")
+    entries = archive.entries(since, until, urls)
+    if shard is not None:
+        shard_index, shard_count = shard
+        entries = entries[shard_index::shard_count]
+    if not entries:
+        print(f"No hay snapshots archivados en '{archive.archive_dir}' para el rango indicado.")
+        return
+    if extractor in ("model", "hybrid"):
+        _load_model(model_file) # Falla aquí (datos NLTK, esquema) y no en cada worker
+
+    workers = max(1, min(workers, len(entries)))
+    print(f"Reproduciendo {len(entries)} snapshots ({entries[0]['fetched_at'][:10]} a {entries[-1]['fetched_at'][:10]}), extractor '{extractor}', {workers} workers.")
+    start_time = time.perf_counter()
+    tasks = ((archive.archive_dir, entry, extractor, model_file) for entry in entries)
+    seen_links = set()
+    failed = 0
+    hybrid_totals = {}
+    for entry, result in _map_bounded(extract_snapshot, tasks, workers):
+        if isinstance(result, Exception):
+            print(f"Error reproduciendo el snapshot '{entry['path']}' ({entry['url']}): {result}")
+            failed += 1
+            continue
+        news_data, hybrid_stats = result
+        for name, value in (hybrid_stats or {}).items():
+            hybrid_totals[name] = hybrid_totals.get(name, 0) + value
+        metrics.increment("snapshots_replayed")
+        metrics.increment("articles_kept", len(news_data))
+        for article in news_data:
+            if article["link"] not in seen_links:
+                seen_links.add(article["link"])
+                yield article
+
+    print(f"Replay finalizado ({time.perf_counter() - start_time:.2f} s): {len(entries) - failed} snapshots, {failed} fallidos, {len(seen_links)} noticias únicas.")
+    if hybrid_totals:
+        from modules.hybrid_extractor import report_stats
+        report_stats(hybrid_totals)
+
+
+def _map_bounded(function, tasks, workers):
+    """Aplica 'function' a las tareas en orden; con varios workers mantiene 2 * workers en vuelo."""
+    if workers == 1:
+        for task in tasks:
+            try:
+                yield task[1], function(task)
+            except Exception as e:
+                yield task[1], e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append((task[1], executor.submit(function, task)))
+            if len(pending) < workers * 2:
+                continue
+            yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+
+
+def _result(entry, future):
+    try:
+        return entry, future.result()
+    except Exception as e:
+        return entry, e
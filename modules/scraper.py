@@ -1,129 +1,430 @@
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urljoin
+from lxml import html as lxml_html
 
-def scrape_yogonet():
+import modules.browser_pool as browser_pool
+import modules.metrics as metrics
+import modules.page_readiness as page_readiness
+import modules.snapshot_archive as snapshot_archive
+
+# --- Configuración ---
+TARGET_URL = "https://www.yogonet.com/international/"
+BASE_URL = "https://www.yogonet.com" # Para construir URLs absolutas
+NEWS_CONTAINER_SELECTOR = "div.contenedor_dato_modulo"
+USER_AGENT = browser_pool.USER_AGENT
+HTTP_TIMEOUT = 15 # Segundos por petición en el backend HTTP
+HTTP_POOL_SIZE = 10 # Conexiones reutilizables por host
+
+_http_session = None # Sesión HTTP compartida (pool de conexiones), se crea bajo demanda
+NOT_MODIFIED = object() # Resultado de fetch_page_http cuando el servidor responde 304
+
+
+def _xpath_clases(tag, *clases):
+    """Traduce un selector CSS 'tag.clase1.clase2' a su equivalente XPath."""
+    condiciones = " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {clase} ')" for clase in clases
+    )
+    return f"{tag}[{condiciones}]"
+
+
+# Equivalentes XPath de los selectores CSS usados con Selenium (lxml no necesita cssselect así)
+NEWS_CONTAINER_XPATH = "//" + _xpath_clases("div", "contenedor_dato_modulo")
+KICKER_XPATH = ".//" + _xpath_clases("div", "volanta_titulo") + "//" + _xpath_clases("div", "volanta", "fuente_roboto_slab")
+TITLE_XPATH = ".//" + _xpath_clases("div", "volanta_titulo") + "//" + _xpath_clases("h2", "titulo", "fuente_roboto_slab")
+TITLE_LINK_XPATH = TITLE_XPATH + "//a"
+IMAGE_XPATH = ".//" + _xpath_clases("div", "imagen") + "//a//img"
+IMAGE_FALLBACK_XPATH = ".//" + _xpath_clases("div", "imagen") + "//img"
+
+
+def _primer_elemento(node, xpath):
+    """Devuelve el primer elemento que coincide con el XPath (como find_element), o None."""
+    encontrados = node.xpath(xpath)
+    return encontrados[0] if encontrados else None
+
+
+def _texto_visible(element):
+    """Aproxima el '.text' de Selenium: texto del elemento con los espacios normalizados."""
+    return " ".join(element.text_content().split())
+
+
+def extract_article_fields(container, page_url=TARGET_URL):
     """
-    Extrae datos del portal de noticias Yogonet International.
-    Utiliza selectores actualizados basados en la estructura HTML proporcionada.
+    Aplica las reglas de selectores y fallbacks a un contenedor de noticia ya parseado.
 
-    returns:
-        :rtype: list
-        list: Una lista de diccionarios, donde cada diccionario contiene
-              el 'title', 'kicker', 'image_url', y 'link' de un artículo de noticias.
-              Devuelve una lista vacía si el scraping falla o no se encuentran artículos.
+    Replica en memoria la lógica del bucle WebDriver: kicker opcional, título/enlace
+    desde el <a> del <h2> con fallback al <h2> y al primer <a>, e imagen con dos selectores.
+
+    Args:
+        container (lxml.html.HtmlElement): Nodo 'div.contenedor_dato_modulo'.
+        page_url (str): URL de la página, para resolver enlaces relativos como lo hace el navegador.
+
+    Returns:
+        dict: Diccionario con 'title', 'kicker', 'image_url' y 'link' ("N/A" si no se encontró).
     """
-    print("Iniciando el proceso de scraping con selectores actualizados...")
+    title, kicker, image_url, link = "N/A", "N/A", "N/A", "N/A"
 
-    # Configuración de las opciones de Chrome
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("window-size=1920x1080")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    # Extraer Kicker (si existe)
+    kicker_element = _primer_elemento(container, KICKER_XPATH)
+    if kicker_element is not None:
+        kicker = _texto_visible(kicker_element)
 
-    driver = None # Inicializar driver a None
-    try:
-        # Configurar ChromeDriver
-        print("Instalando/Actualizando ChromeDriver...")
-        service = ChromeService(ChromeDriverManager().install())
-        print("ChromeDriver listo.")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("WebDriver iniciado correctamente.")
-    except Exception as e:
-        print(f"Error al iniciar WebDriver: {e}")
-        print("Asegúrate de que Google Chrome y ChromeDriver estén correctamente instalados y en el PATH,")
-        print("o que la ruta del binario de Chrome esté especificada en las opciones si ejecutas en Docker.")
-        return []
+    # Extraer Título y Enlace (priorizando el <a> dentro del <h2>)
+    title_link_element = _primer_elemento(container, TITLE_LINK_XPATH)
+    if title_link_element is not None:
+        title = _texto_visible(title_link_element)
+        link_raw = title_link_element.get("href")
+        if link_raw: link = urljoin(BASE_URL, urljoin(page_url, link_raw))
+    else:
+        # Fallback: Extraer título del <h2> directamente (si no tiene <a>)
+        title_element_fallback = _primer_elemento(container, TITLE_XPATH)
+        if title_element_fallback is not None:
+            title = _texto_visible(title_element_fallback)
+            # Buscar el primer <a> dentro del contenedor (más genérico)
+            link_general_element = _primer_elemento(container, ".//a")
+            if link_general_element is not None and link_general_element.get("href"):
+                link_raw = urljoin(page_url, link_general_element.get("href"))
+                if link_raw.startswith(("http", "/")):
+                    link = urljoin(BASE_URL, link_raw)
+
+    # Extraer URL de imagen (probando dos selectores comunes)
+    image_element = _primer_elemento(container, IMAGE_XPATH)
+    if image_element is None:
+        image_element = _primer_elemento(container, IMAGE_FALLBACK_XPATH)
+    if image_element is not None:
+        image_url_raw = image_element.get("src")
+        if image_url_raw: image_url = urljoin(BASE_URL, urljoin(page_url, image_url_raw))
 
-    # URL de destino y almacenamiento de datos
-    url = "https://www.yogonet.com/international/"
+    return {"title": title, "kicker": kicker, "image_url": image_url, "link": link}
+
+
+def extract_containers(containers, page_url=TARGET_URL):
+    """
+    Aplica extract_article_fields a contenedores ya parseados y se queda con las noticias válidas.
+
+    Returns:
+        list: Artículos con título y enlace.
+    """
     news_data = []
-    base_url = "https://www.yogonet.com" # Para construir URLs absolutas
+    for i, container in enumerate(containers):
+        try:
+            article = extract_article_fields(container, page_url)
+        except Exception as e:
+            print(f"Error procesando un artículo (índice {i}): {e}")
+            continue
+        # Asegurarse de que al menos título y enlace sean válidos
+        if article["title"] and article["title"] != "N/A" and article["link"] and article["link"] != "N/A":
+            news_data.append(article)
+    return news_data
 
-    try:
-        print(f"Navegando a {url}...")
-        driver.get(url)
-        wait = WebDriverWait(driver, 30)
-        news_container_selector = "div.contenedor_dato_modulo"
-        print(f"Esperando a que los elementos '{news_container_selector}' se carguen...")
-        # Esperar a que al menos un elemento esté presente
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, news_container_selector)))
-        print("Elementos encontrados, procediendo a extraer...")
-        # Pausa breve adicional si es necesario para renderizado dinámico
-        time.sleep(2)
-        news_elements = driver.find_elements(By.CSS_SELECTOR, news_container_selector)
-        print(f"Se encontraron {len(news_elements)} elementos de noticias potenciales.")
-
-        if not news_elements:
-            print("No se encontraron elementos de noticias con el selector principal.")
-
-        for i, news_item_container in enumerate(news_elements):
-            title, kicker, image_url, link = "N/A", "N/A", "N/A", "N/A"
+
+def parse_news_html(page_html, page_url=TARGET_URL, extractor=None):
+    """
+    Extrae las noticias de un snapshot HTML completo de la página, sin llamadas al WebDriver.
+
+    Args:
+        page_html (str): HTML de la página (p. ej. 'driver.page_source').
+        page_url (str): URL de la que proviene el HTML.
+        extractor (HybridExtractor): Si se indica, extrae con él (selectores y modelo ML
+                                     como fallback) en lugar de solo con los selectores.
+
+    Returns:
+        tuple: (news_data, total_contenedores) donde news_data es la lista de artículos
+               válidos (con título y enlace) y total_contenedores el número de
+               'div.contenedor_dato_modulo' encontrados.
+    """
+    if extractor is not None:
+        return extractor.parse_page(page_html, page_url)
+    if not page_html:
+        return [], 0
+    document = lxml_html.fromstring(page_html)
+    containers = document.xpath(NEWS_CONTAINER_XPATH)
+
+    news_data = extract_containers(containers, page_url)
+    metrics.increment("containers_found", len(containers))
+    metrics.increment("articles_kept", len(news_data))
+    metrics.increment("articles_dropped", len(containers) - len(news_data))
+    return news_data, len(containers)
+
+
+def _extract_with_webdriver(news_elements, base_url):
+    """Extracción elemento a elemento con llamadas al WebDriver (modo 'webdriver')."""
+    from selenium.webdriver.common.by import By
+    news_data = []
+    for i, news_item_container in enumerate(news_elements):
+        title, kicker, image_url, link = "N/A", "N/A", "N/A", "N/A"
+        try:
+            # Extraer Kicker (si existe)
             try:
-                # Extraer Kicker (si existe)
-                try:
-                    kicker_element = news_item_container.find_element(By.CSS_SELECTOR, "div.volanta_titulo div.volanta.fuente_roboto_slab")
-                    kicker = kicker_element.text.strip()
-                except: pass # Ignorar si no se encuentra
+                kicker_element = news_item_container.find_element(By.CSS_SELECTOR, "div.volanta_titulo div.volanta.fuente_roboto_slab")
+                kicker = kicker_element.text.strip()
+            except: pass # Ignorar si no se encuentra
 
-                # Extraer Título y Enlace (priorizando el <a> dentro del <h2>)
+            # Extraer Título y Enlace (priorizando el <a> dentro del <h2>)
+            try:
+                title_link_element = news_item_container.find_element(By.CSS_SELECTOR, "div.volanta_titulo h2.titulo.fuente_roboto_slab a")
+                title = title_link_element.text.strip()
+                link_raw = title_link_element.get_attribute("href")
+                if link_raw: link = urljoin(base_url, link_raw)
+            except:
+                # Fallback: Extraer título del <h2> directamente (si no tiene <a>)
                 try:
-                    title_link_element = news_item_container.find_element(By.CSS_SELECTOR, "div.volanta_titulo h2.titulo.fuente_roboto_slab a")
-                    title = title_link_element.text.strip()
-                    link_raw = title_link_element.get_attribute("href")
-                    if link_raw: link = urljoin(base_url, link_raw)
-                except:
-                    # Fallback: Extraer título del <h2> directamente (si no tiene <a>)
-                    try:
-                        title_element_fallback = news_item_container.find_element(By.CSS_SELECTOR, "div.volanta_titulo h2.titulo.fuente_roboto_slab")
-                        title = title_element_fallback.text.strip()
-                        # Intentar obtener el enlace de un <a> general si aún no se tiene
-                        if link == "N/A":
-                            try:
-                                # Buscar el primer <a> dentro del contenedor (más genérico)
-                                link_general_element = news_item_container.find_element(By.TAG_NAME, "a")
-                                link_raw = link_general_element.get_attribute("href")
-                                if link_raw and link_raw.startswith(("http", "/")):
-                                    link = urljoin(base_url, link_raw)
-                            except: pass
-                    except: pass # Ignorar si no se encuentra título
-
-                # Extraer URL de imagen (probando dos selectores comunes)
+                    title_element_fallback = news_item_container.find_element(By.CSS_SELECTOR, "div.volanta_titulo h2.titulo.fuente_roboto_slab")
+                    title = title_element_fallback.text.strip()
+                    # Intentar obtener el enlace de un <a> general si aún no se tiene
+                    if link == "N/A":
+                        try:
+                            # Buscar el primer <a> dentro del contenedor (más genérico)
+                            link_general_element = news_item_container.find_element(By.TAG_NAME, "a")
+                            link_raw = link_general_element.get_attribute("href")
+                            if link_raw and link_raw.startswith(("http", "/")):
+                                link = urljoin(base_url, link_raw)
+                        except: pass
+                except: pass # Ignorar si no se encuentra título
+
+            # Extraer URL de imagen (probando dos selectores comunes)
+            try:
+                image_element = news_item_container.find_element(By.CSS_SELECTOR, "div.imagen a img")
+                image_url_raw = image_element.get_attribute("src")
+                if image_url_raw: image_url = urljoin(base_url, image_url_raw)
+            except:
                 try:
-                    image_element = news_item_container.find_element(By.CSS_SELECTOR, "div.imagen a img")
-                    image_url_raw = image_element.get_attribute("src")
+                    # Fallback: Buscar <img> directamente en div.imagen
+                    image_element_fallback = news_item_container.find_element(By.CSS_SELECTOR, "div.imagen img")
+                    image_url_raw = image_element_fallback.get_attribute("src")
                     if image_url_raw: image_url = urljoin(base_url, image_url_raw)
-                except:
-                    try:
-                        # Fallback: Buscar <img> directamente en div.imagen
-                        image_element_fallback = news_item_container.find_element(By.CSS_SELECTOR, "div.imagen img")
-                        image_url_raw = image_element_fallback.get_attribute("src")
-                        if image_url_raw: image_url = urljoin(base_url, image_url_raw)
-                    except: pass # Ignorar si no se encuentra imagen
+                except: pass # Ignorar si no se encuentra imagen
+
+            # Asegurarse de que al menos título y enlace sean válidos
+            if title and title != "N/A" and link and link != "N/A":
+                news_data.append({"title": title, "kicker": kicker, "image_url": image_url, "link": link})
+
+        except Exception as e:
+            print(f"Error procesando un artículo (índice {i}): {e}. Detalles: T:{title},L:{link},I:{image_url},K:{kicker}")
+            continue # Saltar al siguiente elemento
+    return news_data
 
-                # Asegurarse de que al menos título y enlace sean válidos
-                if title and title != "N/A" and link and link != "N/A":
-                    news_data.append({"title": title, "kicker": kicker, "image_url": image_url, "link": link})
 
-            except Exception as e:
-                print(f"Error procesando un artículo (índice {i}): {e}. Detalles: T:{title},L:{link},I:{image_url},K:{kicker}")
-                continue # Saltar al siguiente elemento
+def get_http_session():
+    """Devuelve la sesión HTTP compartida, con pool de conexiones y reintentos."""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+        _http_session = session
+    return _http_session
+
+
+def fetch_page_http(url, timeout=HTTP_TIMEOUT, article_index=None, archive=None):
+    """
+    Descarga el HTML de una página con la sesión HTTP compartida (sin navegador).
 
-        if not news_data: print("No se pudo extraer ninguna noticia válida.")
+    Args:
+        article_index (ArticleIndex): Si se indica, la petición es condicional
+                                      (If-None-Match / If-Modified-Since) y los nuevos
+                                      validadores quedan pendientes de commit en el índice.
+        archive (SnapshotArchive): Si se indica, el HTML descargado se archiva (ver snapshot_archive).
+
+    Returns:
+        str: El HTML de la página, NOT_MODIFIED si el servidor respondió 304,
+             o None si la petición falla.
+    """
+    headers = {}
+    if article_index is not None:
+        etag, last_modified = article_index.get_validators(url)
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+    try:
+        with metrics.span("http_fetch", url=url):
+            response = get_http_session().get(url, timeout=timeout, headers=headers)
+        metrics.increment("bytes_downloaded", len(response.content))
+        if response.status_code == 304:
+            print(f"{url} sin cambios desde la última descarga (304).")
+            return NOT_MODIFIED
+        response.raise_for_status()
+        if article_index is not None:
+            article_index.save_validators(url, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            # Sin charset explícito requests asume ISO-8859-1; mejor detectar la codificación real
+            response.encoding = response.apparent_encoding
+        snapshot_archive.archive_page(archive, url, response.text)
+        return response.text
+    except requests.RequestException as e:
+        print(f"Error en la descarga HTTP de {url}: {e}")
+        return None
+
+
+def _scrape_with_http(url, article_index=None, archive=None, extractor=None):
+    """
+    Backend 'http': descarga la página sin navegador y la parsea con lxml.
+
+    Returns:
+        tuple: (news_data, total_contenedores). total_contenedores es 0 si la descarga
+               falló o el HTML no contiene los contenedores esperados, y None si la
+               página no cambió desde la última descarga (304).
+    """
+    page_html = fetch_page_http(url, article_index=article_index, archive=archive)
+    if page_html is NOT_MODIFIED:
+        return [], None
+    if page_html is None:
+        return [], 0
+    return parse_news_html(page_html, url, extractor)
+
+
+def _scrape_with_selenium(url, extraction_mode="snapshot", pool=None, archive=None, extractor=None):
+    """
+    Backend 'selenium': renderiza la página en Chrome headless y extrae las noticias.
+
+    Args:
+        pool (BrowserPool): Pool de navegadores a reutilizar. Si es None se crea uno
+                            temporal de una sesión que se cierra al terminar.
+    """
+    if pool is None:
+        with browser_pool.BrowserPool(size=1) as temporary_pool:
+            return _scrape_with_selenium(url, extraction_mode, temporary_pool, archive, extractor)
+
+    with pool.session() as driver:
+        if driver is None:
+            return []
+        return _extract_from_driver(driver, url, extraction_mode, pool.readiness, archive, extractor)
+
+
+def wait_for_page(driver, url, readiness=None):
+    """
+    Espera a que los contenedores de noticias aparezcan y la página se asiente (ver
+    page_readiness). Registra los tiempos en los tramos 'wait_containers' y 'page_settle'.
+
+    Returns:
+        int: Número de contenedores al terminar la espera.
+    """
+    readiness = readiness or page_readiness.PageReadiness()
+    print(f"Esperando a que los elementos '{NEWS_CONTAINER_SELECTOR}' se carguen y la página se asiente...")
+    result = readiness.wait(driver, NEWS_CONTAINER_SELECTOR)
+    metrics.record("wait_containers", result["first_seconds"], url=url)
+    metrics.record("page_settle", result["settle_seconds"], url=url, reason=result["reason"])
+    suffix = "" if result["reason"] == "stable" else f" (tope de {readiness.max_settle:.1f} s alcanzado)"
+    print(f"{result['containers']} contenedores; página asentada en {result['settle_seconds']:.2f} s{suffix}.")
+    return result["containers"]
+
+
+def _extract_from_driver(driver, url, extraction_mode, readiness=None, archive=None, extractor=None):
+    """Navega con un WebDriver ya iniciado, extrae las noticias de la página y la archiva (si hay 'archive')."""
+    # Selenium solo se importa si se usa el navegador (backend 'selenium' o fallback de 'auto')
+    from selenium.webdriver.common.by import By
+
+    news_data = []
+    try:
+        print(f"Navegando a {url}...")
+        with metrics.span("page_load", url=url):
+            driver.get(url)
+        wait_for_page(driver, url, readiness)
+
+        if extraction_mode == "webdriver":
+            news_elements = driver.find_elements(By.CSS_SELECTOR, NEWS_CONTAINER_SELECTOR)
+            print(f"Se encontraron {len(news_elements)} elementos de noticias potenciales.")
+            if not news_elements:
+                print("No se encontraron elementos de noticias con el selector principal.")
+            with metrics.span("extract", mode=extraction_mode):
+                news_data = _extract_with_webdriver(news_elements, BASE_URL)
+            metrics.increment("containers_found", len(news_elements))
+            metrics.increment("articles_kept", len(news_data))
+            metrics.increment("articles_dropped", len(news_elements) - len(news_data))
+            if archive is not None:
+                snapshot_archive.archive_page(archive, url, driver.page_source)
+        else:
+            # Un único round trip al WebDriver; el resto se resuelve en memoria con lxml
+            with metrics.span("extract", mode=extraction_mode):
+                page_html = driver.page_source
+                news_data, total_containers = parse_news_html(page_html, driver.current_url or url, extractor)
+            snapshot_archive.archive_page(archive, url, page_html)
+            print(f"Se encontraron {total_containers} elementos de noticias potenciales.")
+            if not total_containers:
+                print("No se encontraron elementos de noticias con el selector principal.")
 
     except TimeoutError as te: print(f"Timeout esperando los elementos: {te}")
     except Exception as e: print(f"Ocurrió un error durante el scraping: {e}")
-    finally:
-        print("Cerrando el WebDriver.")
-        if driver: driver.quit()
-    print(f"Scraping finalizado. Se extrajeron {len(news_data)} noticias.")
+    return news_data
+
+
+def _scrape_from_archive(url, archive, until=None, extractor=None):
+    """
+    Backend 'replay': extrae las noticias del snapshot archivado más reciente de 'url' (sin red).
+
+    Returns:
+        tuple: (news_data, total_contenedores), con total 0 si no hay snapshot de la URL.
+    """
+    if archive is None:
+        print("El backend 'replay' necesita un archivo de snapshots.")
+        return [], 0
+    entry = archive.latest(url, until=until)
+    if entry is None:
+        print(f"No hay snapshots archivados de {url}.")
+        return [], 0
+    print(f"Reproduciendo el snapshot de {url} descargado el {entry['fetched_at']}...")
+    return parse_news_html(archive.read(entry), url, extractor)
+
+
+def scrape_yogonet(backend="auto", extraction_mode="snapshot", url=TARGET_URL, pool=None, article_index=None,
+                   archive=None, replay_until=None, extractor=None):
+    """
+    Extrae datos del portal de noticias Yogonet International.
+    Utiliza selectores actualizados basados en la estructura HTML proporcionada.
+
+    Args:
+        backend (str): 'auto' (por defecto) descarga la página por HTTP y solo arranca
+                       Chrome si no aparecen los contenedores esperados; 'http' nunca usa
+                       el navegador; 'selenium' siempre usa el navegador; 'replay' lee
+                       la página del archivo de snapshots ('archive').
+        extraction_mode (str): Solo para Selenium. 'snapshot' (por defecto) toma un único
+                               'page_source' y aplica los selectores en memoria con lxml;
+                               'webdriver' consulta cada elemento con llamadas al WebDriver.
+        url (str): URL del listado a extraer.
+        pool (BrowserPool): Pool de navegadores compartido para el backend Selenium (opcional).
+        article_index (ArticleIndex): Índice incremental para peticiones HTTP condicionales (opcional).
+        archive (SnapshotArchive): Archivo de snapshots (opcional). Con los backends de red, cada
+                                   página descargada se archiva; con 'replay' (sin red ni navegador)
+                                   se lee el snapshot más reciente de 'url'.
+        replay_until (str): Solo con 'replay': usa el último snapshot hasta esa fecha ('AAAA-MM-DD').
+        extractor (HybridExtractor): Extractor selectores + modelo ML (opcional, ver hybrid_extractor).
+                                     No se aplica al modo 'webdriver', que consulta cada elemento.
+
+    returns:
+        :rtype: list
+        list: Una lista de diccionarios, donde cada diccionario contiene
+              el 'title', 'kicker', 'image_url', y 'link' de un artículo de noticias.
+              Devuelve una lista vacía si el scraping falla o no se encuentran artículos.
+    """
+    print("Iniciando el proceso de scraping con selectores actualizados...")
+    start_time = time.perf_counter()
+    used_backend = backend
+    news_data = []
+
+    if backend in ("auto", "http"):
+        print(f"Descargando {url} por HTTP (sin navegador)...")
+        news_data, total_containers = _scrape_with_http(url, article_index, archive, extractor)
+        used_backend = "http"
+        if total_containers is not None:
+            print(f"Se encontraron {total_containers} elementos de noticias potenciales.")
+        if total_containers == 0 and backend == "auto":
+            print(f"No se encontraron '{NEWS_CONTAINER_SELECTOR}' en el HTML servido. Usando Selenium como fallback...")
+            used_backend = "selenium"
+            news_data = _scrape_with_selenium(url, extraction_mode, pool, archive, extractor)
+    elif backend == "selenium":
+        news_data = _scrape_with_selenium(url, extraction_mode, pool, archive, extractor)
+    elif backend == "replay":
+        news_data, total_containers = _scrape_from_archive(url, archive, replay_until, extractor)
+        print(f"Se encontraron {total_containers} elementos de noticias potenciales.")
+    else:
+        print(f"Backend de scraping desconocido: '{backend}'. Usa 'auto', 'http', 'selenium' o 'replay'.")
+        return []
+
+    if not news_data: print("No se pudo extraer ninguna noticia válida.")
+    elapsed = time.perf_counter() - start_time
+    print(f"Scraping finalizado (backend: {used_backend}, {elapsed:.2f} s). Se extrajeron {len(news_data)} noticias.")
     return news_data
\ No newline at end of file
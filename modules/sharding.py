@@ -0,0 +1,139 @@
+"""
+Ejecución repartida en varias tareas (shards) de scraping -> procesamiento -> carga.
+
+Cada tarea recibe un índice y el número total de tareas (variables de Cloud Run Jobs
+CLOUD_RUN_TASK_INDEX / CLOUD_RUN_TASK_COUNT, o los flags de main.py), se queda con su
+parte de las URLs semilla y guarda sus resultados en su propio spool Parquet
+('<shard_dir>/shard-<índice>'), sin cargar a BigQuery. El paso de merge reúne después los
+lotes de todos los shards y los carga a la tabla en una sola pasada (con 'truncate' solo
+el primer lote reemplaza la tabla; con 'merge' los enlaces repetidos entre shards se
+unifican).
+
+En Cloud Run las tareas no comparten disco: 'shard_dir' debe estar en un volumen común
+(p. ej. un bucket de Cloud Storage montado, ver deploy.sh). En local, run_local_shards()
+lanza las N tareas como subprocesos.
+"""
+import os
+import subprocess
+import sys
+import time
+
+import modules.crawler as crawler
+from modules.spool import ParquetSpool
+
+TASK_INDEX_VARIABLE = "CLOUD_RUN_TASK_INDEX"
+TASK_COUNT_VARIABLE = "CLOUD_RUN_TASK_COUNT"
+SHARD_PREFIX = "shard-"
+MERGE_DIR = "merged"
+
+
+def resolve_shard(task_index=None, task_count=None):
+    """
+    Índice y número de tareas: los argumentos si se indican y si no las variables de Cloud Run.
+
+    Returns:
+        tuple: (índice, total); (0, 1) si no hay reparto.
+
+    Raises:
+        ValueError: Si el total no es positivo o el índice está fuera de [0, total).
+    """
+    if task_index is None:
+        task_index = int(os.environ.get(TASK_INDEX_VARIABLE, 0))
+    if task_count is None:
+        task_count = int(os.environ.get(TASK_COUNT_VARIABLE, 1))
+    if task_count < 1 or not 0 <= task_index < task_count:
+        raise ValueError(f"Shard inválido: índice {task_index} de {task_count} tareas.")
+    return task_index, task_count
+
+
+def shard_seed_urls(seed_urls, task_index, task_count, max_pages=1, page_url_template=None):
+    """
+    Parte de las URLs que recorre la tarea 'task_index' de 'task_count'.
+
+    El reparto es por turnos sobre la lista de la configuración (la misma en todas las
+    tareas), así que es determinista y equilibrado. Con 'page_url_template' todas las
+    páginas se conocen de antemano y se reparten páginas, no semillas: una sola sección
+    con muchas páginas también se divide entre las tareas. Sin plantilla la paginación
+    sigue el enlace 'siguiente' y se reparten semillas.
+
+    Returns:
+        tuple: (URLs de la tarea, max_pages a usar con ellas en el crawler).
+    """
+    if task_count == 1:
+        return list(seed_urls), max_pages
+    if page_url_template:
+        urls = [crawler.build_page_url(seed, page, page_url_template) for seed in seed_urls for page in range(1, max_pages + 1)]
+        return urls[task_index::task_count], 1
+    return list(seed_urls)[task_index::task_count], max_pages
+
+
+def shard_dir_for(shard_root, task_index):
+    """Carpeta del spool de un shard dentro de 'shard_root'."""
+    return os.path.join(shard_root, f"{SHARD_PREFIX}{task_index:03d}")
+
+
+def with_shard_suffix(path, task_index, task_count):
+    """Añade '.shard-NNN' antes de la extensión si hay reparto (p. ej. para el CSV local de cada tarea)."""
+    if task_count == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{SHARD_PREFIX}{task_index:03d}{extension}"
+
+
+def merge_shards(shard_root, bigquery_target, load_mode="append", max_batch_mb=None, max_retries=None, client=None):
+    """
+    Carga a BigQuery los lotes pendientes de todos los shards de 'shard_root'.
+
+    Los archivos pendientes se mueven primero a '<shard_root>/merged/pending' (con el
+    nombre del shard como prefijo) y se cargan desde ahí con ParquetSpool.flush_to_bigquery,
+    en lotes acotados por tamaño. Si la carga falla, quedan en esa carpeta y el siguiente
+    merge los retoma; con 'truncate', si la tabla ya se reemplazó con los primeros lotes,
+    la marca del spool hace que el siguiente merge añada los que quedan.
+
+    Args:
+        bigquery_target (tuple): (project_id, dataset_id, table_id), o None para solo reunir los lotes.
+
+    Returns:
+        bool: False si algún lote no se pudo cargar tras los reintentos.
+    """
+    if not os.path.isdir(shard_root):
+        print(f"No existe la carpeta de shards '{shard_root}'.")
+        return True
+    spool_kwargs = {} if max_batch_mb is None else {"max_batch_mb": max_batch_mb}
+    merged = ParquetSpool(os.path.join(shard_root, MERGE_DIR), **spool_kwargs)
+    shard_names = sorted(name for name in os.listdir(shard_root) if name.startswith(SHARD_PREFIX))
+    moved = 0
+    for shard_name in shard_names:
+        shard_spool = ParquetSpool(os.path.join(shard_root, shard_name))
+        for path in shard_spool.pending_files():
+            os.replace(path, os.path.join(merged.pending_dir, f"{shard_name}_{os.path.basename(path)}"))
+            moved += 1
+    pending = merged.pending_files()
+    print(f"Merge de shards: {moved} lotes nuevos de {len(shard_names)} shards, {len(pending)} pendientes de cargar.")
+    if bigquery_target is None:
+        print(f"Sin destino BigQuery: los lotes quedan en '{merged.pending_dir}'.")
+        return True
+    flush_kwargs = {"load_mode": load_mode, "client": client}
+    if max_retries is not None:
+        flush_kwargs["max_retries"] = max_retries
+    return merged.flush_to_bigquery(*bigquery_target, **flush_kwargs)
+
+
+def run_local_shards(task_count, script="main.py", extra_args=()):
+    """
+    Ejecuta 'script' como 'task_count' subprocesos en paralelo, uno por shard, con las mismas
+    variables de entorno que Cloud Run Jobs da a cada tarea.
+
+    Returns:
+        list: Código de salida de cada shard, por índice.
+    """
+    print(f"Lanzando {task_count} shards locales de '{script}'...")
+    start_time = time.perf_counter()
+    processes = []
+    for task_index in range(task_count):
+        env = {**os.environ, TASK_INDEX_VARIABLE: str(task_index), TASK_COUNT_VARIABLE: str(task_count)}
+        processes.append(subprocess.Popen([sys.executable, script, *extra_args], env=env))
+    return_codes = [process.wait() for process in processes]
+    failed = [task_index for task_index, code in enumerate(return_codes) if code != 0]
+    print(f"Shards locales finalizados en {time.perf_counter() - start_time:.2f} s; fallidos: {failed or 'ninguno'}.")
+    return return_codes
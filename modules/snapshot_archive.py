@@ -0,0 +1,135 @@
+"""
+Archivo de snapshots HTML de los listados descargados, para re-ejecutar el pipeline sin red.
+
+Cada página se guarda comprimida con zstd en '<archive_dir>/<AAAA-MM-DD>/<HHMMSSffffff>_<hash de la URL>.html.zst'
+y se registra en '<archive_dir>/index.jsonl' con su URL, fecha de descarga (UTC), tamaño y
+SHA-256 del HTML. El índice solo recibe líneas completas añadidas al final, de modo que
+varios hilos (el crawler) pueden archivar a la vez.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import modules.metrics as metrics
+
+INDEX_FILE = "index.jsonl"
+DEFAULT_COMPRESSION_LEVEL = 3 # Rápido: el archivado ocurre en el camino de cada descarga
+
+
+def _parse_date(value):
+    """'AAAA-MM-DD' o ISO completo -> datetime UTC (None si 'value' es None o vacío)."""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class SnapshotArchive:
+    """Archivo de snapshots de páginas (ver el docstring del módulo)."""
+
+    def __init__(self, archive_dir, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        self.archive_dir = archive_dir
+        self.compression_level = compression_level
+        self.index_path = os.path.join(archive_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def save(self, url, page_html, fetched_at=None):
+        """
+        Archiva el HTML de una página.
+
+        Args:
+            fetched_at (datetime): Momento de la descarga (por defecto, ahora en UTC).
+
+        Returns:
+            dict: Entrada del índice ('path' relativo al archivo, 'url', 'fetched_at', 'bytes', 'sha256').
+        """
+        import zstandard
+
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        data = page_html.encode('utf-8')
+        url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        relative_path = os.path.join(fetched_at.strftime("%Y-%m-%d"), f"{fetched_at.strftime('%H%M%S%f')}_{url_hash}.html.zst")
+        path = os.path.join(self.archive_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escritura atómica: el índice nunca apunta a un archivo a medio escribir
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            f.write(zstandard.ZstdCompressor(level=self.compression_level).compress(data))
+        os.replace(temporary_path, path)
+
+        entry = {
+            "path": relative_path,
+            "url": url,
+            "fetched_at": fetched_at.isoformat(timespec="microseconds"),
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        with self._lock, open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def entries(self, since=None, until=None, urls=None):
+        """
+        Snapshots del índice en orden de descarga.
+
+        Args:
+            since, until (str): Fechas 'AAAA-MM-DD' (o ISO) inclusive; una fecha sin hora en
+                                'until' incluye todo ese día.
+            urls (iterable): Si se indica, solo los snapshots de esas URLs.
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        since_moment = _parse_date(since)
+        until_moment = _parse_date(until)
+        if until and len(until) == 10: # Solo fecha: hasta el final del día
+            until_moment = until_moment.replace(hour=23, minute=59, second=59, microsecond=999999)
+        urls = set(urls) if urls else None
+
+        selected = []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break # Línea a medio escribir
+                entry = json.loads(line)
+                fetched_at = datetime.fromisoformat(entry["fetched_at"])
+                if since_moment and fetched_at < since_moment:
+                    continue
+                if until_moment and fetched_at > until_moment:
+                    continue
+                if urls is not None and entry["url"] not in urls:
+                    continue
+                selected.append(entry)
+        selected.sort(key=lambda entry: entry["fetched_at"])
+        return selected
+
+    def latest(self, url, until=None):
+        """Snapshot más reciente de 'url' (hasta 'until', si se indica), o None si no hay ninguno."""
+        entries = self.entries(until=until, urls=[url])
+        return entries[-1] if entries else None
+
+    def read(self, entry):
+        """HTML de un snapshot del índice."""
+        import zstandard
+
+        with open(os.path.join(self.archive_dir, entry["path"]), 'rb') as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode('utf-8')
+
+
+def archive_page(archive, url, page_html):
+    """
+    Archiva una página descargada si hay archivo; un fallo al archivar no interrumpe el scraping.
+
+    Returns:
+        dict: Entrada del índice, o None si no hay archivo o el guardado falló.
+    """
+    if archive is None or not page_html:
+        return None
+    try:
+        with metrics.span("archive_save", url=url):
+            return archive.save(url, page_html)
+    except Exception as e:
+        print(f"No se pudo archivar el snapshot de {url}: {e}")
+        return None
@@ -0,0 +1,163 @@
+import os
+import time
+from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import modules.bigquery_handler as bigquery_handler
+
+# Esquema Arrow equivalente a bigquery_handler.TABLE_FIELDS:
+# 'title_capital_words' se guarda como list<string> (campo REPEATED), no como texto.
+ARROW_SCHEMA = pa.schema([
+    ("title", pa.string()),
+    ("kicker", pa.string()),
+    ("image_url", pa.string()),
+    ("link", pa.string()),
+    ("title_word_count", pa.int64()),
+    ("title_char_count", pa.int64()),
+    ("title_capital_words", pa.list_(pa.string())),
+    ("scrape_date", pa.date32()),
+])
+COMPRESSION = "zstd"
+DEFAULT_MAX_BATCH_MB = 256 # Tamaño máximo (en disco) de los archivos agrupados en una carga
+DEFAULT_MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 5
+TRUNCATED_MARKER = "truncated" # Existe mientras la tabla ya fue reemplazada y quedan lotes de esa carga
+
+
+class ParquetSpool:
+    """
+    Cola local de lotes procesados en archivos Parquet (zstd) pendientes de cargar a BigQuery.
+
+    Cada lote escrito queda en '<spool_dir>/pending' hasta que su carga termina, de modo que
+    si el proceso se interrumpe o BigQuery falla, la siguiente ejecución retoma la carga
+    sin volver a hacer scraping. Un fallo entre la carga y el borrado del archivo puede
+    repetir filas en modo 'append'; 'merge' es idempotente.
+    """
+
+    def __init__(self, spool_dir, max_batch_mb=DEFAULT_MAX_BATCH_MB):
+        self.spool_dir = spool_dir
+        self.pending_dir = os.path.join(spool_dir, "pending")
+        self.upload_dir = os.path.join(spool_dir, "uploading")
+        self.truncated_marker = os.path.join(spool_dir, TRUNCATED_MARKER)
+        self.max_batch_bytes = int(max_batch_mb * 1024 * 1024)
+        self._sequence = 0
+        for directory in (self.pending_dir, self.upload_dir):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+    def write_batch(self, dataframe):
+        """
+        Escribe un DataFrame procesado como un nuevo archivo Parquet pendiente.
+
+        Returns:
+            str: Ruta del archivo escrito, o None si el DataFrame estaba vacío.
+        """
+        if dataframe is None or dataframe.empty:
+            return None
+        df = bigquery_handler.with_scrape_date(dataframe)
+        table = pa.Table.from_pandas(df, schema=ARROW_SCHEMA, preserve_index=False)
+
+        self._sequence += 1
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        filename = f"batch_{timestamp}_{os.getpid()}_{self._sequence:05d}.parquet"
+        final_path = os.path.join(self.pending_dir, filename)
+        # Escritura atómica: un archivo a medio escribir nunca aparece como pendiente
+        temporary_path = final_path + ".tmp"
+        pq.write_table(table, temporary_path, compression=COMPRESSION)
+        os.replace(temporary_path, final_path)
+        print(f"Lote de {table.num_rows} filas guardado en el spool: {final_path}")
+        return final_path
+
+    def pending_files(self):
+        """Archivos pendientes de carga, en orden de escritura."""
+        return sorted(
+            os.path.join(self.pending_dir, name)
+            for name in os.listdir(self.pending_dir)
+            if name.endswith(".parquet")
+        )
+
+    def pending_bytes(self):
+        """Tamaño total (en disco) de los archivos pendientes."""
+        return sum(os.path.getsize(path) for path in self.pending_files())
+
+    def _group_batches(self, files):
+        """Agrupa los archivos pendientes en lotes cuyo tamaño total no supera max_batch_bytes."""
+        batches, current, current_bytes = [], [], 0
+        for path in files:
+            size = os.path.getsize(path)
+            if current and current_bytes + size > self.max_batch_bytes:
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(path)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _build_upload_file(self, batch, batch_number):
+        """Une los archivos de un lote en un único Parquet para enviarlo en un solo job."""
+        if len(batch) == 1:
+            return batch[0]
+        upload_path = os.path.join(self.upload_dir, f"upload_{batch_number:05d}.parquet")
+        table = pa.concat_tables(pq.read_table(path, schema=ARROW_SCHEMA) for path in batch)
+        pq.write_table(table, upload_path, compression=COMPRESSION)
+        return upload_path
+
+    def flush_to_bigquery(self, project_id, dataset_id, table_id, load_mode="append",
+                          client=None, max_retries=DEFAULT_MAX_RETRIES):
+        """
+        Carga a BigQuery todos los archivos pendientes, en lotes acotados por tamaño.
+
+        Con load_mode 'truncate' solo el primer lote reemplaza la tabla; los siguientes se añaden.
+        Tras cargar el primero se guarda una marca en el spool que se borra al vaciarse
+        'pending/': si un lote posterior falla, el siguiente flush añade los lotes que
+        quedan en lugar de volver a reemplazar la tabla (y perder los ya cargados).
+
+        Returns:
+            bool: True si no quedan archivos pendientes, False si algún lote falló tras los reintentos.
+        """
+        files = self.pending_files()
+        if not files:
+            self._clear_truncated_marker()
+            print("No hay lotes pendientes en el spool.")
+            return True
+        if load_mode == "truncate" and os.path.exists(self.truncated_marker):
+            print("La tabla ya se reemplazó en un flush anterior sin terminar: los lotes pendientes se añaden.")
+            load_mode = "append"
+
+        batches = self._group_batches(files)
+        print(f"Cargando {len(files)} archivos del spool a BigQuery en {len(batches)} lotes...")
+        for batch_number, batch in enumerate(batches, start=1):
+            upload_path = self._build_upload_file(batch, batch_number)
+            loaded = False
+            for attempt in range(1, max_retries + 1):
+                loaded = bigquery_handler.load_parquet_to_bigquery(
+                    upload_path, project_id, dataset_id, table_id, load_mode=load_mode, client=client
+                )
+                if loaded:
+                    break
+                if attempt < max_retries:
+                    wait_seconds = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                    print(f"Reintentando el lote {batch_number} en {wait_seconds} s (intento {attempt + 1}/{max_retries})...")
+                    time.sleep(wait_seconds)
+
+            if upload_path not in batch:
+                os.remove(upload_path)
+            if not loaded:
+                print(f"El lote {batch_number} no se pudo cargar; sus archivos quedan pendientes en '{self.pending_dir}'.")
+                return False
+            if load_mode == "truncate":
+                # Antes de borrar los archivos: si el proceso se interrumpe, la marca ya existe
+                with open(self.truncated_marker, 'w', encoding='utf-8') as f:
+                    f.write(datetime.now(timezone.utc).isoformat(timespec="seconds") + "\n")
+                load_mode = "append"
+            for path in batch:
+                os.remove(path)
+        self._clear_truncated_marker()
+        print("Spool cargado completamente a BigQuery.")
+        return True
+
+    def _clear_truncated_marker(self):
+        if os.path.exists(self.truncated_marker):
+            os.remove(self.truncated_marker)